@@ -0,0 +1,81 @@
+"""
+Benchmark decoding of get_health_for_tests response: generated API client models vs fast path.
+Uses recorded responses in stub_api_server format; the mesh can be scaled up to simulate large tests.
+
+Usage: python -m benchmarks.decode_health [--agents N] [--repeat N] [response_file]
+"""
+
+import argparse
+import json
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+# pylint: disable=E0611
+from generated.synthetics_http_client.synthetics import ApiClient
+from generated.synthetics_http_client.synthetics.model.v202101beta1_get_health_for_tests_response import (
+    V202101beta1GetHealthForTestsResponse,
+)
+
+# pylint: enable=E0611
+from infrastructure.data_access.http.response_decoder import decode_health_response
+from infrastructure.data_access.http.synthetics_repo import transform_to_internal_mesh_rows, transform_to_internal_tasks
+
+
+def scale_mesh(health_response: Dict[str, Any], num_agents: int) -> Dict[str, Any]:
+    """Return health response with the mesh of recorded agents repeated to num_agents x num_agents mesh"""
+
+    test_health = health_response["health"][0]
+    mesh = test_health["mesh"]
+    agent_ids = [str(100000 + i) for i in range(num_agents)]
+    rows: List[Dict[str, Any]] = []
+    for i, agent_id in enumerate(agent_ids):
+        row = dict(mesh[i % len(mesh)], id=agent_id)
+        src_columns = row["columns"]
+        row["columns"] = [dict(src_columns[j % len(src_columns)], id=agent_ids[j]) for j in range(num_agents)]
+        rows.append(row)
+    return {"health": [dict(test_health, mesh=rows)]}
+
+
+def decode_generated(body: bytes) -> None:
+    client = ApiClient()
+    response = client.deserialize(SimpleNamespace(data=body), (V202101beta1GetHealthForTestsResponse,), True)
+    transform_to_internal_mesh_rows(response.health[0])
+    transform_to_internal_tasks(response.health[0])
+
+
+def decode_fast(body: bytes) -> None:
+    decode_health_response(body)
+
+
+def best_time(decode: Callable[[bytes], None], body: bytes, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(body)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("response_file", nargs="?", default="stub_api_server/mesh_5x5.json")
+    parser.add_argument("--agents", type=int, default=0, help="scale the recorded mesh to that many agents")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs; the best one is reported")
+    args = parser.parse_args()
+
+    with open(args.response_file, "r") as file:
+        health_response = json.load(file)["health-tests-response"]
+    if args.agents > 0:
+        health_response = scale_mesh(health_response, args.agents)
+    body = json.dumps(health_response).encode()
+
+    print(f"response size: {len(body) / 1e6:.1f} MB")
+    generated_seconds = best_time(decode_generated, body, args.repeat)
+    fast_seconds = best_time(decode_fast, body, args.repeat)
+    print(f"generated models: {generated_seconds * 1000:9.1f} ms")
+    print(f"fast path:        {fast_seconds * 1000:9.1f} ms  ({generated_seconds / fast_seconds:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
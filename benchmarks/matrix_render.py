@@ -0,0 +1,106 @@
+"""
+Benchmark matrix view rendering: table vs heatmap renderer (matrix_renderer in config.yaml).
+Renders synthetic N x N mesh with latest measurement for every connection; reports layout build and serialization
+time for the first request after data update and for the following ones, that get the matrix from layout cache,
+size of the layout serialized to JSON, uncompressed and gzip compressed as sent to the browser, and number of Dash components in it.
+
+Usage: python -m benchmarks.matrix_render [--agents N [N ...]] [--repeat N]
+"""
+
+import argparse
+import gzip
+import json
+import time
+from typing import Any, Tuple
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+from domain.config import Config, MatrixRenderer
+from domain.geo import Coordinates
+from domain.metric import MetricType
+from domain.model import Agent, Agents, MeshColumn, MeshConfig, MeshResults, MeshRow
+from domain.types import AgentID
+from infrastructure.config import ConfigYAML
+from infrastructure.web.response_compression import GZIP_LEVEL
+from presentation.matrix_view import MatrixView
+
+
+class RendererConfig:
+    """Config with matrix_renderer overridden"""
+
+    def __init__(self, config: Config, renderer: MatrixRenderer) -> None:
+        self._config = config
+        self.matrix_renderer = renderer
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._config, name)
+
+
+def make_mesh(num_agents: int) -> Tuple[MeshResults, MeshConfig]:
+    rng = np.random.default_rng(0)
+    agents = Agents()
+    for i in range(num_agents):
+        coords = Coordinates(float(rng.uniform(-180, 180)), float(rng.uniform(-90, 90)))
+        agents.insert(Agent(id=AgentID(str(100000 + i)), name=f"agent-{i}", alias=f"city-{i}", coords=coords))
+    now_us = int(time.time() * 1_000_000)
+    rows = []
+    for from_agent in agents.all():
+        columns = [
+            MeshColumn.from_arrays(
+                to_agent.id,
+                np.array([now_us]),
+                rng.uniform(0, 10, 1),
+                rng.uniform(0, 500, 1),
+                rng.uniform(0, 20, 1),
+            )
+            for to_agent in agents.all()
+            if to_agent.id != from_agent.id
+        ]
+        rows.append(MeshRow(from_agent, columns))
+    return MeshResults(rows), MeshConfig(agents=agents, update_period_seconds=60)
+
+
+def count_components(layout: Any) -> int:
+    if isinstance(layout, (list, tuple)):
+        return sum(count_components(child) for child in layout)
+    if isinstance(layout, dict) and "namespace" in layout:
+        return 1 + count_components(layout["props"].get("children"))
+    return 0
+
+
+def render_seconds(view: MatrixView, results: MeshResults, mesh_config: MeshConfig) -> Tuple[float, str]:
+    start = time.perf_counter()
+    layout = view.make_layout(results, mesh_config, 180, MetricType.LATENCY)
+    body = to_json_plotly(layout)
+    return time.perf_counter() - start, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, nargs="+", default=[10, 50, 150], help="mesh sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs is reported")
+    args = parser.parse_args()
+
+    config = ConfigYAML("data/config.yaml")
+    for num_agents in args.agents:
+        results, mesh_config = make_mesh(num_agents)
+        for renderer in MatrixRenderer:
+            first = cached = float("inf")
+            for _ in range(args.repeat):
+                view = MatrixView(RendererConfig(config, renderer))  # type: ignore
+                seconds, body = render_seconds(view, results, mesh_config)
+                first = min(first, seconds)
+                seconds, body = render_seconds(view, results, mesh_config)
+                cached = min(cached, seconds)
+            layout = json.loads(body)
+            print(
+                f"agents: {num_agents:4d}  renderer: {renderer.value:8}  "
+                f"first: {first * 1000:8.1f}ms  cached: {cached * 1000:7.1f}ms  "
+                f"JSON: {len(body) / 1024:9.1f} kB  "
+                f"gzip: {len(gzip.compress(body.encode(), compresslevel=GZIP_LEVEL)) / 1024:7.1f} kB  components: {count_components(layout):7d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
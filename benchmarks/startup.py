@@ -0,0 +1,94 @@
+"""
+Benchmark gunicorn startup time and memory per worker, with and without preload_app.
+Runs the production server (data/gunicorn.conf.py) against the API server given by KTAPI_URL, eg. stub_api_server.
+Reported per worker: RSS, and PSS (proportional set size) that splits pages shared between processes among them.
+
+Usage: python -m benchmarks.startup [--workers N [N ...]] [--port PORT]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import List, Optional, Tuple
+
+
+def wait_for(url: str, timeout_seconds: float = 60.0) -> Optional[float]:
+    """Seconds until url responds 200; None on timeout"""
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout_seconds:
+        try:
+            with urllib.request.urlopen(url, timeout=1.0):
+                return time.perf_counter() - start
+        except OSError:  # not listening yet, timeout, or error status
+            time.sleep(0.05)
+    return None
+
+
+def worker_pids(master_pid: int) -> List[int]:
+    with open(f"/proc/{master_pid}/task/{master_pid}/children", "r") as file:
+        return [int(pid) for pid in file.read().split()]
+
+
+def memory_kb(pid: int) -> Tuple[int, int]:
+    """(RSS, PSS) of the process, in kB"""
+
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as file:
+        for line in file:
+            key, _, value = line.partition(":")
+            values[key] = value
+    return int(values["Rss"].split()[0]), int(values["Pss"].split()[0])
+
+
+def run_server(workers: int, preload: bool, port: int) -> None:
+    base_url = f"http://127.0.0.1:{port}"
+    command = [sys.executable, "-m", "gunicorn", "--config=data/gunicorn.conf.py", f"--workers={workers}"]
+    command += [f"--bind=127.0.0.1:{port}", "--log-level=warning"]
+    command += ["--preload", "main:run(preload=True)"] if preload else ["main:run()"]
+
+    start = time.perf_counter()
+    server = subprocess.Popen(command)
+    try:
+        serving_seconds = wait_for(base_url + "/healthz")
+        ready_seconds = wait_for(base_url + "/readyz")
+        if serving_seconds is None or ready_seconds is None:
+            print(f"workers: {workers:2d}  preload: {preload!s:5}  server didn't get ready")
+            return
+        ready_seconds += serving_seconds
+        while len(worker_pids(server.pid)) < workers:
+            time.sleep(0.05)
+        all_workers_seconds = time.perf_counter() - start
+
+        memory = [memory_kb(pid) for pid in worker_pids(server.pid)]
+        rss_mb = sum(rss for rss, _ in memory) / len(memory) / 1024
+        pss_mb = sum(pss for _, pss in memory) / len(memory) / 1024
+        print(
+            f"workers: {workers:2d}  preload: {preload!s:5}  "
+            f"serving: {serving_seconds:5.2f}s  ready: {ready_seconds:5.2f}s  all workers: {all_workers_seconds:5.2f}s  "
+            f"per worker RSS: {rss_mb:6.1f} MB  PSS: {pss_mb:6.1f} MB"
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to benchmark")
+    parser.add_argument("--port", type=int, default=8051)
+    args = parser.parse_args()
+
+    if "KTAPI_URL" not in os.environ:
+        print("KTAPI_URL not set; the benchmark would use production API server", file=sys.stderr)
+        sys.exit(1)
+    for workers in args.workers:
+        for preload in (False, True):
+            run_server(workers, preload, args.port)
+
+
+if __name__ == "__main__":
+    main()
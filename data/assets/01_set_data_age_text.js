@@ -0,0 +1,22 @@
+/* Set the data age text from the cache update time, every second; the page itself is the same for all the viewers */
+
+// setDataAgeText sets the data age to the seconds elapsed since the cache update time, marking it stale if too old
+function setDataAgeText() {
+    const domDataAge = document.getElementById("data-age");
+    const domUpdateTime = document.getElementById("data-update-time");
+    const domStaleSeconds = document.getElementById("data-stale-seconds");
+    if (!domDataAge || !domUpdateTime || !domStaleSeconds) {
+        return;
+    }
+    if (domUpdateTime.title == "") {
+        domDataAge.textContent = "Data age: N/A";
+        domDataAge.className = "data_age";
+        return;
+    }
+    const dataAgeSeconds = Math.max(0, Math.floor((Date.now() - new Date(domUpdateTime.title).getTime()) / 1000));
+    const isStale = dataAgeSeconds > parseInt(domStaleSeconds.title);
+    domDataAge.textContent = "Data age: " + dataAgeSeconds + "s" + (isStale ? " (stale)" : "");
+    domDataAge.className = isStale ? "data_age data_age_stale" : "data_age";
+}
+
+setInterval(setDataAgeText, 1000);
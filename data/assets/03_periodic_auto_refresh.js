@@ -1,15 +1,16 @@
 /* Refresh the page periodically if so requested by user */
 
 var pageAutoRefreshTimeout
+var pageAutoRefreshEnabled = false
 
 // Dash client-side function to call when auto-refresh check box is clicked
 window.dash_clientside = Object.assign({}, window.dash_clientside, {
     clientside: {
         auto_refresh : function(selected_checkbox_string) {
             enabled = selected_checkbox_string != "";
+            pageAutoRefreshEnabled = enabled;
             if (enabled) {
-                intervalSeconds = getAutoRefreshIntervalSeconds();
-                pageAutoRefreshTimeout = setTimeout(pageAutoRefresh, intervalSeconds * 1000);
+                schedulePageAutoRefresh();
             } else {
                 clearTimeout(pageAutoRefreshTimeout);
             }
@@ -18,6 +19,14 @@ window.dash_clientside = Object.assign({}, window.dash_clientside, {
     }
 });
 
+function schedulePageAutoRefresh() {
+    clearTimeout(pageAutoRefreshTimeout);
+    if (pageAutoRefreshEnabled) {
+        intervalSeconds = getAutoRefreshIntervalSeconds();
+        pageAutoRefreshTimeout = setTimeout(pageAutoRefresh, intervalSeconds * 1000);
+    }
+}
+
 function getAutoRefreshIntervalSeconds() {
     var domAutoRefreshElement = document.getElementById("auto-refresh-interval-seconds")
     if (domAutoRefreshElement) {
@@ -29,6 +38,15 @@ function getAutoRefreshIntervalSeconds() {
     }
 }
 
+// Matrix is updated in place with the cells that changed since the page was rendered, see: 05_matrix_live_update.js;
+// the page is reloaded if it shows no matrix or the update fails
 function pageAutoRefresh() {
-    location.reload();
+    if (document.getElementById("matrix-data-version")) {
+        updateMatrixInPlace().then(schedulePageAutoRefresh, function(reason) {
+            console.info("Reloading the page: " + reason);
+            location.reload();
+        });
+    } else {
+        location.reload();
+    }
 }
@@ -0,0 +1,119 @@
+/* Draw the connection matrix heatmap from compact arrays sent by the server; tooltips and drill-down links are made here */
+
+var matrixHeatmapData  // data the heatmap is drawn from; kept to apply the matrix updates to
+
+window.dash_clientside = Object.assign({}, window.dash_clientside);
+window.dash_clientside.clientside = Object.assign({}, window.dash_clientside.clientside, {
+    // Dash client-side function to call when heatmap data arrives; returns the heatmap figure
+    matrix_heatmap_figure: function(data) {
+        if (!data) {
+            return {};
+        }
+        matrixHeatmapData = data;
+        let n = data.labels.length;
+        let indices = [...Array(n).keys()];
+        let hover = [];
+        let text = [];
+        for (let i = 0; i < n; i++) {
+            hover.push([]);
+            text.push([]);
+            for (let j = 0; j < n; j++) {
+                hover[i].push(i == j ? "" : heatmapTooltip(data, i, j));
+                text[i].push(i == j ? "" : formatHeatmapValue(data, data.metric, data.values[data.metric][i][j], false));
+            }
+        }
+        let trace = {
+            type: "heatmap",
+            x: indices,
+            y: indices,
+            z: data.states,
+            zmin: -0.5,
+            zmax: data.colors.length - 0.5,
+            colorscale: heatmapColorscale(data.colors),
+            showscale: false,
+            xgap: 1,
+            ygap: 1,
+            hoverongaps: false,
+            hovertext: hover,
+            hovertemplate: "%{hovertext}<extra></extra>",
+        };
+        if (data.show_values) {
+            trace.text = text;
+            trace.texttemplate = "%{text}";
+        }
+        // numeric axes with label ticks, as agent labels are not guaranteed to be unique
+        let axis = {tickmode: "array", tickvals: indices, ticktext: data.labels, showgrid: false, zeroline: false, automargin: true};
+        let layout = {
+            xaxis: Object.assign({side: "top", tickangle: -45}, axis),
+            yaxis: Object.assign({autorange: "reversed"}, axis),
+            margin: {t: 20, r: 20, b: 20, l: 20},
+            plot_bgcolor: "white",
+            autosize: true,
+        };
+        return {data: [trace], layout: layout};
+    },
+
+    // Dash client-side function to call when heatmap cell is clicked; navigates to connection time-series
+    matrix_heatmap_click: function(clickData, data) {
+        if (!clickData || !data) {
+            return "";
+        }
+        let point = clickData.points[0];
+        if (point.x == point.y) {
+            return "";
+        }
+        let path = data.time_series_path
+            .replace("__from__", encodeURIComponent(data.ids[point.y]))
+            .replace("__to__", encodeURIComponent(data.ids[point.x]));
+        window.location.href = path;
+        return path;
+    }
+});
+
+// Discrete colorscale; state code k is drawn with colors[k]
+function heatmapColorscale(colors) {
+    let scale = [];
+    colors.forEach(function(color, k) {
+        scale.push([k / colors.length, color]);
+        scale.push([(k + 1) / colors.length, color]);
+    });
+    return scale;
+}
+
+function formatHeatmapValue(data, metricName, value, includeUnit) {
+    if (value === null) {
+        return includeUnit ? "N/A" : "-";
+    }
+    let metric = data.metrics.find(m => m.name == metricName);
+    return value.toFixed(metric.decimals) + (includeUnit ? metric.unit : "");
+}
+
+function heatmapTooltip(data, i, j) {
+    let lines = [
+        "From: " + data.names[i],
+        "To: " + data.names[j],
+        "Distance: " + (data.distances[i][j] === null ? "N/A" : data.distances[i][j] + " " + data.distance_unit),
+    ];
+    if (data.timestamps[i][j] !== null) {
+        data.metrics.forEach(function(metric) {
+            lines.push(metric.name + ": " + formatHeatmapValue(data, metric.name, data.values[metric.name][i][j], true));
+        });
+        lines.push("Timestamp: " + new Date(data.timestamps[i][j]).toLocaleString());
+    }
+    return lines.join("<br>");
+}
+
+// applyHeatmapCells updates heatmap data with changed cells and redraws the heatmap, see: 05_matrix_live_update.js
+function applyHeatmapCells(cells) {
+    const data = matrixHeatmapData;
+    for (let k = 0; k < cells.rows.length; k++) {
+        const i = cells.rows[k], j = cells.cols[k];
+        data.states[i][j] = cells.states[k];
+        data.timestamps[i][j] = cells.timestamps[k];
+        data.metrics.forEach(function(metric) {
+            data.values[metric.name][i][j] = cells.values[metric.name][k];
+        });
+    }
+    const figure = window.dash_clientside.clientside.matrix_heatmap_figure(data);
+    Plotly.react(document.querySelector("#matrix-heatmap .js-plotly-plot"), figure.data, figure.layout);
+}
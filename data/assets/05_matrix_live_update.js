@@ -0,0 +1,92 @@
+/* Update the matrix page in place with the cells that changed since its data version, instead of reloading it */
+
+// updateMatrixInPlace requests the matrix changes and applies them; the promise is rejected if the page needs reload
+function updateMatrixInPlace() {
+    const domVersion = document.getElementById("matrix-data-version");
+    const domMetric = document.getElementById("matrix-data-metric");
+    const query = new URLSearchParams({metric: domMetric.title, version: domVersion.title});
+    return fetch("/matrix-updates?" + query.toString())
+        .then(function(response) {
+            if (!response.ok) {
+                throw new Error("matrix update request failed with status " + response.status);
+            }
+            return response.json();
+        })
+        .then(function(update) {
+            if (update.reload) {
+                throw new Error("matrix layout changed");
+            }
+            if (update.cells) {
+                if (document.getElementById("matrix-heatmap")) {
+                    applyHeatmapCells(update.cells);
+                } else {
+                    applyTableCells(update.cells, update.format, domMetric.title);
+                }
+            }
+            applyHeader(update.header);
+            domVersion.title = update.version;
+        });
+}
+
+function applyHeader(header) {
+    const domUpdateTime = document.getElementById("data-update-time");
+    if (domUpdateTime) {
+        domUpdateTime.title = header.data_update_time;
+        setDataAgeText();
+    }
+    const domTimestampLow = document.getElementById("timestamp-low");
+    const domTimestampHigh = document.getElementById("timestamp-high");
+    if (domTimestampLow && domTimestampHigh) {
+        domTimestampLow.title = header.timestamp_low;
+        domTimestampHigh.title = header.timestamp_high;
+        setTimestampsToLocalTime();
+    }
+}
+
+// applyTableCells updates matrix table cells: color, text and tooltip. Table row 0 and column 0 hold agent labels
+function applyTableCells(cells, format, metricName) {
+    const domTable = document.querySelector(".connection-matrix");
+    for (let k = 0; k < cells.rows.length; k++) {
+        const domCell = domTable.rows[cells.rows[k] + 1].cells[cells.cols[k] + 1];
+        const hasData = cells.timestamps[k] !== null;
+        domCell.style.backgroundColor = format.colors[cells.states[k]];
+
+        const domOverlay = domCell.querySelector(".cell-overlay");
+        if (format.show_values && domOverlay) {
+            domOverlay.textContent = hasData ? formatTableValue(format, metricName, cells.values[metricName][k], false) : "-";
+        }
+
+        // tooltip: From, To and Distance rows stay, metric and timestamp rows are replaced
+        const domTooltip = domCell.querySelector(".tooltip-window tbody");
+        if (!domTooltip) {
+            continue;
+        }
+        while (domTooltip.rows.length > 3) {
+            domTooltip.deleteRow(-1);
+        }
+        if (hasData) {
+            format.metrics.forEach(function(metric) {
+                appendTooltipRow(domTooltip, metric.name, formatTableValue(format, metric.name, cells.values[metric.name][k], true));
+            });
+            appendTooltipRow(domTooltip, "Timestamp", cells.timestamp_texts[k]);
+        }
+    }
+}
+
+function formatTableValue(format, metricName, value, includeUnit) {
+    if (value === null) {
+        return "N/A";
+    }
+    const metric = format.metrics.find(m => m.name == metricName);
+    return value.toFixed(metric.decimals) + (includeUnit ? metric.unit : "");
+}
+
+function appendTooltipRow(domTooltip, key, value) {
+    const domRow = domTooltip.insertRow(-1);
+    const domKey = domRow.insertCell(-1);
+    domKey.className = "tooltip-table-key";
+    domKey.textContent = key;
+    const domValue = domRow.insertCell(-1);
+    domValue.className = "tooltip-table-value";
+    domValue.textContent = value;
+}
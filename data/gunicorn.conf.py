@@ -2,11 +2,24 @@
 
 import multiprocessing
 
-wsgi_app = "main:run()"
-workers = 1  # only one worker process to maximize mesh results caching profits
+# load WebApp once, in the master process, before forking the workers: imports, configuration and cache snapshot
+# (data_snapshot_path) are then shared by the workers copy-on-write, so the workers start faster and use less memory
+preload_app = False
+wsgi_app = f"main:run(preload={preload_app})"
+# only one worker process to maximize mesh results caching profits.
+# With data_shared_cache_path set in config.yaml, the workers share single data cache; then workers can be increased,
+# eg. to multiprocessing.cpu_count(), to render pages on multiple cores without multiplying API requests
+workers = 1
 bind = ":8050"
 timeout = 30
 # Worker is changed to prevent worker timeouts
 # See: https://github.com/benoitc/gunicorn/issues/1801#issuecomment-585886471
 worker_class = "gthread"
 threads = 2 * multiprocessing.cpu_count() + 1  # this formula is suggested in gunicorn docs
+
+
+def post_worker_init(worker):
+    # background threads don't survive fork; with preload_app, WebApp threads are started in each worker
+    import main
+
+    main.start()
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from domain.model.mesh_config import MeshConfig
+from domain.model.mesh_results import MeshResults
+from domain.repo import (
+    Repo,
+    get_mesh_test_results_and_config,
+    get_mesh_test_results_num_requests,
+    get_mesh_test_results_shards,
+)
+from domain.types import AgentID, TaskID, TestID
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.agent_ids: Set[AgentID] = set()
+        self.task_ids: Set[TaskID] = set()
+        self.all_tasks = False  # at least one request asked for entire rows
+        self.history_length_seconds = 0
+        self.num_requests = 0
+        self.done = threading.Event()
+        self.results: Optional[MeshResults] = None
+        self.error: Optional[Exception] = None
+
+    def add(self, agent_ids: List[AgentID], task_ids: List[TaskID], history_length_seconds: int) -> None:
+        self.agent_ids.update(agent_ids)
+        self.task_ids.update(task_ids)
+        self.all_tasks = self.all_tasks or not task_ids
+        self.history_length_seconds = max(self.history_length_seconds, history_length_seconds)
+        self.num_requests += 1
+
+
+class BatchingRepo:
+    """
+    BatchingRepo implements domain.Repo protocol.
+    Requests for results of selected agents (time-series requests) that arrive within the batch window are sent
+    to the source repo as a single request for the union of agent_ids and task_ids, and the longest history.
+    The combined results are then split back by agent rows, so every requester gets the rows it asked for.
+    The rows may hold more connections than requested - these are valid results requested by other batch members.
+    Requests for all agents are passed to the source repo as they are, concurrently with config request
+    if the source repo implements domain.ConcurrentRepo protocol, and in shards if it implements domain.ShardedRepo
+    """
+
+    def __init__(self, source_repo: Repo, batch_window_seconds: float) -> None:
+        self._source_repo = source_repo
+        self._batch_window_seconds = batch_window_seconds
+        self._lock = threading.Lock()
+        self._open_batches: Dict[Tuple[TestID, bool], _Batch] = {}
+
+    def get_mesh_config(self, test_id: TestID) -> MeshConfig:
+        return self._source_repo.get_mesh_config(test_id)
+
+    def get_mesh_test_results(
+        self,
+        test_id: TestID,
+        history_length_seconds: int,
+        timeseries: bool = True,
+        agent_ids: Optional[List[AgentID]] = None,
+        task_ids: Optional[List[TaskID]] = None,
+    ) -> MeshResults:
+        if not agent_ids:
+            return self._source_repo.get_mesh_test_results(
+                test_id, history_length_seconds, timeseries, agent_ids, task_ids
+            )
+
+        key = (test_id, timeseries)
+        with self._lock:
+            batch = self._open_batches.get(key)
+            is_leader = batch is None
+            if batch is None:
+                batch = _Batch()
+                self._open_batches[key] = batch
+            batch.add(agent_ids, task_ids or [], history_length_seconds)
+
+        if is_leader:
+            self._send(test_id, timeseries, batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        assert batch.results is not None
+        return batch.results.select_rows(agent_ids)
+
+    def get_mesh_test_results_and_config(
+        self,
+        test_id: TestID,
+        history_length_seconds: int,
+        timeseries: bool = True,
+        agent_ids: Optional[List[AgentID]] = None,
+        task_ids: Optional[List[TaskID]] = None,
+    ) -> Tuple[MeshResults, MeshConfig]:
+        if not agent_ids:
+            return get_mesh_test_results_and_config(
+                self._source_repo, test_id, history_length_seconds, timeseries, agent_ids, task_ids
+            )
+        # batched results request is issued by the batch leader; config request can't join it
+        results = self.get_mesh_test_results(test_id, history_length_seconds, timeseries, agent_ids, task_ids)
+        return results, self.get_mesh_config(test_id)
+
+    def get_mesh_test_results_shards(
+        self, test_id: TestID, history_length_seconds: int, agent_ids: List[AgentID], timeseries: bool = True
+    ) -> Iterator[MeshResults]:
+        return get_mesh_test_results_shards(self._source_repo, test_id, history_length_seconds, agent_ids, timeseries)
+
+    def num_shards(self, num_agents: int) -> int:
+        return get_mesh_test_results_num_requests(self._source_repo, num_agents)
+
+    def _send(self, test_id: TestID, timeseries: bool, batch: _Batch) -> None:
+        time.sleep(self._batch_window_seconds)
+        with self._lock:
+            # close the batch; requests arriving from now on start a new one
+            del self._open_batches[(test_id, timeseries)]
+
+        logger.debug(
+            "Sending batch of %d requests (agents: %d, tasks: %s)",
+            batch.num_requests,
+            len(batch.agent_ids),
+            "all" if batch.all_tasks else len(batch.task_ids),
+        )
+        try:
+            batch.results = self._source_repo.get_mesh_test_results(
+                test_id=test_id,
+                history_length_seconds=batch.history_length_seconds,
+                timeseries=timeseries,
+                agent_ids=sorted(batch.agent_ids),
+                task_ids=[] if batch.all_tasks else sorted(batch.task_ids),
+            )
+        except Exception as err:
+            batch.error = err
+        finally:
+            batch.done.set()
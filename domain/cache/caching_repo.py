@@ -0,0 +1,30 @@
+from typing import Optional, Protocol
+
+from domain.model.mesh_config import MeshConfig
+from domain.model.mesh_results import MeshResults
+from domain.types import AgentID
+
+
+class CachingRepo(Protocol):
+    """Mesh test results cache, as used for serving the pages"""
+
+    @property
+    def min_history_seconds(self) -> int:
+        pass
+
+    @property
+    def data_age_seconds(self) -> Optional[int]:
+        pass
+
+    @property
+    def data_update_time(self) -> Optional[float]:
+        pass
+
+    def get_mesh_config(self) -> MeshConfig:
+        pass
+
+    def get_mesh_results_all_connections(self) -> MeshResults:
+        pass
+
+    def get_mesh_results_single_connection(self, from_agent: AgentID, to_agent: AgentID) -> MeshResults:
+        pass
@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from domain.cache.caching_repo_request_driven import CachingRepoRequestDriven
+from domain.cache.snapshot_store import MeshSnapshot
+from domain.model.mesh_results import MeshResults
+from domain.repo import Repo
+from domain.request_scheduler import RequestPriority
+from domain.types import AgentID, TestID
+
+logger = logging.getLogger(__name__)
+
+
+class CachingRepoBackgroundRefresh(CachingRepoRequestDriven):
+    """
+    Get and cache mesh test results, refreshing the cache in a background thread (stale-while-revalidate),
+    started by start():
+    - get_mesh_results_all_connections() returns cached results; all connections are refreshed periodically
+    - get_mesh_results_single_connection() returns cached results and schedules the connection for refresh
+    Only when cached results get older than max stale period, eg. the source repo keeps failing,
+    the page request falls back to fetching the data inline.
+    When the request budget is exhausted, the refresh is postponed until the budget allows it.
+    """
+
+    def __init__(
+        self,
+        source_repo: Repo,
+        monitored_test_id: TestID,
+        data_request_interval_periods: int,
+        data_history_length_periods: int,
+        data_min_periods: int,
+        data_config_refresh_periods: int,
+        api_quota_requests_per_hour: int,
+        data_max_stale_periods: int,
+        initial_snapshot: Optional[MeshSnapshot] = None,
+    ) -> None:
+        super().__init__(
+            source_repo,
+            monitored_test_id,
+            data_request_interval_periods,
+            data_history_length_periods,
+            data_min_periods,
+            data_config_refresh_periods,
+            api_quota_requests_per_hour,
+            initial_snapshot,
+        )
+        test_update_period_seconds = self._get_config().update_period_seconds
+        self._refresh_interval_seconds = data_request_interval_periods * test_update_period_seconds
+        self._max_stale_seconds = data_max_stale_periods * test_update_period_seconds
+        self._pending_connections: Dict[str, Tuple[AgentID, AgentID]] = {}
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._refresher = threading.Thread(target=self._run, name="mesh-cache-refresher", daemon=True)
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the background refresh; call it in the process that serves the pages, eg. after fork"""
+
+        with self._start_lock:
+            if not self._refresher.is_alive():
+                self._refresher.start()
+
+    @property
+    def refreshes_in_background(self) -> bool:
+        return True
+
+    def get_mesh_results_all_connections(self) -> MeshResults:
+        """
+        Get cached results for all connections, as refreshed by the background thread
+        """
+
+        data_age_seconds = self.data_age_seconds
+        if data_age_seconds is None or data_age_seconds > self._max_stale_seconds:
+            logger.debug(
+                "Cached data age: %s, max stale: %ds. Fetching inline", data_age_seconds, self._max_stale_seconds
+            )
+            return super().get_mesh_results_all_connections()
+        return self._get_results()
+
+    def get_mesh_results_single_connection(self, from_agent: AgentID, to_agent: AgentID) -> MeshResults:
+        """
+        Get cached results for single connection; full history data becomes available after background refresh
+        """
+
+        key = f"{from_agent}:{to_agent}"
+        if self._scheduler.try_acquire(key, RequestPriority.TIME_SERIES, self._request_cost()):
+            with self._pending_lock:
+                self._pending_connections[key] = (from_agent, to_agent)
+            self._wakeup.set()
+        return self._get_results()
+
+    def _run(self) -> None:
+        logger.info("Background refresh started (interval: %ds)", self._refresh_interval_seconds)
+        next_refresh_time = time.monotonic()
+        while True:
+            # clear before taking pending connections, so that no wakeup gets lost
+            self._wakeup.clear()
+
+            if time.monotonic() >= next_refresh_time:
+                next_refresh_time = time.monotonic() + self._refresh_interval_seconds
+                if self._scheduler.try_acquire(
+                    priority=RequestPriority.MATRIX, cost=self._request_cost(all_connections=True)
+                ):
+                    self._update_all_connections()
+                else:
+                    # out of request budget; retry as soon as the budget allows
+                    wait_seconds = self._scheduler.seconds_until_available(
+                        RequestPriority.MATRIX, self._request_cost(all_connections=True)
+                    )
+                    logger.info("Request budget exhausted; next refresh in %.0fs", wait_seconds)
+                    next_refresh_time = time.monotonic() + min(wait_seconds, self._refresh_interval_seconds)
+
+            for from_agent, to_agent in self._take_pending_connections():
+                self._update_single_connection(from_agent, to_agent)
+
+            self._wakeup.wait(timeout=max(0.0, next_refresh_time - time.monotonic()))
+
+    def _take_pending_connections(self) -> List[Tuple[AgentID, AgentID]]:
+        with self._pending_lock:
+            pending = list(self._pending_connections.values())
+            self._pending_connections.clear()
+        return pending
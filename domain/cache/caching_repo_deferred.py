@@ -0,0 +1,79 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from domain.cache.caching_repo_request_driven import CachingRepoRequestDriven
+from domain.model.mesh_config import MeshConfig
+from domain.model.mesh_results import MeshResults
+from domain.types import AgentID
+
+logger = logging.getLogger(__name__)
+
+
+class CachingRepoDeferred:
+    """
+    Mesh test results cache that is set up in a background thread, so that WebApp starts serving pages right away:
+    making the cache (source repo, mesh config) and the first data fetch are retried until they succeed.
+    Nothing happens until start() is called, so the object can be made before forking worker processes.
+    Until the cache has data, empty results are served; data_age_seconds is None
+    """
+
+    _RETRY_SECONDS = 10.0  # delay before retrying the cache setup, eg. when the API is unreachable
+    _POLL_SECONDS = 1.0  # how often to check if background refreshed cache got its first data
+
+    def __init__(self, make_cache: Callable[[], CachingRepoRequestDriven]) -> None:
+        self._make_cache = make_cache
+        self._cache: Optional[CachingRepoRequestDriven] = None
+
+    def start(self) -> None:
+        """Start the cache setup; call it in the process that serves the pages, eg. after fork"""
+
+        threading.Thread(target=self._run, name="mesh-cache-warm-up", daemon=True).start()
+
+    @property
+    def min_history_seconds(self) -> int:
+        return self._cache.min_history_seconds if self._cache else 0
+
+    @property
+    def data_age_seconds(self) -> Optional[int]:
+        return self._cache.data_age_seconds if self._cache else None
+
+    @property
+    def data_update_time(self) -> Optional[float]:
+        return self._cache.data_update_time if self._cache else None
+
+    def get_mesh_config(self) -> MeshConfig:
+        return self._cache.get_mesh_config() if self._cache else MeshConfig()
+
+    def get_mesh_results_all_connections(self) -> MeshResults:
+        return self._cache.get_mesh_results_all_connections() if self._cache else MeshResults()
+
+    def get_mesh_results_single_connection(self, from_agent: AgentID, to_agent: AgentID) -> MeshResults:
+        return self._cache.get_mesh_results_single_connection(from_agent, to_agent) if self._cache else MeshResults()
+
+    def _run(self) -> None:
+        started = time.monotonic()
+        while True:
+            try:
+                cache = self._make_cache()
+                break
+            except Exception:
+                logger.exception("Mesh cache setup error; retrying in %.0fs", self._RETRY_SECONDS)
+                time.sleep(self._RETRY_SECONDS)
+
+        # cache restored from snapshot can serve pages already; otherwise pages wait for the first data fetch
+        cache.start()
+        if cache.data_age_seconds is not None:
+            self._cache = cache
+        while cache.data_age_seconds is None:
+            if cache.refreshes_in_background:
+                # first fetch is done by the refresher; fetching here too would take from request budget twice
+                time.sleep(self._POLL_SECONDS)
+                continue
+            cache.get_mesh_results_all_connections()
+            if cache.data_age_seconds is None:
+                logger.warning("Mesh cache first data fetch failed; retrying in %.0fs", self._RETRY_SECONDS)
+                time.sleep(self._RETRY_SECONDS)
+        self._cache = cache
+        logger.info("Mesh cache warm-up finished in %.1fs", time.monotonic() - started)
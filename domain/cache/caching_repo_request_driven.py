@@ -1,13 +1,21 @@
 import logging
+import math
 import threading
-from copy import deepcopy
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Callable, Optional, Tuple
+from typing import Callable, Iterable, List, Optional, Set, Tuple
 
+from domain.cache.single_flight import SingleFlight, SingleFlightStats
+from domain.cache.snapshot_store import MeshSnapshot
 from domain.model.mesh_config import MeshConfig
 from domain.model.mesh_results import MeshResults
-from domain.rate_limiter import RateLimiter
-from domain.repo import Repo
+from domain.repo import (
+    Repo,
+    get_mesh_test_results_and_config,
+    get_mesh_test_results_num_requests,
+    get_mesh_test_results_shards,
+)
+from domain.request_scheduler import RequestBudgetStats, RequestPriority, RequestScheduler
 from domain.types import AgentID, TaskID, TestID
 
 logger = logging.getLogger(__name__)
@@ -18,8 +26,16 @@ class CachingRepoRequestDriven:
     Get and cache mesh test results:
     - get_mesh_results_all_connections() allows to get and cache test results for all connections but without timeseries data
     - get_mesh_results_single_connection() allows to get and cache test results for single connection but with timeseries data
+    Concurrent requests for the same data share a single fetch from the source repo.
+    Mesh config is refetched only every data_config_refresh_periods, or when test results indicate it changed.
+    Requests to the source repo are admitted by RequestScheduler, which models the API request quota;
+    when the request budget runs low, single connection requests are served from cache first
     """
 
+    _ALL_CONNECTIONS_KEY = "*"
+    _FETCH_OVERLAP_PERIODS = 1  # how far back before the newest cached sample to fetch, to catch late samples
+    _STALE_ROW_PERIODS = 3  # rows lagging behind the newest row by more than that, eg. offline agents, are stale
+
     def __init__(
         self,
         source_repo: Repo,
@@ -27,132 +43,416 @@ class CachingRepoRequestDriven:
         data_request_interval_periods: int,
         data_history_length_periods: int,
         data_min_periods: int,
+        data_config_refresh_periods: int,
+        api_quota_requests_per_hour: int,
+        initial_snapshot: Optional[MeshSnapshot] = None,
     ) -> None:
         self._source_repo = source_repo
         self._test_id = monitored_test_id
-        config = source_repo.get_mesh_config(self._test_id)
+        if initial_snapshot and initial_snapshot.test_id != monitored_test_id:
+            logger.info("Mesh cache snapshot rejected: taken for test '%s'", initial_snapshot.test_id)
+            initial_snapshot = None
+        # with initial snapshot, eg. saved before restart, cached results are served until the first update
+        # and mesh config gets refreshed with it
+        config = initial_snapshot.config if initial_snapshot else source_repo.get_mesh_config(self._test_id)
         test_update_period_seconds = config.update_period_seconds
         self._min_history_seconds = test_update_period_seconds * data_min_periods
         self._full_history_seconds = data_history_length_periods * test_update_period_seconds
-        self._rate_limiter = RateLimiter(data_request_interval_periods * test_update_period_seconds)
+        self._fetch_overlap_seconds = self._FETCH_OVERLAP_PERIODS * test_update_period_seconds
+        self._stale_row_lag = timedelta(seconds=self._STALE_ROW_PERIODS * test_update_period_seconds)
+        self._scheduler = RequestScheduler(
+            data_request_interval_periods * test_update_period_seconds, api_quota_requests_per_hour
+        )
+        self._config_ttl_seconds = data_config_refresh_periods * test_update_period_seconds
+        self._config_fetch_time = time.monotonic()
+        self._config_invalidated = initial_snapshot is not None  # set when test results indicate config change
         self._mesh_config = config
         self._mesh_results = MeshResults()
-        self._mesh_lock = threading.Lock()
+        self._mesh_lock = threading.Lock()  # guards publishing new snapshot; reading the snapshot is lock-free
+        self._update_lock = threading.Lock()  # serializes cache updates, so that no update gets lost
+        self._single_flight: SingleFlight[MeshResults] = SingleFlight()
+        self._last_update_time: Optional[float] = None  # time.monotonic() of the last successful cache update
+        self._last_update_utc: Optional[float] = None  # time.time() of the same update, as shown to the users
+        self._connections_with_full_history: Set[str] = set()  # connections that can be fetched incrementally
+        self._full_fetch_due = False  # set when a single connection update brings new test configuration
+        if initial_snapshot:
+            self.restore(initial_snapshot)
+
+    def start(self) -> None:
+        """Start keeping the cache up to date; request-driven cache is updated by the page requests, so nothing to do"""
+
+    @property
+    def refreshes_in_background(self) -> bool:
+        """True if the cache gets its data without page requests, once started"""
+
+        return False
 
     @property
     def min_history_seconds(self) -> int:
         return self._min_history_seconds
 
+    @property
+    def data_age_seconds(self) -> Optional[int]:
+        """Seconds since the last successful cache update; None if the cache was never updated"""
+
+        with self._mesh_lock:
+            last_update_time = self._last_update_time
+        if last_update_time is None:
+            return None
+        return int(time.monotonic() - last_update_time)
+
+    @property
+    def data_update_time(self) -> Optional[float]:
+        """UTC epoch seconds of the last successful cache update; None if the cache was never updated"""
+
+        with self._mesh_lock:
+            return self._last_update_utc
+
     def get_mesh_config(self) -> MeshConfig:
         return self._get_config()
 
+    @property
+    def single_flight_stats(self) -> SingleFlightStats:
+        """Number of upstream fetches issued, and number of callers that shared a fetch already in flight"""
+
+        return self._single_flight.stats
+
+    @property
+    def request_budget_stats(self) -> RequestBudgetStats:
+        """Remaining API request budget and projected time until it runs out"""
+
+        return self._scheduler.stats
+
+    def snapshot(self) -> MeshSnapshot:
+        """Current cache content, eg. to be shared with other processes or persisted"""
+
+        with self._mesh_lock:
+            results = self._mesh_results
+            config = self._mesh_config
+            update_time = self._last_update_utc
+        return MeshSnapshot(
+            self._test_id,
+            results,
+            config,
+            self.min_history_seconds,
+            update_time,
+            frozenset(self._connections_with_full_history),
+        )
+
+    def restore(self, snapshot: MeshSnapshot) -> bool:
+        """
+        Fill the cache with snapshot content, eg. persisted before restart; samples outside the time window are dropped.
+        Snapshot taken for different test is rejected, as well as any snapshot once the cache got updated.
+        Snapshot taken with different configuration of the same test is restored; mesh config gets refreshed
+        with the first update, and the cache gets replaced if the configuration has changed
+        """
+
+        with self._update_lock:
+            if self._last_update_time is not None:
+                logger.info("Mesh cache snapshot rejected: cache already updated")
+                return False
+            if snapshot.test_id != self._test_id:
+                logger.info("Mesh cache snapshot rejected: taken for test '%s'", snapshot.test_id)
+                return False
+
+            results = self._drop_samples_outside_timewindow(snapshot.results)
+            self._connections_with_full_history = set(snapshot.connections_with_full_history)
+            with self._mesh_lock:
+                self._mesh_results = results
+                self._mesh_config.agents.update_names_aliases(results.participating_agents)
+                if snapshot.update_time is not None:
+                    self._last_update_time = time.monotonic() - max(0.0, time.time() - snapshot.update_time)
+                    self._last_update_utc = snapshot.update_time
+        logger.info("Mesh cache restored with %d connections", results.connection_matrix.num_connections_with_data())
+        return True
+
     def get_mesh_results_all_connections(self) -> MeshResults:
         """
         Get results for all connections but with minimum history data
         """
 
-        if not self._rate_limiter.check_and_update():
-            logger.debug("Returning cached data (minimum update interval: %ds)", self._rate_limiter.interval_seconds)
+        if not self._scheduler.try_acquire(
+            self._ALL_CONNECTIONS_KEY, RequestPriority.MATRIX, self._request_cost(all_connections=True)
+        ):
+            joined = self._single_flight.join(self._ALL_CONNECTIONS_KEY)
+            if joined is not None:
+                return joined
+            logger.debug(
+                "Returning cached data (minimum update interval: %ds or budget low)", self._scheduler.interval_seconds
+            )
             return self._get_results()
 
-        getter = self._get_all_connections()
-        return self._update(getter)
+        return self._update_all_connections()
 
     def get_mesh_results_single_connection(self, from_agent: AgentID, to_agent: AgentID) -> MeshResults:
         """
         Get results for single connection but with full history data
         """
 
-        if not self._rate_limiter.check_and_update(f"{from_agent}:{to_agent}"):
-            logger.debug("Returning cached data (minimum update interval: %ds)", self._rate_limiter.interval_seconds)
+        connection = f"{from_agent}:{to_agent}"
+        if not self._scheduler.try_acquire(connection, RequestPriority.TIME_SERIES, self._request_cost()):
+            key, overlapping_keys = self._single_connection_keys(from_agent, self._agent_id_to_task_id(to_agent))
+            joined = self._single_flight.join(key, overlapping_keys)
+            if joined is not None:
+                return joined
+            logger.debug(
+                "Returning cached data (minimum update interval: %ds or budget low)", self._scheduler.interval_seconds
+            )
             return self._get_results()
 
-        getter = self._get_single_connection(from_agent, to_agent)
-        return self._update(getter)
+        return self._update_single_connection(from_agent, to_agent)
 
-    def _update(self, get_mesh_update: Callable[[], Tuple[MeshResults, MeshConfig]]) -> MeshResults:
-        """Condition: returned MeshResults is only read and never modified"""
+    def _update_all_connections(self) -> MeshResults:
+        getter = self._get_all_connections()
+        return self._single_flight.do(self._ALL_CONNECTIONS_KEY, lambda: self._update(getter))
+
+    def _update_single_connection(self, from_agent: AgentID, to_agent: AgentID) -> MeshResults:
+        task_id = self._agent_id_to_task_id(to_agent)
+        if not task_id:
+            logger.warning("TaskID for AgentID '%s' not found; requesting entire mesh row", to_agent)
+        getter = self._get_single_connection(from_agent, to_agent, task_id)
+        key, overlapping_keys = self._single_connection_keys(from_agent, task_id)
+
+        def on_incremental_update() -> None:
+            self._connections_with_full_history.add(f"{from_agent}:{to_agent}")
+
+        return self._single_flight.do(key, lambda: self._update(getter, on_incremental_update), overlapping_keys)
+
+    @staticmethod
+    def _single_connection_keys(from_agent: AgentID, task_id: Optional[TaskID]) -> Tuple[str, List[str]]:
+        """
+        Single connection is fetched as the "from" agent row filtered to the "to" agent task.
+        Without the task, the entire row is fetched, which overlaps with any connection in that row
+        """
+
+        entire_row_key = f"{from_agent}:*"
+        if task_id:
+            return f"{from_agent}:{task_id}", [entire_row_key]
+        return entire_row_key, []
+
+    def _update(
+        self,
+        get_mesh_updates: Callable[[], Iterable[Tuple[MeshResults, MeshConfig]]],
+        on_incremental_update: Optional[Callable[[], None]] = None,
+    ) -> MeshResults:
+        """
+        Update the cache with every update as it arrives, so that partial results are served while the rest is fetched
+        Condition: returned MeshResults is only read and never modified
+        """
 
         try:
             logger.debug("Mesh cache update start...")
-            fresh_mesh, fresh_config = get_mesh_update()
-            self._update_cache_with(fresh_mesh, fresh_config)
-            num_updated_connections = fresh_mesh.connection_matrix.num_connections_with_data()
+            num_updated_connections = 0
+            for fresh_mesh, fresh_config in get_mesh_updates():
+                self._update_cache_with(fresh_mesh, fresh_config, on_incremental_update)
+                num_updated_connections += fresh_mesh.connection_matrix.num_connections_with_data()
             logger.debug("Mesh cache update finished for %d connections", num_updated_connections)
+            self._log_request_budget()
         except Exception:
             logger.exception("Mesh cache update error")
 
         return self._get_results()
 
-    def _get_all_connections(self) -> Callable[[], Tuple[MeshResults, MeshConfig]]:
-        def getter() -> Tuple[MeshResults, MeshConfig]:
-            logger.debug("History: %ds", self.min_history_seconds)
-            return (
-                self._source_repo.get_mesh_test_results(
-                    test_id=self._test_id, history_length_seconds=self.min_history_seconds
-                ),
-                self._source_repo.get_mesh_config(test_id=self._test_id),
+    def _get_all_connections(self) -> Callable[[], Iterable[Tuple[MeshResults, MeshConfig]]]:
+        def getter() -> Iterable[Tuple[MeshResults, MeshConfig]]:
+            # shards are requested by agent ids, so the config is needed up front
+            config = self._fetch_config() if self._config_due() else self._get_config()
+            if self._full_fetch_due or config.fingerprint != self._get_config().fingerprint:
+                # results of new test configuration replace the cache, so they need the full window
+                self._full_fetch_due = False
+                history_seconds = self.min_history_seconds
+            else:
+                history_seconds = self._fetch_window_seconds(self._rows_timestamp_newest(), self.min_history_seconds)
+            self._forget_full_history_before(datetime.now(timezone.utc) - timedelta(seconds=history_seconds))
+            logger.debug("History: %ds", history_seconds)
+            agent_ids = [agent.id for agent in config.agents.all()]
+            shards = get_mesh_test_results_shards(
+                self._source_repo, test_id=self._test_id, history_length_seconds=history_seconds, agent_ids=agent_ids
             )
+            return ((shard, config) for shard in shards)
 
         return getter
 
     def _get_single_connection(
-        self, from_agent: AgentID, to_agent: AgentID
-    ) -> Callable[[], Tuple[MeshResults, MeshConfig]]:
-        def getter() -> Tuple[MeshResults, MeshConfig]:
-            logger.debug("History: %ds", self._full_history_seconds)
+        self, from_agent: AgentID, to_agent: AgentID, task_id: Optional[TaskID]
+    ) -> Callable[[], Iterable[Tuple[MeshResults, MeshConfig]]]:
+        def getter() -> Iterable[Tuple[MeshResults, MeshConfig]]:
+            if f"{from_agent}:{to_agent}" in self._connections_with_full_history:
+                latest = self._get_results().connection(from_agent, to_agent).latest_measurement
+                newest = latest.timestamp if latest else None
+                history_seconds = self._fetch_window_seconds(newest, self._full_history_seconds)
+            else:
+                history_seconds = self._full_history_seconds
+            logger.debug("History: %ds", history_seconds)
             agent_ids = [from_agent]
-            task_id = self._agent_id_to_task_id(to_agent)
-            if task_id:
-                task_ids = [task_id]
+            task_ids = [task_id] if task_id else []
+            if self._config_due():
+                update = get_mesh_test_results_and_config(
+                    self._source_repo,
+                    test_id=self._test_id,
+                    history_length_seconds=history_seconds,
+                    agent_ids=agent_ids,
+                    task_ids=task_ids,
+                )
+                self._on_config_fetched()
+                if update[1].fingerprint != self._get_config().fingerprint:
+                    # the cache gets replaced with this single connection; all the others need the full window
+                    self._full_fetch_due = True
             else:
-                logger.warning("TaskID for AgentID '%s' not found; requesting entire mesh row", to_agent)
-                task_ids = []
-            return (
-                self._source_repo.get_mesh_test_results(
+                results = self._source_repo.get_mesh_test_results(
                     test_id=self._test_id,
-                    history_length_seconds=self._full_history_seconds,
+                    history_length_seconds=history_seconds,
                     agent_ids=agent_ids,
                     task_ids=task_ids,
-                ),
-                self._source_repo.get_mesh_config(test_id=self._test_id),
-            )
+                )
+                update = (results, self._get_config())
+            return [update]
 
         return getter
 
+    def _log_request_budget(self) -> None:
+        stats = self._scheduler.stats
+        if stats.remaining is None:
+            logger.debug("Request budget: unlimited, %.0f requests/h", stats.requests_per_hour)
+            return
+        exhaustion = f"{stats.exhaustion_seconds:.0f}s" if stats.exhaustion_seconds is not None else "never"
+        logger.debug(
+            "Request budget: %.0f/%.0f remaining, %.0f requests/h, exhausted in: %s, denied: %d",
+            stats.remaining,
+            stats.capacity,
+            stats.requests_per_hour,
+            exhaustion,
+            stats.denied,
+        )
+
+    def _request_cost(self, all_connections: bool = False) -> int:
+        """
+        Number of API requests the next update takes: test results, a request per shard for all connections,
+        plus test and agents when config is due
+        """
+
+        if all_connections:
+            num_agents = self._get_config().agents.count
+            results_requests = get_mesh_test_results_num_requests(self._source_repo, num_agents)
+        else:
+            results_requests = 1
+        return results_requests + (2 if self._config_due() else 0)
+
+    def _config_due(self) -> bool:
+        """
+        Mesh config changes rarely; it is fetched only when its refresh interval passes,
+        or when the test results indicate that test configuration has changed
+        """
+
+        return self._config_invalidated or time.monotonic() - self._config_fetch_time >= self._config_ttl_seconds
+
+    def _fetch_config(self) -> MeshConfig:
+        config = self._source_repo.get_mesh_config(self._test_id)
+        self._on_config_fetched()
+        return config
+
+    def _on_config_fetched(self) -> None:
+        self._config_fetch_time = time.monotonic()
+        self._config_invalidated = False
+
+    def _config_changed(self, results: MeshResults, config: MeshConfig) -> bool:
+        """Check if results come from test configuration other than config: with new agents or changed period"""
+
+        for agent in results.participating_agents.all():
+            if config.agents.get_by_id(agent.id).id != agent.id:
+                logger.info("Results for agent %s not in test configuration", agent.id)
+                return True
+        # results sharded by config agents have no rows for the agents added to the test; they show up as columns
+        for agent_id in results.connection_matrix.latest.agent_ids:
+            if config.agents.get_by_id(agent_id).id != agent_id:
+                logger.info("Results for connections to agent %s not in test configuration", agent_id)
+                return True
+        for task in results.tasks.all():
+            if task.period_seconds != config.update_period_seconds:
+                logger.info("Task %s period %ds differs from test configuration", task.id, task.period_seconds)
+                return True
+        return False
+
+    def _fetch_window_seconds(self, newest: Optional[datetime], full_window_seconds: int) -> int:
+        """
+        Only fetch the samples since the newest sample in cache, plus overlap to catch the samples that came late.
+        Fall back to full window if there is no sample in cache or the newest one is older than the full window
+        """
+
+        if newest is None:
+            return full_window_seconds
+        tail_seconds = math.ceil((datetime.now(timezone.utc) - newest).total_seconds()) + self._fetch_overlap_seconds
+        return min(tail_seconds, full_window_seconds)
+
+    def _rows_timestamp_newest(self) -> Optional[datetime]:
+        """
+        The oldest of newest samples across the rows that are not stale; so that fetching since then brings every
+        such row up to date. Stale rows, eg. of offline agents, would otherwise hold every fetch at the full window
+        """
+
+        return self._get_results().connection_matrix.rows_timestamp_newest_oldest(self._stale_row_lag)
+
+    def _forget_full_history_before(self, fetch_start: datetime) -> None:
+        """
+        Connections whose newest cached sample is older than fetch start may have a gap between cached
+        and fetched samples; their full history needs to be fetched again
+        """
+
+        results = self._get_results()
+        for connection in list(self._connections_with_full_history):
+            from_agent, to_agent = connection.split(":", 1)
+            newest = results.connection(from_agent, to_agent).latest_timestamp
+            if newest is None or newest < fetch_start:
+                self._connections_with_full_history.discard(connection)
+
     def _agent_id_to_task_id(self, agent_id: AgentID) -> Optional[TaskID]:
         agent_ip = self._get_config().agents.get_by_id(agent_id).ip
         task = self._get_results().tasks.get_by_ip(agent_ip)
         return task.id if task else None
 
-    def _update_cache_with(self, results: MeshResults, config: MeshConfig) -> None:
-        current_config = self._get_config()
-        current_results = self._get_results()
+    def _update_cache_with(
+        self,
+        results: MeshResults,
+        config: MeshConfig,
+        on_incremental_update: Optional[Callable[[], None]] = None,
+    ) -> None:
+        with self._update_lock:
+            current_config = self._get_config()
+            current_results = self._get_results()
 
-        if current_config.agents.equals(config.agents):
-            logger.debug("Incremental cache update")
-            new_results = deepcopy(current_results)
-            new_results.incremental_update(results)
-            self._drop_samples_outside_timewindow(new_results)
-            new_config = current_config
-        else:
-            logger.debug("New mesh test configuration detected. Full cache update")
-            new_results = results
-            new_config = config
+            if current_config.fingerprint == config.fingerprint:
+                logger.debug("Incremental cache update")
+                if self._config_changed(results, current_config):
+                    logger.info("Test configuration change detected; mesh config will be fetched on next update")
+                    self._config_invalidated = True
+                new_results = self._drop_samples_outside_timewindow(
+                    current_results.merged_with(results, self._full_history_seconds)
+                )
+                new_config = current_config
+                if on_incremental_update:
+                    on_incremental_update()
+            else:
+                logger.debug("New mesh test configuration detected. Full cache update")
+                new_results = results
+                new_config = config
+                self._connections_with_full_history.clear()
 
-        with self._mesh_lock:
-            self._mesh_results = new_results
-            self._mesh_config = new_config
-            self._mesh_config.agents.update_names_aliases(new_results.participating_agents)
+            with self._mesh_lock:
+                self._mesh_results = new_results
+                self._mesh_config = new_config
+                self._mesh_config.agents.update_names_aliases(new_results.participating_agents)
+                self._last_update_time = time.monotonic()
+                self._last_update_utc = time.time()
+            logger.debug("Mesh cache snapshot version: %d", new_results.version)
 
     def _get_results(self) -> MeshResults:
-        with self._mesh_lock:
-            return self._mesh_results
+        # MeshResults snapshot is immutable and reference assignment is atomic - no locking needed
+        return self._mesh_results
 
     def _get_config(self) -> MeshConfig:
         with self._mesh_lock:
             return self._mesh_config
 
-    def _drop_samples_outside_timewindow(self, results: MeshResults) -> None:
+    def _drop_samples_outside_timewindow(self, results: MeshResults) -> MeshResults:
         threshold = datetime.now(timezone.utc) - timedelta(seconds=self._full_history_seconds)
-        results.connection_matrix.drop_samples_older_than(threshold)
+        return results.without_samples_older_than(threshold)
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from domain.cache.caching_repo_request_driven import CachingRepoRequestDriven
+from domain.cache.snapshot_store import MeshSnapshot, SnapshotStore
+from domain.model.mesh_config import MeshConfig
+from domain.model.mesh_results import MeshResults
+from domain.types import AgentID, TestID
+
+logger = logging.getLogger(__name__)
+
+
+class CachingRepoShared:
+    """
+    Mesh test results cache shared by multiple processes, eg. gunicorn workers, so that the API requests
+    are not multiplied by the number of processes:
+    - the leader process keeps the actual cache, refreshed in background, and publishes its snapshots to SnapshotStore
+    - the other processes serve the latest published snapshot, and pass single connection requests on to the leader
+    When the leader process exits, one of the other processes takes over
+    """
+
+    _PUBLISH_INTERVAL_SECONDS = 1.0  # how often the leader checks the cache for new snapshot to publish
+    _LEADER_RETRY_SECONDS = 10.0  # delay before retrying the leader cache setup, eg. when the API is unreachable
+
+    def __init__(
+        self, store: SnapshotStore, test_id: TestID, make_leader_cache: Callable[[], CachingRepoRequestDriven]
+    ) -> None:
+        self._store = store
+        self._test_id = test_id
+        self._make_leader_cache = make_leader_cache
+        self._leader_cache: Optional[CachingRepoRequestDriven] = None
+
+    def start(self) -> None:
+        """Start competing for the leadership; call it in the process that serves the pages, eg. after fork"""
+
+        threading.Thread(target=self._run, name="mesh-cache-leader", daemon=True).start()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_cache is not None
+
+    @property
+    def min_history_seconds(self) -> int:
+        if self._leader_cache:
+            return self._leader_cache.min_history_seconds
+        snapshot = self._load()
+        return snapshot.min_history_seconds if snapshot else 0
+
+    @property
+    def data_age_seconds(self) -> Optional[int]:
+        if self._leader_cache:
+            return self._leader_cache.data_age_seconds
+        snapshot = self._load()
+        if snapshot is None or snapshot.update_time is None:
+            return None
+        return max(0, int(time.time() - snapshot.update_time))
+
+    @property
+    def data_update_time(self) -> Optional[float]:
+        if self._leader_cache:
+            return self._leader_cache.data_update_time
+        snapshot = self._load()
+        return snapshot.update_time if snapshot else None
+
+    def get_mesh_config(self) -> MeshConfig:
+        if self._leader_cache:
+            return self._leader_cache.get_mesh_config()
+        snapshot = self._load()
+        return snapshot.config if snapshot else MeshConfig()
+
+    def get_mesh_results_all_connections(self) -> MeshResults:
+        if self._leader_cache:
+            return self._leader_cache.get_mesh_results_all_connections()
+        snapshot = self._load()
+        return snapshot.results if snapshot else MeshResults()
+
+    def _load(self) -> Optional[MeshSnapshot]:
+        """Latest published snapshot; one left over by previous run for different test is ignored"""
+
+        snapshot = self._store.load()
+        return snapshot if snapshot and snapshot.test_id == self._test_id else None
+
+    def get_mesh_results_single_connection(self, from_agent: AgentID, to_agent: AgentID) -> MeshResults:
+        """Full history data becomes available after the leader fetches it and publishes new snapshot"""
+
+        if self._leader_cache:
+            return self._leader_cache.get_mesh_results_single_connection(from_agent, to_agent)
+        self._store.request_connection(from_agent, to_agent)
+        return self.get_mesh_results_all_connections()
+
+    def _run(self) -> None:
+        self._store.acquire_leadership()
+        logger.info("This process is now the mesh cache leader")
+        while True:
+            try:
+                leader_cache = self._make_leader_cache()
+                break
+            except Exception:
+                logger.exception("Mesh cache leader setup error")
+                time.sleep(self._LEADER_RETRY_SECONDS)
+
+        leader_cache.start()
+        self._leader_cache = leader_cache
+        published_version = -1
+        while True:
+            try:
+                published_version = self._publish(self._leader_cache, published_version)
+                for from_agent, to_agent in self._store.take_requested_connections():
+                    self._leader_cache.get_mesh_results_single_connection(from_agent, to_agent)
+            except Exception:
+                logger.exception("Mesh cache snapshot publish error")
+            time.sleep(self._PUBLISH_INTERVAL_SECONDS)
+
+    def _publish(self, cache: CachingRepoRequestDriven, published_version: int) -> int:
+        snapshot = cache.snapshot()
+        if snapshot.results.version == published_version:
+            return published_version
+
+        self._store.publish(snapshot)
+        logger.debug("Published mesh cache snapshot version: %d", snapshot.results.version)
+        return snapshot.results.version
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class RefreshMode(Enum):
+    """Strategies for keeping the mesh test results cache up to date"""
+
+    REQUEST_DRIVEN = "request_driven"  # fetch inline, on the thread serving the page request
+    BACKGROUND = "background"  # fetch periodically in a background thread, pages only read the cached snapshot
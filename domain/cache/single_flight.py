@@ -0,0 +1,91 @@
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Generic, Iterable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class SingleFlightStats:
+    calls: int  # number of calls that executed the function
+    coalesced: int  # number of calls that waited for the call in flight and shared its result instead
+
+
+class _Flight(Generic[T]):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> T:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result  # type: ignore
+
+
+class SingleFlight(Generic[T]):
+    """
+    SingleFlight coalesces concurrent calls for the same key into a single call in flight; callers that arrive
+    while the call is in flight wait for it and share its result.
+    Callers may also name overlapping keys - calls in flight under those keys are joined as well
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight[T]] = {}
+        self._calls = 0
+        self._coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], T], overlapping_keys: Iterable[str] = ()) -> T:
+        """Call fn, or join the call already in flight for key or any of overlapping_keys"""
+
+        with self._lock:
+            joined = self._find_flight(key, overlapping_keys)
+            if joined is not None:
+                self._coalesced += 1
+            else:
+                flight: _Flight[T] = _Flight()
+                self._flights[key] = flight
+                self._calls += 1
+
+        if joined is not None:
+            logger.debug("Joining call in flight for key '%s'", key)
+            return joined.wait()
+
+        try:
+            flight.result = fn()
+        except BaseException as err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result  # type: ignore
+
+    def join(self, key: str, overlapping_keys: Iterable[str] = ()) -> Optional[T]:
+        """Wait for the call in flight for key or any of overlapping_keys and return its result; None if not in flight"""
+
+        with self._lock:
+            flight = self._find_flight(key, overlapping_keys)
+            if flight is None:
+                return None
+            self._coalesced += 1
+        logger.debug("Joining call in flight for key '%s'", key)
+        return flight.wait()
+
+    @property
+    def stats(self) -> SingleFlightStats:
+        with self._lock:
+            return SingleFlightStats(calls=self._calls, coalesced=self._coalesced)
+
+    def _find_flight(self, key: str, overlapping_keys: Iterable[str]) -> Optional[_Flight[T]]:
+        for k in (key, *overlapping_keys):
+            flight = self._flights.get(k)
+            if flight is not None:
+                return flight
+        return None
@@ -0,0 +1,59 @@
+import atexit
+import logging
+import threading
+from typing import Optional
+
+from domain.cache.caching_repo_request_driven import CachingRepoRequestDriven
+from domain.cache.snapshot_store import MeshSnapshot, SnapshotFile
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotPersister:
+    """
+    SnapshotPersister keeps the mesh cache between restarts: the cache snapshot is saved periodically, when changed,
+    and on process exit. On start, the cache is made with the saved snapshot, see: load_snapshot()
+    """
+
+    def __init__(self, cache: CachingRepoRequestDriven, file: SnapshotFile, save_interval_periods: int) -> None:
+        self._cache = cache
+        self._file = file
+        self._save_interval_seconds = save_interval_periods * cache.get_mesh_config().update_period_seconds
+        self._save_lock = threading.Lock()
+        self._saved_version = cache.snapshot().results.version  # no need to save the snapshot the cache started with
+        self._stop = threading.Event()
+        self._saver = threading.Thread(target=self._run, name="mesh-cache-persister", daemon=True)
+        self._saver.start()
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        """Stop periodic saving and save the latest snapshot"""
+
+        self._stop.set()
+        self._save()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._save_interval_seconds):
+            self._save()
+
+    def _save(self) -> None:
+        with self._save_lock:
+            snapshot = self._cache.snapshot()
+            if snapshot.results.version == self._saved_version:
+                return
+            try:
+                self._file.save(snapshot)
+                self._saved_version = snapshot.results.version
+                logger.debug("Saved mesh cache snapshot version: %d", snapshot.results.version)
+            except Exception:
+                logger.exception("Mesh cache snapshot save error")
+
+
+def load_snapshot(file: SnapshotFile) -> Optional[MeshSnapshot]:
+    """Saved snapshot to make the cache with; None if there is none or it can't be loaded"""
+
+    try:
+        return file.load()
+    except Exception:
+        logger.exception("Mesh cache snapshot load error")
+        return None
@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Protocol, Tuple
+
+from domain.model.mesh_config import MeshConfig
+from domain.model.mesh_results import MeshResults
+from domain.types import AgentID, TestID
+
+
+@dataclass(frozen=True)
+class MeshSnapshot:
+    """Mesh cache content, as shared between processes or persisted between restarts"""
+
+    test_id: TestID  # test the results come from
+    results: MeshResults
+    config: MeshConfig
+    min_history_seconds: int
+    update_time: Optional[float]  # time.time() of the cache last update; None if it was never updated
+    connections_with_full_history: FrozenSet[str] = frozenset()  # "from:to" connections with full history fetched
+
+
+class SnapshotFile(Protocol):
+    """SnapshotFile persists mesh cache snapshot, eg. to keep the cache between restarts"""
+
+    def save(self, snapshot: MeshSnapshot) -> None:
+        pass
+
+    def load(self) -> Optional[MeshSnapshot]:
+        """Saved snapshot; None if nothing was saved yet"""
+        pass
+
+
+class SnapshotStore(Protocol):
+    """SnapshotStore shares mesh cache snapshots between processes, eg. gunicorn workers"""
+
+    def acquire_leadership(self) -> None:
+        """Block until calling process becomes the one that fetches the data and publishes the snapshots"""
+        pass
+
+    def publish(self, snapshot: MeshSnapshot) -> None:
+        pass
+
+    def load(self) -> Optional[MeshSnapshot]:
+        """Latest published snapshot; None if nothing was published yet"""
+        pass
+
+    def request_connection(self, from_agent: AgentID, to_agent: AgentID) -> None:
+        """Ask the leader process to fetch full history for the connection"""
+        pass
+
+    def take_requested_connections(self) -> List[Tuple[AgentID, AgentID]]:
+        pass
@@ -1,2 +1,2 @@
 from .config import Config
-from .matrix import Matrix, MatrixCellColor
+from .matrix import Matrix, MatrixCellColor, MatrixRenderer
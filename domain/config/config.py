@@ -1,6 +1,7 @@
 from typing import Protocol
 
-from domain.config.matrix import Matrix
+from domain.cache.refresh_mode import RefreshMode
+from domain.config.matrix import Matrix, MatrixRenderer
 from domain.config.thresholds import Thresholds
 from domain.geo import DistanceUnit
 from domain.metric import MetricType
@@ -30,6 +31,81 @@ class Config(Protocol):
         """Number of test update periods into the past to get most recent measurement"""
         pass
 
+    @property
+    def data_config_refresh_periods(self) -> int:
+        """Interval between fetching mesh test configuration (agents, update period). In test update periods"""
+        pass
+
+    @property
+    def data_refresh_mode(self) -> RefreshMode:
+        """Whether to fetch data inline when serving page requests, or periodically in a background thread"""
+        pass
+
+    @property
+    def data_stale_periods(self) -> int:
+        """Age of cached data, in test update periods, after which the data is presented as stale"""
+        pass
+
+    @property
+    def data_max_stale_periods(self) -> int:
+        """Age of cached data, in test update periods, after which background refresh is bypassed by inline fetch"""
+        pass
+
+    @property
+    def data_shared_cache_path(self) -> str:
+        """File to share the data cache through between WebApp processes, eg. on /dev/shm. Empty = no sharing"""
+        pass
+
+    @property
+    def data_snapshot_path(self) -> str:
+        """File to persist the data cache to, so that it survives WebApp restart. Empty = no persistence"""
+        pass
+
+    @property
+    def data_snapshot_save_periods(self) -> int:
+        """Interval between saving the data cache to data_snapshot_path. In test update periods"""
+        pass
+
+    @property
+    def data_batch_window_seconds(self) -> float:
+        """Time to collect time-series data requests for sending them as one batch request. 0 disables batching"""
+        pass
+
+    @property
+    def data_fast_decode(self) -> bool:
+        """Whether to decode test results from raw response body instead of through generated API client models"""
+        pass
+
+    @property
+    def data_decode_processes(self) -> int:
+        """Number of worker processes to decode test results in, instead of web serving process. 0 disables"""
+        pass
+
+    @property
+    def data_shard_size(self) -> int:
+        """Maximum number of agent rows to request at once when fetching all connections. 0 disables sharding"""
+        pass
+
+    @property
+    def data_shard_concurrency(self) -> int:
+        """Maximum number of shard requests in flight at once"""
+        pass
+
+    @property
+    def async_api_client(self) -> bool:
+        """Whether to issue API requests from asyncio event loop instead of generated synchronous API client"""
+        pass
+
+    @property
+    def api_max_connections(self) -> int:
+        """Maximum number of concurrent API connections kept by asyncio API client"""
+        pass
+
+    @property
+    def api_quota_requests_per_hour(self) -> int:
+        """API request budget of this WebApp instance; 0 means unlimited"""
+        pass
+
     @property
     def latency(self) -> Thresholds:
         """Latency thresholds, in milliseconds"""
@@ -50,6 +126,16 @@ class Config(Protocol):
         """Matrix cell colors"""
         pass
 
+    @property
+    def matrix_renderer(self) -> MatrixRenderer:
+        """How the connection matrix is drawn"""
+        pass
+
+    @property
+    def http_compression(self) -> bool:
+        """Compress large responses, and serve unchanged ones as 304 Not Modified"""
+        pass
+
     @property
     def logging_level(self) -> int:
         """Logging verbosity"""
@@ -5,8 +5,25 @@ from domain.metric import MetricType
 data_request_interval_periods = 1
 data_history_length_periods = 60
 data_min_periods = 2
+data_config_refresh_periods = 60
+data_refresh_mode = "request_driven"
+data_stale_periods = 2
+data_max_stale_periods = 5
+data_shared_cache_path = ""
+data_snapshot_path = ""
+data_snapshot_save_periods = 5
+data_batch_window_seconds = 0.0
+data_fast_decode = False
+data_decode_processes = 0
+data_shard_size = 0
+data_shard_concurrency = 4
+async_api_client = False
+api_max_connections = 10
+api_quota_requests_per_hour = 0
 timeout_seconds = (30.0, 30.0)
+http_compression = True
 logging_level = "INFO"
 agent_label = "{name}"
 show_measurement_values = True
+matrix_renderer = "table"
 metric_type = MetricType.PACKET_LOSS.value
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from enum import Enum
 
 from domain.types import MatrixCellColor
 
@@ -9,3 +10,10 @@ class Matrix:
     cell_color_warning: MatrixCellColor
     cell_color_critical: MatrixCellColor
     cell_color_nodata: MatrixCellColor
+
+
+class MatrixRenderer(Enum):
+    """Ways of drawing the connection matrix"""
+
+    TABLE = "table"  # HTML table, cell per connection, with tooltips made on server side
+    HEATMAP = "heatmap"  # single heatmap chart drawn in the browser from compact arrays; scales to large meshes
@@ -1,8 +1,19 @@
-from typing import Protocol
+from dataclasses import dataclass
+from typing import Protocol, Sequence
+
+import numpy as np
 
 from domain.types import AgentID, Threshold
 
 
+@dataclass(frozen=True)
+class ThresholdMatrices:
+    """Warning and critical thresholds for all agent pairs; N x N read-only arrays indexed by agent positions"""
+
+    warning: np.ndarray
+    critical: np.ndarray
+
+
 class Thresholds(Protocol):
     """Thresholds provides values of warning and critical thresholds specific to given agent pairs"""
 
@@ -11,3 +22,6 @@ class Thresholds(Protocol):
 
     def critical(self, from_agent: AgentID, to_agent: AgentID) -> Threshold:
         pass
+
+    def matrices(self, agent_ids: Sequence[AgentID]) -> ThresholdMatrices:
+        pass
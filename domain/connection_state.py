@@ -0,0 +1,30 @@
+from enum import IntEnum
+from typing import Union
+
+import numpy as np
+
+from domain.types import Threshold
+
+
+class ConnectionState(IntEnum):
+    """Connection health state with respect to metric thresholds"""
+
+    NODATA = 0
+    HEALTHY = 1
+    WARNING = 2
+    CRITICAL = 3
+
+
+def classify(
+    values: np.ndarray, warning: Union[np.ndarray, Threshold], critical: Union[np.ndarray, Threshold]
+) -> np.ndarray:
+    """
+    Classify metric values against warning and critical thresholds in one vectorized pass.
+    Thresholds are either scalars or arrays of the same shape as values. Returns array of ConnectionState codes
+    """
+
+    states = np.full(values.shape, ConnectionState.HEALTHY, dtype=np.int8)
+    states[values >= warning] = ConnectionState.WARNING
+    states[values >= critical] = ConnectionState.CRITICAL
+    states[np.isnan(values)] = ConnectionState.NODATA
+    return states
@@ -1,2 +1,2 @@
 from .coordinates import Coordinates
-from .distance_calculator import DistanceUnit, calc_distance
+from .distance_calculator import DistanceUnit, calc_distance, calc_distance_matrices
@@ -1,7 +1,11 @@
+import math
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
+from typing import Dict, Sequence
 
 import great_circle_calculator.great_circle_calculator as gcc
+import numpy as np
 
 from domain.geo import Coordinates
 
@@ -19,3 +23,27 @@ def calc_distance(p1: Coordinates, p2: Coordinates, unit: DistanceUnit) -> float
         haversine=True,
     )
     return distance
+
+
+def calc_distance_matrices(coords: Sequence[Coordinates]) -> Dict[DistanceUnit, np.ndarray]:
+    """
+    Distances between all pairs of points, in all DistanceUnits, as N x N arrays indexed by point position.
+    Vectorized haversine formula; same results as calc_distance for every pair
+    """
+
+    longitudes = np.radians([p.longitude for p in coords])
+    latitudes = np.radians([p.latitude for p in coords])
+    d_lat = latitudes[np.newaxis, :] - latitudes[:, np.newaxis]
+    d_lon = longitudes[np.newaxis, :] - longitudes[:, np.newaxis]
+    cos_lat = np.cos(latitudes)
+    a = np.sin(d_lat / 2) ** 2 + np.outer(cos_lat, cos_lat) * np.sin(d_lon / 2) ** 2
+    a = np.minimum(a, 1.0)
+    central_angles = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return {unit: central_angles * _earth_radius(unit) for unit in DistanceUnit}
+
+
+@lru_cache(maxsize=None)
+def _earth_radius(unit: DistanceUnit) -> float:
+    # taken from great_circle_calculator, so that both ways of calculating the distance agree
+    half_circumference = gcc.distance_between_points((0.0, 0.0), (180.0, 0.0), unit=unit.value, haversine=True)
+    return half_circumference / math.pi
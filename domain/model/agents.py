@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
-from typing import Dict, Generator
+from typing import Any, Dict, Generator
 
 from domain.geo import Coordinates
 from domain.types import IP, AgentID
@@ -23,9 +23,25 @@ class Agents:
     def __init__(self) -> None:
         self._agents: Dict[AgentID, Agent] = {}
         self._agents_by_name: Dict[str, Agent] = {}
+        self._ids_fingerprint = 0  # XOR of agent id hashes; maintained on insert and remove
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # string hashes differ between processes; fingerprint of unpickled agents must be recomputed
+        self.__dict__.update(state)
+        self._ids_fingerprint = 0
+        for agent_id in self._agents:
+            self._ids_fingerprint ^= hash(agent_id)
 
     def equals(self, other: Agents) -> bool:
-        return sorted(self._agents.keys()) == sorted(other._agents.keys())
+        """Compare sets of agent ids by their fingerprints"""
+
+        return self.count == other.count and self._ids_fingerprint == other._ids_fingerprint
+
+    @property
+    def fingerprint(self) -> int:
+        """Cheap fingerprint of the set of agent ids; equal sets of agent ids have equal fingerprints"""
+
+        return hash((self.count, self._ids_fingerprint))
 
     def get_by_id(self, agent_id: AgentID) -> Agent:
         return self._agents.get(agent_id, Agent())
@@ -34,6 +50,8 @@ class Agents:
         return self._agents_by_name.get(name, Agent())
 
     def insert(self, agent: Agent) -> None:
+        if agent.id not in self._agents:
+            self._ids_fingerprint ^= hash(agent.id)
         self._agents[agent.id] = agent
         existing = self._agents_by_name.get(agent.name)
         if existing:
@@ -49,6 +67,7 @@ class Agents:
     def remove(self, agent: Agent):
         try:
             del self._agents[agent.id]
+            self._ids_fingerprint ^= hash(agent.id)
         except KeyError:
             logger.warning("Agent id: %s name: %s was not in dict by id", agent.id, agent.name)
         try:
@@ -1,9 +1,81 @@
+import math
 from dataclasses import dataclass
+from typing import Any, Dict, Sequence
 
+import numpy as np
+
+from domain.geo import DistanceUnit, calc_distance_matrices
 from domain.model.agents import Agents
+from domain.types import AgentID
+
+
+class AgentDistances:
+    """
+    Distances between all pairs of agents, in all DistanceUnits, computed at once when mesh config is loaded.
+    Indexed by agent position, see index(); read-only
+    """
+
+    def __init__(self, agents: Agents) -> None:
+        agent_list = list(agents.all())
+        self.agent_ids = [agent.id for agent in agent_list]
+        self.fingerprint = agents.fingerprint
+        self._agent_index = {agent_id: i for i, agent_id in enumerate(self.agent_ids)}
+        self._matrices = calc_distance_matrices([agent.coords for agent in agent_list])
+
+    def index(self, agent_id: AgentID) -> int:
+        """Position of agent in distance matrices; -1 for unknown agent"""
+
+        return self._agent_index.get(agent_id, -1)
+
+    def matrix(self, unit: DistanceUnit) -> np.ndarray:
+        """N x N distances, indexed by agent position"""
+
+        return self._matrices[unit]
+
+    def select(self, agent_ids: Sequence[AgentID], unit: DistanceUnit) -> np.ndarray:
+        """Distances between given agents, laid out in agent_ids order; NaN for unknown agents"""
+
+        positions = np.array([self.index(agent_id) for agent_id in agent_ids], dtype=np.intp)
+        selected = np.full((len(agent_ids), len(agent_ids)), np.nan)
+        known = np.nonzero(positions >= 0)[0]
+        selected[np.ix_(known, known)] = self._matrices[unit][np.ix_(positions[known], positions[known])]
+        return selected
+
+    def distance(self, from_agent: AgentID, to_agent: AgentID, unit: DistanceUnit) -> float:
+        """Distance between two agents; NaN for unknown agent"""
+
+        i, j = self.index(from_agent), self.index(to_agent)
+        if i < 0 or j < 0:
+            return math.nan
+        return float(self._matrices[unit][i, j])
 
 
 @dataclass
 class MeshConfig:
     agents: Agents = Agents()
     update_period_seconds: int = int()  # test update period
+
+    def __post_init__(self) -> None:
+        self._distances = AgentDistances(self.agents)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # distances are derived from agents; no need to pickle them
+        return {name: value for name, value in self.__dict__.items() if name != "_distances"}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.__post_init__()
+
+    @property
+    def fingerprint(self) -> int:
+        """Cheap fingerprint of test settings relevant to cached results: set of agent ids and update period"""
+
+        return hash((self.agents.fingerprint, self.update_period_seconds))
+
+    @property
+    def distances(self) -> AgentDistances:
+        """Distances between agents; recomputed only if agents were added or removed since"""
+
+        if self._distances.fingerprint != self.agents.fingerprint:
+            self._distances = AgentDistances(self.agents)
+        return self._distances
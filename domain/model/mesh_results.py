@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import itertools
 import logging
+import math
+import threading
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
 
 from domain.metric import Metric, MetricType, MetricValue
 from domain.model.agents import Agent, Agents
@@ -11,6 +16,27 @@ from domain.types import IP, AgentID, TaskID
 
 logger = logging.getLogger(__name__)
 
+# unique, increasing MeshResults versions; next() on itertools.count is atomic under GIL
+_versions = itertools.count()
+
+# MeshColumn metrics block columns
+_JITTER, _LATENCY, _PACKET_LOSS = 0, 1, 2
+_METRIC_COLUMNS = {MetricType.JITTER: _JITTER, MetricType.LATENCY: _LATENCY, MetricType.PACKET_LOSS: _PACKET_LOSS}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_timestamp_us(time: datetime) -> int:
+    """Convert timezone-aware datetime to UTC epoch microseconds"""
+
+    return (time - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_timestamp_us(timestamp: int) -> datetime:
+    """Convert UTC epoch microseconds to timezone-aware UTC datetime"""
+
+    return _EPOCH + timedelta(microseconds=timestamp)
+
 
 @dataclass
 class Task:
@@ -29,10 +55,15 @@ class Tasks:
     def get_by_ip(self, target_ip: IP) -> Optional[Task]:
         return self._tasks.get(target_ip)
 
-    def incremental_update(self, src: Tasks) -> None:
-        """Update with new tasks, don't remove anything"""
+    def all(self) -> List[Task]:
+        return list(self._tasks.values())
+
+    def merged_with(self, src: Tasks) -> Tasks:
+        """Return new Tasks updated with src tasks, don't remove anything"""
 
-        self._tasks.update(src._tasks)
+        merged = Tasks()
+        merged._tasks = {**self._tasks, **src._tasks}
+        return merged
 
 
 class HealthItem:
@@ -68,19 +99,133 @@ class HealthItem:
         raise Exception(f"MetricType not supported: {metric_type}")
 
 
+class _SampleBuffer:
+    """
+    Fixed-capacity, time-ordered storage of connection samples, shared by consecutive versions of a MeshColumn.
+    Every MeshColumn is a [start, end) window into the buffer: retention moves the start forward
+    and new samples are appended past the end, so neither touches the samples already visible to other columns.
+    Unlike a wrap-around ring buffer, slots of dropped samples are not reused as older snapshots may still read them;
+    when the buffer is full the live window is moved into a new buffer instead
+    """
+
+    def __init__(self, timestamps: np.ndarray, metrics: np.ndarray, size: int) -> None:
+        self.timestamps = timestamps
+        self.metrics = metrics
+        self.size = size
+        self._lock = threading.Lock()
+
+    @classmethod
+    def allocate(cls, capacity: int) -> _SampleBuffer:
+        timestamps = np.empty(capacity, dtype=np.int64)
+        metrics = np.empty((capacity, len(_METRIC_COLUMNS)), dtype=np.float64)
+        return cls(timestamps, metrics, 0)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.timestamps)
+
+    def append(self, end: int, timestamps: np.ndarray, metrics: np.ndarray) -> bool:
+        """Append samples after the window ending at end; fail if there is no room or end is not the buffer end"""
+
+        n = len(timestamps)
+        with self._lock:
+            if end != self.size or end + n > self.capacity:
+                return False
+            self.timestamps[end : end + n] = timestamps
+            self.metrics[end : end + n] = metrics
+            self.size = end + n
+            return True
+
+
 class MeshColumn:
-    """Represents connection "to" endpoint"""
+    """
+    Represents connection "to" endpoint.
+    Health time-series is stored column-wise: timestamps array and metrics block with one column per metric type,
+    both sorted by timestamp from oldest to newest, as a window into _SampleBuffer.
+    MeshColumn is shared between MeshResults snapshots and must not be modified once created
+    """
 
     def __init__(self, agent_id: AgentID = AgentID(), health: Optional[List[HealthItem]] = None) -> None:
-        # sort by timestamp from newest to oldest
-        self.health = sorted(health, key=lambda item: item.timestamp, reverse=True) if health else []
+        items = sorted(health, key=lambda item: item.timestamp) if health else []
+        timestamps = np.array([to_timestamp_us(item.timestamp) for item in items], dtype=np.int64)
+        metrics = np.array(
+            [[item.get_metric(metric_type).value for metric_type in _METRIC_COLUMNS] for item in items],
+            dtype=np.float64,
+        ).reshape(len(items), len(_METRIC_COLUMNS))
+        self._init(agent_id, _SampleBuffer(timestamps, metrics, len(items)), 0, len(items))
+
+    @classmethod
+    def from_arrays(
+        cls,
+        agent_id: AgentID,
+        timestamps: np.ndarray,
+        jitter_millisec: np.ndarray,
+        latency_millisec: np.ndarray,
+        packet_loss_percent: np.ndarray,
+    ) -> MeshColumn:
+        """Create MeshColumn from timestamps (UTC epoch microseconds) and metric values arrays, in any order"""
+
+        order = np.argsort(timestamps, kind="stable")
+        metrics = np.column_stack((jitter_millisec, latency_millisec, packet_loss_percent)).astype(np.float64)[order]
+        # if packet loss is 100%, then jitter and latency measurements do not apply
+        metrics[metrics[:, _PACKET_LOSS] >= MetricValue(100), _JITTER : _LATENCY + 1] = np.nan
+        timestamps = np.asarray(timestamps, dtype=np.int64)[order]
+        return cls._from_buffer(agent_id, _SampleBuffer(timestamps, metrics, len(timestamps)), 0, len(timestamps))
+
+    @classmethod
+    def _from_buffer(cls, agent_id: AgentID, buffer: _SampleBuffer, start: int, end: int) -> MeshColumn:
+        column = cls.__new__(cls)
+        column._init(agent_id, buffer, start, end)
+        return column
+
+    def _init(self, agent_id: AgentID, buffer: _SampleBuffer, start: int, end: int) -> None:
         self.agent_id = agent_id
+        self._buffer = buffer
+        self._start = start
+        self._end = end
+        self._timestamps = buffer.timestamps[start:end]
+        self._metrics = buffer.metrics[start:end]
+        self._timestamps.flags.writeable = False
+        self._metrics.flags.writeable = False
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Measurement timestamps as UTC epoch microseconds, from oldest to newest. Read-only"""
+
+        return self._timestamps
+
+    def values(self, metric_type: MetricType) -> np.ndarray:
+        """Measurement values of metric_type, from oldest to newest. Read-only"""
+
+        return self._metrics[:, _METRIC_COLUMNS[metric_type]]
+
+    @property
+    def health(self) -> List[HealthItem]:
+        """Connection health measurements, from newest to oldest"""
+
+        return [self._health_item(i) for i in range(len(self._timestamps) - 1, -1, -1)]
 
     @property
     def latest_measurement(self) -> Optional[HealthItem]:
         """Latest connection health measurement, if available"""
 
-        return self.health[0] if self.health else None
+        return self._health_item(-1) if self.has_data() else None
+
+    @property
+    def latest_metrics(self) -> Optional[np.ndarray]:
+        """Metric values of latest connection health measurement, if available. Read-only"""
+
+        return self._metrics[-1] if self.has_data() else None
+
+    @property
+    def latest_timestamp(self) -> Optional[datetime]:
+        """Timestamp of latest connection health measurement, if available"""
+
+        return from_timestamp_us(int(self._timestamps[-1])) if self.has_data() else None
+
+    @property
+    def num_samples(self) -> int:
+        return len(self._timestamps)
 
     def has_data(self) -> bool:
         """
@@ -89,7 +234,88 @@ class MeshColumn:
         or by the test itself being in paused state.
         """
 
-        return len(self.health) > 0
+        return len(self._timestamps) > 0
+
+    def merged_with(self, newer: MeshColumn, capacity: int = 0) -> MeshColumn:
+        """
+        Return new column with samples of newer column, preceded by the samples of this column that are older.
+        Samples of newer column that repeat the newest samples of this column are not stored again,
+        the remaining ones are appended to the buffer shared with this column if it has room for them.
+        capacity is the number of samples the column is expected to hold; it sizes a new buffer if one is needed
+        """
+
+        if not newer.has_data():
+            return newer
+        keep = int(np.searchsorted(self._timestamps, newer._timestamps[0], side="left"))
+        overlap = self.num_samples - keep
+        if (
+            overlap <= newer.num_samples
+            and np.array_equal(self._timestamps[keep:], newer._timestamps[:overlap])
+            and np.array_equal(self._metrics[keep:], newer._metrics[:overlap], equal_nan=True)
+        ):
+            return self._appended(newer._timestamps[overlap:], newer._metrics[overlap:], capacity)
+
+        # newer column changes some of the samples we have; rebuild
+        return self._sliced(0, keep)._appended(newer._timestamps, newer._metrics, capacity)
+
+    def without_samples_older_than(self, threshold: datetime) -> MeshColumn:
+        """Return new column with samples older than threshold dropped; the samples are shared with this column"""
+
+        n = int(np.searchsorted(self._timestamps, to_timestamp_us(threshold), side="left"))
+        if n == 0:
+            return self
+        return self._sliced(n, self.num_samples)
+
+    def _sliced(self, start: int, end: int) -> MeshColumn:
+        return MeshColumn._from_buffer(self.agent_id, self._buffer, self._start + start, self._start + end)
+
+    def _appended(self, timestamps: np.ndarray, metrics: np.ndarray, capacity: int) -> MeshColumn:
+        if len(timestamps) == 0:
+            return self
+        if self._buffer.append(self._end, timestamps, metrics):
+            return MeshColumn._from_buffer(self.agent_id, self._buffer, self._start, self._end + len(timestamps))
+
+        # no room left in the buffer, or other column already appended to it; move live samples to a new buffer.
+        # Twice the expected number of samples makes it happen at most once per that many appended samples
+        size = self.num_samples + len(timestamps)
+        buffer = _SampleBuffer.allocate(2 * max(capacity, size))
+        buffer.append(0, self._timestamps, self._metrics)
+        buffer.append(self.num_samples, timestamps, metrics)
+        return MeshColumn._from_buffer(self.agent_id, buffer, 0, size)
+
+    def _health_item(self, index: int) -> HealthItem:
+        jitter, latency, packet_loss = self._metrics[index]
+        return HealthItem(
+            jitter_millisec=MetricValue(jitter),
+            latency_millisec=MetricValue(latency),
+            packet_loss_percent=MetricValue(packet_loss),
+            time=from_timestamp_us(int(self._timestamps[index])),
+        )
+
+
+def pack_columns(columns: Sequence[MeshColumn]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pack samples of all the columns into (offsets, timestamps, metrics) arrays, eg. for sending them to other process.
+    Column i samples are [offsets[i], offsets[i + 1]) range of the arrays
+    """
+
+    offsets = np.zeros(len(columns) + 1, dtype=np.int64)
+    np.cumsum([column.num_samples for column in columns], out=offsets[1:])
+    timestamps = np.concatenate([column._timestamps for column in columns] + [np.empty(0, dtype=np.int64)])
+    metrics = np.concatenate([column._metrics for column in columns] + [np.empty((0, len(_METRIC_COLUMNS)))])
+    return offsets, timestamps, metrics
+
+
+def unpack_columns(
+    agent_ids: Sequence[AgentID], offsets: np.ndarray, timestamps: np.ndarray, metrics: np.ndarray
+) -> List[MeshColumn]:
+    """Create columns from arrays made by pack_columns(); the columns share the arrays"""
+
+    buffer = _SampleBuffer(timestamps, metrics, len(timestamps))
+    return [
+        MeshColumn._from_buffer(agent_id, buffer, int(offsets[i]), int(offsets[i + 1]))
+        for i, agent_id in enumerate(agent_ids)
+    ]
 
 
 class MeshRow:
@@ -104,10 +330,217 @@ class MeshRow:
         return self.agent.id
 
 
+class LatestMeasurements:
+    """
+    LatestMeasurements holds latest measurements of all connections as dense arrays indexed by agent position:
+    - metrics: N x N x 3 block of metric values, NaN where there is no measurement
+    - timestamps: N x N block of measurement timestamps (UTC epoch microseconds), NO_TIMESTAMP where there is none
+    It allows for processing the whole matrix with vectorized operations.
+    The blocks are kept as rows, shared between versions: an update copies only the rows it changes,
+    and the dense blocks are assembled when first read.
+    Aggregates over the latest measurements are maintained per row as the cells get updated, so reading them
+    costs nothing. Read-only
+    """
+
+    NO_TIMESTAMP = np.iinfo(np.int64).min
+    _NO_TIMESTAMP_MIN = np.iinfo(np.int64).max  # row minimum of a row without measurements
+
+    def __init__(self, agent_ids: Sequence[AgentID], metrics: np.ndarray, timestamps: np.ndarray) -> None:
+        self.agent_ids = list(agent_ids)
+        self._agent_index = {agent_id: i for i, agent_id in enumerate(self.agent_ids)}
+        self._metric_rows = list(metrics)
+        self._timestamp_rows = list(timestamps)
+        self._metrics: Optional[np.ndarray] = metrics
+        self._timestamps: Optional[np.ndarray] = timestamps
+        with_data = timestamps != self.NO_TIMESTAMP
+        self._row_num_with_data = with_data.sum(axis=1, dtype=np.int64)
+        self._row_timestamp_min = np.where(with_data, timestamps, self._NO_TIMESTAMP_MIN).min(
+            axis=1, initial=self._NO_TIMESTAMP_MIN
+        )
+        self._row_timestamp_max = timestamps.max(axis=1, initial=self.NO_TIMESTAMP)
+        self._aggregate()
+
+    @property
+    def metrics(self) -> np.ndarray:
+        if self._metrics is None:
+            self._metrics = np.stack(self._metric_rows)
+        return self._metrics
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        if self._timestamps is None:
+            self._timestamps = np.stack(self._timestamp_rows)
+        return self._timestamps
+
+    @property
+    def num_with_data(self) -> int:
+        """Number of connections that have a measurement"""
+
+        return self._num_with_data
+
+    @property
+    def timestamp_min(self) -> Optional[int]:
+        """Timestamp of the oldest latest measurement (UTC epoch microseconds); None if there are no measurements"""
+
+        return self._timestamp_min
+
+    @property
+    def timestamp_max(self) -> Optional[int]:
+        """Timestamp of the newest latest measurement (UTC epoch microseconds); None if there are no measurements"""
+
+        return self._timestamp_max
+
+    def row_timestamp_max(self, from_agent: AgentID) -> Optional[int]:
+        """Timestamp of the newest measurement in from_agent row; None if there are no measurements in the row"""
+
+        i = self._agent_index.get(from_agent)
+        if i is None:
+            return None
+        newest = int(self._row_timestamp_max[i])
+        return newest if newest != self.NO_TIMESTAMP else None
+
+    def rows_timestamp_max_min(self, max_lag_us: Optional[int] = None) -> Optional[int]:
+        """
+        The oldest of row_timestamp_max() across the rows that have measurements;
+        rows lagging more than max_lag_us behind the newest row are left out
+        """
+
+        if self._num_with_data == 0:
+            return None
+        rows_newest = self._row_timestamp_max[self._row_timestamp_max != self.NO_TIMESTAMP]
+        if max_lag_us is not None:
+            rows_newest = rows_newest[rows_newest >= rows_newest.max() - max_lag_us]
+        return int(rows_newest.min())
+
+    @classmethod
+    def empty(cls, agent_ids: Sequence[AgentID] = ()) -> LatestMeasurements:
+        n = len(agent_ids)
+        metrics = np.full((n, n, len(_METRIC_COLUMNS)), np.nan, dtype=np.float64)
+        timestamps = np.full((n, n), cls.NO_TIMESTAMP, dtype=np.int64)
+        return cls(agent_ids, metrics, timestamps)
+
+    @property
+    def has_data(self) -> np.ndarray:
+        """N x N mask of connections that have a measurement"""
+
+        return self.timestamps != self.NO_TIMESTAMP
+
+    def values(self, metric_type: MetricType) -> np.ndarray:
+        """N x N block of latest metric_type values, NaN where there is no measurement"""
+
+        return self.metrics[:, :, _METRIC_COLUMNS[metric_type]]
+
+    def updated_with(self, connections: Iterable[Tuple[AgentID, AgentID, MeshColumn]]) -> LatestMeasurements:
+        """
+        Return a copy updated with latest measurements of given (from agent, to agent, connection) cells.
+        Only the rows of updated cells are copied, unless new agents are added and all the rows need to grow
+        """
+
+        connections = list(connections)
+        if not connections:
+            return self
+        new_agent_ids = [a for a in _unique_agent_ids(connections) if a not in self._agent_index]
+        if new_agent_ids:
+            updated = self._resized(self.agent_ids + new_agent_ids)
+            copied_rows = set(range(len(updated.agent_ids)))  # rows are views of the new dense blocks
+        else:
+            updated = self._shallow_copy()
+            copied_rows = set()
+
+        touched_rows = set()
+        for from_agent, to_agent, conn in connections:
+            i, j = updated._agent_index[from_agent], updated._agent_index[to_agent]
+            if i not in copied_rows:
+                updated._metric_rows[i] = updated._metric_rows[i].copy()
+                updated._timestamp_rows[i] = updated._timestamp_rows[i].copy()
+                copied_rows.add(i)
+            latest_metrics = conn.latest_metrics
+            if latest_metrics is None:
+                updated._metric_rows[i][j] = np.nan
+                updated._timestamp_rows[i][j] = self.NO_TIMESTAMP
+            else:
+                updated._metric_rows[i][j] = latest_metrics
+                updated._timestamp_rows[i][j] = int(conn.timestamps[-1])
+            touched_rows.add(i)
+
+        for i in touched_rows:
+            updated._aggregate_row(i)
+        updated._aggregate()
+        return updated
+
+    def select(self, agent_ids: Sequence[AgentID]) -> LatestMeasurements:
+        """Return a copy indexed by positions of agent_ids; agents not known have no measurements"""
+
+        n = len(agent_ids)
+        metrics = np.full((n, n, len(_METRIC_COLUMNS)), np.nan, dtype=np.float64)
+        timestamps = np.full((n, n), self.NO_TIMESTAMP, dtype=np.int64)
+        positions = np.array([self._agent_index.get(agent_id, -1) for agent_id in agent_ids], dtype=np.intp)
+        known = np.nonzero(positions >= 0)[0]
+        src = np.ix_(positions[known], positions[known])
+        dst = np.ix_(known, known)
+        metrics[dst] = self.metrics[src]
+        timestamps[dst] = self.timestamps[src]
+        return LatestMeasurements(agent_ids, metrics, timestamps)
+
+    def _aggregate_row(self, i: int) -> None:
+        row = self._timestamp_rows[i]
+        with_data = row[row != self.NO_TIMESTAMP]
+        self._row_num_with_data[i] = len(with_data)
+        self._row_timestamp_min[i] = with_data.min(initial=self._NO_TIMESTAMP_MIN)
+        self._row_timestamp_max[i] = with_data.max(initial=self.NO_TIMESTAMP)
+
+    def _aggregate(self) -> None:
+        """Matrix aggregates from row aggregates; O(N)"""
+
+        self._num_with_data = int(self._row_num_with_data.sum())
+        if self._num_with_data == 0:
+            self._timestamp_min, self._timestamp_max = None, None
+        else:
+            self._timestamp_min = int(self._row_timestamp_min.min())
+            self._timestamp_max = int(self._row_timestamp_max.max())
+
+    def _shallow_copy(self) -> LatestMeasurements:
+        """Copy sharing the rows; row aggregates are copied, as they are updated in place"""
+
+        copy = object.__new__(LatestMeasurements)
+        copy.agent_ids = self.agent_ids
+        copy._agent_index = self._agent_index
+        copy._metric_rows = list(self._metric_rows)
+        copy._timestamp_rows = list(self._timestamp_rows)
+        copy._metrics = None
+        copy._timestamps = None
+        copy._row_num_with_data = self._row_num_with_data.copy()
+        copy._row_timestamp_min = self._row_timestamp_min.copy()
+        copy._row_timestamp_max = self._row_timestamp_max.copy()
+        copy._num_with_data, copy._timestamp_min, copy._timestamp_max = (
+            self._num_with_data,
+            self._timestamp_min,
+            self._timestamp_max,
+        )
+        return copy
+
+    def _resized(self, agent_ids: List[AgentID]) -> LatestMeasurements:
+        n = len(self.agent_ids)
+        metrics = np.full((len(agent_ids), len(agent_ids), len(_METRIC_COLUMNS)), np.nan, dtype=np.float64)
+        timestamps = np.full((len(agent_ids), len(agent_ids)), self.NO_TIMESTAMP, dtype=np.int64)
+        metrics[:n, :n] = self.metrics
+        timestamps[:n, :n] = self.timestamps
+        return LatestMeasurements(agent_ids, metrics, timestamps)
+
+
+def _unique_agent_ids(connections: Iterable[Tuple[AgentID, AgentID, MeshColumn]]) -> List[AgentID]:
+    agent_ids: Dict[AgentID, None] = {}
+    for from_agent, to_agent, _ in connections:
+        agent_ids[from_agent] = None
+        agent_ids[to_agent] = None
+    return list(agent_ids.keys())
+
+
 class ConnectionMatrix:
     """
     ConnectionMatrix holds "fromAgent" -> "toAgent" network connection metrics.
     It simplifies rendering test matrix table.
+    ConnectionMatrix is a read-only snapshot; updates produce a new matrix that shares unchanged rows and connections
     Usage: matrix.connection("244", "532").latency_millisec
     """
 
@@ -118,39 +551,123 @@ class ConnectionMatrix:
             for col in row.columns:
                 connections[row.agent_id][col.agent_id] = col
         self._connections = connections
-        self.connection_timestamp_oldest, self.connection_timestamp_newest = self._get_timestamp_range()
+        self._latest = LatestMeasurements.empty().updated_with(_cells(connections))
+
+    @classmethod
+    def _from_connections(
+        cls, connections: Dict[AgentID, Dict[AgentID, MeshColumn]], latest: LatestMeasurements
+    ) -> ConnectionMatrix:
+        matrix = cls([])
+        matrix._connections = connections
+        matrix._latest = latest
+        return matrix
+
+    @property
+    def latest(self) -> LatestMeasurements:
+        """Latest measurements of all connections as dense arrays, maintained as the matrix gets updated"""
+
+        return self._latest
+
+    @property
+    def connection_timestamp_oldest(self) -> Optional[datetime]:
+        """Timestamp of the oldest latest measurement across connections; None if there are no measurements"""
+
+        timestamp = self._latest.timestamp_min
+        return from_timestamp_us(timestamp) if timestamp is not None else None
+
+    @property
+    def connection_timestamp_newest(self) -> Optional[datetime]:
+        """Timestamp of the newest latest measurement across connections; None if there are no measurements"""
+
+        timestamp = self._latest.timestamp_max
+        return from_timestamp_us(timestamp) if timestamp is not None else None
+
+    @property
+    def rows(self) -> Mapping[AgentID, Mapping[AgentID, MeshColumn]]:
+        """Read-only view of "from" agent -> "to" agent -> connection"""
+
+        return self._connections
 
-    def incremental_update(self, src: ConnectionMatrix) -> None:
+    def merged_with(self, src: ConnectionMatrix, capacity: Optional[Mapping[AgentID, int]] = None) -> ConnectionMatrix:
         """
-        Update with src connections, add new connections if any, don't remove anything.
+        Return new matrix updated with src connections, add new connections if any, don't remove anything.
+        Only the rows present in src are rebuilt, all the other rows are shared with this matrix.
+        capacity is the number of samples expected to be held by connections to given agent
         """
 
-        for from_agent_id in src._connections.keys():
-            dst_row = self._connections.get(from_agent_id, {})  # get or create dst_row
-            for to_agent_id, update_conn in src._connections[from_agent_id].items():
+        capacity = capacity or {}
+        connections = dict(self._connections)
+        changed: List[Tuple[AgentID, AgentID, MeshColumn]] = []
+        for from_agent_id, src_row in src._connections.items():
+            dst_row = dict(connections.get(from_agent_id, {}))  # copy or create dst_row
+            for to_agent_id, update_conn in src_row.items():
                 cached_conn = dst_row.get(to_agent_id)
-                dst_row[to_agent_id] = self._update(cached_conn, update_conn)
-            self._connections[from_agent_id] = dst_row
-        self.connection_timestamp_oldest, self.connection_timestamp_newest = self._get_timestamp_range()
-
-    def drop_samples_older_than(self, threshold: datetime) -> None:
-        for row in self._connections.values():
-            for conn in row.values():
-                n = 0
-                while conn.health and conn.health[-1].timestamp < threshold:
-                    conn.health.pop()
-                    n += 1
-                if n > 0:
-                    logger.debug("Dropped %d samples older than %s", n, threshold.isoformat())
-        self.connection_timestamp_oldest, self.connection_timestamp_newest = self._get_timestamp_range()
+                new_conn = self._update(cached_conn, update_conn, capacity.get(to_agent_id, 0))
+                if new_conn is not cached_conn:
+                    changed.append((from_agent_id, to_agent_id, new_conn))
+                dst_row[to_agent_id] = new_conn
+            connections[from_agent_id] = dst_row
+        return ConnectionMatrix._from_connections(connections, self._latest.updated_with(changed))
+
+    def select_rows(self, agent_ids: List[AgentID]) -> ConnectionMatrix:
+        """Return new matrix with "from" agent rows limited to agent_ids. Selected rows are shared with this matrix"""
+
+        connections = {agent_id: row for agent_id, row in self._connections.items() if agent_id in agent_ids}
+        return ConnectionMatrix._from_connections(
+            connections, LatestMeasurements.empty().updated_with(_cells(connections))
+        )
+
+    def without_samples_older_than(self, threshold: datetime) -> ConnectionMatrix:
+        """
+        Return new matrix with samples older than threshold dropped.
+        Only the rows and connections that have such samples are rebuilt, all the other are shared with this matrix.
+        """
+
+        connections = self._connections
+        emptied: List[Tuple[AgentID, AgentID, MeshColumn]] = []
+        num_dropped = 0
+        for from_agent_id, row in self._connections.items():
+            new_row: Optional[Dict[AgentID, MeshColumn]] = None
+            for to_agent_id, conn in row.items():
+                trimmed_conn = conn.without_samples_older_than(threshold)
+                if trimmed_conn is conn:
+                    continue
+                if new_row is None:
+                    new_row = dict(row)
+                new_row[to_agent_id] = trimmed_conn
+                num_dropped += conn.num_samples - trimmed_conn.num_samples
+                if not trimmed_conn.has_data():
+                    emptied.append((from_agent_id, to_agent_id, trimmed_conn))
+            if new_row is not None:
+                if connections is self._connections:
+                    connections = dict(self._connections)
+                connections[from_agent_id] = new_row
+
+        if connections is self._connections:
+            return self
+        logger.debug("Dropped %d samples older than %s", num_dropped, threshold.isoformat())
+        # dropping old samples changes latest measurement only if no samples are left
+        latest = self._latest.updated_with(emptied) if emptied else self._latest
+        return ConnectionMatrix._from_connections(connections, latest)
+
+    def row_timestamp_newest(self, from_agent: AgentID) -> Optional[datetime]:
+        """Timestamp of the newest sample in from_agent row; None if there are no samples in the row"""
+
+        timestamp = self._latest.row_timestamp_max(from_agent)
+        return from_timestamp_us(timestamp) if timestamp is not None else None
+
+    def rows_timestamp_newest_oldest(self, max_lag: Optional[timedelta] = None) -> Optional[datetime]:
+        """
+        The oldest of row_timestamp_newest() across the rows that have samples; None if there are no samples.
+        Rows lagging more than max_lag behind the newest row, eg. of offline agents, are left out
+        """
+
+        max_lag_us = int(max_lag.total_seconds() * 1_000_000) if max_lag is not None else None
+        timestamp = self._latest.rows_timestamp_max_min(max_lag_us)
+        return from_timestamp_us(timestamp) if timestamp is not None else None
 
     def num_connections_with_data(self) -> int:
-        count = 0
-        for row in self._connections.values():
-            for conn in row.values():
-                if conn.has_data():
-                    count += 1
-        return count
+        return self._latest.num_with_data
 
     def connection(self, from_agent, to_agent: AgentID) -> MeshColumn:
         if from_agent not in self._connections:
@@ -159,24 +676,8 @@ class ConnectionMatrix:
             return MeshColumn()
         return self._connections[from_agent][to_agent]
 
-    def _get_timestamp_range(self) -> Tuple[Optional[datetime], Optional[datetime]]:
-        lowest: Optional[datetime] = None
-        highest: Optional[datetime] = None
-
-        for row in self._connections.values():
-            for col in row.values():
-                health = col.latest_measurement
-                if not health:
-                    continue
-                if lowest is None or health.timestamp < lowest:
-                    lowest = health.timestamp
-                if highest is None or health.timestamp > highest:
-                    highest = health.timestamp
-
-        return lowest, highest
-
     @staticmethod
-    def _update(cached_conn: Optional[MeshColumn], update_conn: MeshColumn) -> MeshColumn:
+    def _update(cached_conn: Optional[MeshColumn], update_conn: MeshColumn, capacity: int) -> MeshColumn:
         """Update cache if update is newer or just as fresh but has more timeseries data"""
 
         # 1. no such connection in cache yet - replace with whatever comes
@@ -184,44 +685,42 @@ class ConnectionMatrix:
             return update_conn
 
         # 2. connection in cache but has no timeseries data at all - replace
-        cached_latest = cached_conn.latest_measurement
+        cached_latest = cached_conn.latest_timestamp
         if not cached_latest:
             return update_conn
 
         # 3. connection in cache, has timeseries data, and update brings no timeseries data - keep cache
-        update_latest = update_conn.latest_measurement
+        update_latest = update_conn.latest_timestamp
         if not update_latest:
             return cached_conn
 
         # 4. cached connection is older than update connection
-        if cached_latest.timestamp < update_latest.timestamp:
+        if cached_latest < update_latest:
             # accumulate historical timeseries data
-            update_oldest_timestamp = update_conn.health[-1].timestamp
-            cached_items_to_keep = [h for h in cached_conn.health if h.timestamp < update_oldest_timestamp]
-            combined = update_conn
-            combined.health += cached_items_to_keep
-            return combined
+            return cached_conn.merged_with(update_conn, capacity)
 
         # 5. cached connection is newer than update. Should never happen
-        if cached_latest.timestamp > update_latest.timestamp:
-            logger.debug(
-                "Cached connection is newer than update connection: %s vs %s",
-                cached_latest.timestamp,
-                update_latest.timestamp,
-            )
+        if cached_latest > update_latest:
+            logger.debug("Cached connection is newer than update connection: %s vs %s", cached_latest, update_latest)
             return cached_conn
 
         # 6. cached and update are equally fresh but update brings more data
-        if len(update_conn.health) > len(cached_conn.health):
+        if update_conn.num_samples > cached_conn.num_samples:
             return update_conn
 
         return cached_conn
 
 
+def _cells(connections: Mapping[AgentID, Mapping[AgentID, MeshColumn]]) -> List[Tuple[AgentID, AgentID, MeshColumn]]:
+    return [(from_agent, to_agent, conn) for from_agent, row in connections.items() for to_agent, conn in row.items()]
+
+
 class MeshResults:
     """
     Internal representation of Mesh Test results; independent of source data structure like http
-    or grpc synthetics client
+    or grpc synthetics client.
+    MeshResults is an immutable, versioned snapshot; updates produce a new snapshot with a higher version
+    that shares all the unchanged data with the previous one, so it can be read without locking.
     """
 
     def __init__(
@@ -235,17 +734,81 @@ class MeshResults:
         for r in rows:
             self.participating_agents.insert(r.agent)
         self.connection_matrix = ConnectionMatrix(rows)
+        self.version = next(_versions)
+
+    @classmethod
+    def _from_parts(cls, tasks: Tasks, participating_agents: Agents, matrix: ConnectionMatrix) -> MeshResults:
+        results = cls(tasks=tasks)
+        results.participating_agents = participating_agents
+        results.connection_matrix = matrix
+        return results
+
+    def merged_with(self, src: MeshResults, history_seconds: int = 0) -> MeshResults:
+        """
+        Return new snapshot updated with src data, add new pieces of data if any, don't remove anything.
+        history_seconds is the time window the snapshot is expected to hold samples for
+        """
+
+        participating_agents = Agents()
+        for agent in self.participating_agents.all():
+            if src.participating_agents.get_by_id(agent.id).id != agent.id:
+                participating_agents.insert(agent)
+        for agent in src.participating_agents.all():
+            participating_agents.insert(agent)
+
+        tasks = self.tasks.merged_with(src.tasks)
+        return MeshResults._from_parts(
+            tasks=tasks,
+            participating_agents=participating_agents,
+            matrix=self.connection_matrix.merged_with(
+                src.connection_matrix, self._samples_capacity(src, tasks, history_seconds)
+            ),
+        )
 
-    def incremental_update(self, src: MeshResults) -> None:
-        """Update with src data, add new pieces of data if any, don't remove anything"""
+    def _samples_capacity(self, src: MeshResults, tasks: Tasks, history_seconds: int) -> Dict[AgentID, int]:
+        """Number of samples in history_seconds for connections to given agent, according to agent's task period"""
 
-        self.tasks.incremental_update(src.tasks)
-        self.connection_matrix.incremental_update(src.connection_matrix)
-        self.participating_agents = src.participating_agents
+        capacity: Dict[AgentID, int] = {}
+        for agent in itertools.chain(self.participating_agents.all(), src.participating_agents.all()):
+            task = tasks.get_by_ip(agent.ip)
+            if task and task.period_seconds > 0:
+                capacity[agent.id] = math.ceil(history_seconds / task.period_seconds) + 1
+        return capacity
+
+    def select_rows(self, agent_ids: List[AgentID]) -> MeshResults:
+        """Return new snapshot with results limited to connections outgoing from listed agents"""
+
+        if all(agent_id in agent_ids for agent_id in self.connection_matrix.rows.keys()):
+            return self
+
+        participating_agents = Agents()
+        for agent in self.participating_agents.all():
+            if agent.id in agent_ids:
+                participating_agents.insert(agent)
+        matrix = self.connection_matrix.select_rows(agent_ids)
+        return MeshResults._from_parts(self.tasks, participating_agents, matrix)
+
+    def without_samples_older_than(self, threshold: datetime) -> MeshResults:
+        """Return new snapshot with samples older than threshold dropped"""
+
+        matrix = self.connection_matrix.without_samples_older_than(threshold)
+        if matrix is self.connection_matrix:
+            return self
+        return MeshResults._from_parts(self.tasks, self.participating_agents, matrix)
 
     def filter(self, from_agent, to_agent: AgentID, metric_type: MetricType) -> List[Tuple[datetime, MetricValue]]:
-        items = self.connection(from_agent, to_agent).health
-        return [(i.timestamp, i.get_metric(metric_type).value) for i in items]
+        """Connection metric time-series, from newest to oldest"""
+
+        conn = self.connection(from_agent, to_agent)
+        timestamps = conn.timestamps[::-1].tolist()
+        values = conn.values(metric_type)[::-1].tolist()
+        return [(from_timestamp_us(t), v) for t, v in zip(timestamps, values)]
+
+    def time_series(self, from_agent, to_agent: AgentID, metric_type: MetricType) -> Tuple[np.ndarray, np.ndarray]:
+        """Connection metric time-series as (datetime64[us] UTC timestamps, values) arrays, from oldest to newest"""
+
+        conn = self.connection(from_agent, to_agent)
+        return conn.timestamps.astype("datetime64[us]"), conn.values(metric_type)
 
     def connection(self, from_agent, to_agent: AgentID) -> MeshColumn:
         return self.connection_matrix.connection(from_agent, to_agent)
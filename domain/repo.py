@@ -1,4 +1,4 @@
-from typing import List, Optional, Protocol
+from typing import Iterator, List, Optional, Protocol, Tuple, runtime_checkable
 
 from domain.model.mesh_config import MeshConfig
 from domain.model.mesh_results import MeshResults
@@ -24,3 +24,73 @@ class Repo(Protocol):
         task_ids - filter the response to connections targeting agents related to listed tasks. Empty = do not filter
         """
         pass
+
+
+@runtime_checkable
+class ConcurrentRepo(Repo, Protocol):
+    """ConcurrentRepo is a Repo that can have multiple requests in flight at once, without a thread per request"""
+
+    def get_mesh_test_results_and_config(
+        self,
+        test_id: TestID,
+        history_length_seconds: int,
+        timeseries: bool = True,
+        agent_ids: Optional[List[AgentID]] = None,
+        task_ids: Optional[List[TaskID]] = None,
+    ) -> Tuple[MeshResults, MeshConfig]:
+        """Same as get_mesh_test_results() and get_mesh_config(), but with the requests issued concurrently"""
+        pass
+
+
+@runtime_checkable
+class ShardedRepo(Repo, Protocol):
+    """ShardedRepo can fetch results for all connections as several smaller requests, for subsets of agent rows"""
+
+    def get_mesh_test_results_shards(
+        self, test_id: TestID, history_length_seconds: int, agent_ids: List[AgentID], timeseries: bool = True
+    ) -> Iterator[MeshResults]:
+        """
+        Results for all connections split into shards by agent rows; shards are yielded as they arrive.
+        agent_ids - all the agents in the test
+        """
+        pass
+
+    def num_shards(self, num_agents: int) -> int:
+        """Number of results requests get_mesh_test_results_shards() issues for that many agents"""
+        pass
+
+
+def get_mesh_test_results_and_config(
+    repo: Repo,
+    test_id: TestID,
+    history_length_seconds: int,
+    timeseries: bool = True,
+    agent_ids: Optional[List[AgentID]] = None,
+    task_ids: Optional[List[TaskID]] = None,
+) -> Tuple[MeshResults, MeshConfig]:
+    """Get test results and config from repo; concurrently if the repo supports it"""
+
+    if isinstance(repo, ConcurrentRepo):
+        return repo.get_mesh_test_results_and_config(test_id, history_length_seconds, timeseries, agent_ids, task_ids)
+    return (
+        repo.get_mesh_test_results(test_id, history_length_seconds, timeseries, agent_ids, task_ids),
+        repo.get_mesh_config(test_id),
+    )
+
+
+def get_mesh_test_results_shards(
+    repo: Repo, test_id: TestID, history_length_seconds: int, agent_ids: List[AgentID], timeseries: bool = True
+) -> Iterator[MeshResults]:
+    """Get results for all connections in shards; in a single shard if the repo doesn't support sharding"""
+
+    if isinstance(repo, ShardedRepo):
+        return repo.get_mesh_test_results_shards(test_id, history_length_seconds, agent_ids, timeseries)
+    return iter([repo.get_mesh_test_results(test_id, history_length_seconds, timeseries)])
+
+
+def get_mesh_test_results_num_requests(repo: Repo, num_agents: int) -> int:
+    """Number of results requests get_mesh_test_results_shards() issues for that many agents"""
+
+    if isinstance(repo, ShardedRepo):
+        return repo.num_shards(num_agents)
+    return 1
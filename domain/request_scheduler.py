@@ -0,0 +1,145 @@
+import collections
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RequestPriority(IntEnum):
+    """Lower value means higher priority"""
+
+    MATRIX = 0  # refresh of all connections; what every page shows
+    TIME_SERIES = 1  # drilldown into single connection
+
+
+@dataclass(frozen=True)
+class RequestBudgetStats:
+    remaining: Optional[float]  # API requests left in the budget; None if the budget is unlimited
+    capacity: Optional[float]
+    requests_per_hour: float  # API requests issued during the last hour
+    exhaustion_seconds: Optional[float]  # projected time until the budget runs out at that rate; None if it won't
+    denied: int  # number of requests denied because of the budget
+
+
+class RequestScheduler:
+    """
+    RequestScheduler decides whether an API request can be issued now:
+    - per key: at most one request every interval_seconds, eg. per connection
+    - globally: the account request quota is modeled as a token bucket holding up to quota_per_hour tokens,
+      refilled at quota_per_hour rate; every API request takes a token.
+    When the bucket runs low, only the high priority requests are admitted, so that the matrix keeps getting
+    refreshed at the cost of time-series drilldowns. Denied requests are expected to be served from cache.
+    Keys that were not used for interval_seconds are evicted, as they would be admitted anyway
+    """
+
+    _LOW_BUDGET_RESERVE = 0.2  # part of bucket capacity reserved for high priority requests
+    _STATS_WINDOW_SECONDS = 3600.0
+
+    def __init__(self, interval_seconds: int, quota_per_hour: int = 0) -> None:
+        self._lock = threading.Lock()
+        self._interval_seconds = interval_seconds
+        self._last_admission: Dict[str, float] = {}
+        self._last_eviction = time.monotonic()
+
+        # quota_per_hour = 0 means unlimited budget
+        self._capacity = float(quota_per_hour)
+        self._refill_per_second = quota_per_hour / 3600.0
+        self._tokens = self._capacity
+        self._refill_time = time.monotonic()
+        self._consumed: Deque[Tuple[float, int]] = collections.deque()  # (time, cost) within stats window
+        self._consumed_in_window = 0
+        self._denied = 0
+
+    @property
+    def interval_seconds(self) -> int:
+        return self._interval_seconds
+
+    def try_acquire(
+        self, key: Optional[str] = None, priority: RequestPriority = RequestPriority.MATRIX, cost: int = 1
+    ) -> bool:
+        """
+        Admit request of cost API calls, if key interval passed (when given) and the budget allows.
+        Admitted request updates key's last admission time and takes cost tokens from the budget
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle_keys(now)
+            if key is not None:
+                last_admission = self._last_admission.get(key)
+                if last_admission is not None and now - last_admission < self._interval_seconds:
+                    return False
+
+            if not self._take_tokens(now, priority, cost):
+                self._denied += 1
+                logger.debug("Request budget low (%.1f left); %s request denied", self._tokens, priority.name)
+                return False
+
+            if key is not None:
+                self._last_admission[key] = now
+            return True
+
+    def seconds_until_available(self, priority: RequestPriority = RequestPriority.MATRIX, cost: int = 1) -> float:
+        """Time until the budget allows request of given priority and cost"""
+
+        if self._capacity == 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = self._required_tokens(priority, cost) - self._tokens
+        return max(0.0, missing / self._refill_per_second)
+
+    @property
+    def stats(self) -> RequestBudgetStats:
+        now = time.monotonic()
+        with self._lock:
+            self._refill(now)
+            self._trim_consumed(now)
+            requests_per_hour = self._consumed_in_window * 3600.0 / self._STATS_WINDOW_SECONDS
+            if self._capacity == 0:
+                return RequestBudgetStats(None, None, requests_per_hour, None, self._denied)
+
+            exhaustion_seconds = None
+            drain_per_second = requests_per_hour / 3600.0 - self._refill_per_second
+            if drain_per_second > 0:
+                exhaustion_seconds = self._tokens / drain_per_second
+            return RequestBudgetStats(self._tokens, self._capacity, requests_per_hour, exhaustion_seconds, self._denied)
+
+    def _take_tokens(self, now: float, priority: RequestPriority, cost: int) -> bool:
+        if self._capacity > 0:
+            self._refill(now)
+            if self._tokens < self._required_tokens(priority, cost):
+                return False
+            self._tokens -= cost
+
+        self._consumed.append((now, cost))
+        self._consumed_in_window += cost
+        self._trim_consumed(now)
+        return True
+
+    def _required_tokens(self, priority: RequestPriority, cost: int) -> float:
+        if priority == RequestPriority.MATRIX:
+            return float(cost)
+        return cost + self._capacity * self._LOW_BUDGET_RESERVE
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self._capacity, self._tokens + (now - self._refill_time) * self._refill_per_second)
+        self._refill_time = now
+
+    def _trim_consumed(self, now: float) -> None:
+        while self._consumed and now - self._consumed[0][0] > self._STATS_WINDOW_SECONDS:
+            _, cost = self._consumed.popleft()
+            self._consumed_in_window -= cost
+
+    def _evict_idle_keys(self, now: float) -> None:
+        # sweep at most once per interval, so that eviction cost is amortized over the requests
+        if now - self._last_eviction < self._interval_seconds:
+            return
+        self._last_eviction = now
+        idle_keys = [k for k, t in self._last_admission.items() if now - t >= self._interval_seconds]
+        for key in idle_keys:
+            del self._last_admission[key]
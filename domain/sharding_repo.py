@@ -0,0 +1,108 @@
+import logging
+import math
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Tuple
+
+from domain.model.mesh_config import MeshConfig
+from domain.model.mesh_results import MeshResults
+from domain.repo import Repo, get_mesh_test_results_and_config
+from domain.types import AgentID, TaskID, TestID
+
+logger = logging.getLogger(__name__)
+
+
+class ShardingRepo:
+    """
+    ShardingRepo implements domain.Repo and domain.ShardedRepo protocols.
+    Requests for results of all connections are split into shards of at most shard_size agent rows,
+    sent to the source repo concurrently, at most concurrency at a time. Smaller responses are less likely to hit
+    the read timeout, and are decoded in parallel with fetching the other shards.
+    Shards can be consumed as they arrive, so the results are usable before the whole mesh is fetched.
+    Requests for results of selected agents are passed to the source repo as they are.
+    Shards cover only the agents passed in: rows of agents added to the test since the caller's config was fetched
+    are missing until the config is refreshed. Such agents still show up as columns of the other rows,
+    which the mesh cache takes as a sign to refresh the config
+    """
+
+    def __init__(self, source_repo: Repo, shard_size: int, concurrency: int) -> None:
+        self._source_repo = source_repo
+        self._shard_size = shard_size
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="mesh-shard-fetch")
+
+    def get_mesh_config(self, test_id: TestID) -> MeshConfig:
+        return self._source_repo.get_mesh_config(test_id)
+
+    def get_mesh_test_results(
+        self,
+        test_id: TestID,
+        history_length_seconds: int,
+        timeseries: bool = True,
+        agent_ids: Optional[List[AgentID]] = None,
+        task_ids: Optional[List[TaskID]] = None,
+    ) -> MeshResults:
+        if agent_ids:
+            return self._source_repo.get_mesh_test_results(
+                test_id, history_length_seconds, timeseries, agent_ids, task_ids
+            )
+        config = self._source_repo.get_mesh_config(test_id)
+        all_agent_ids = [agent.id for agent in config.agents.all()]
+        return self._merge(
+            self.get_mesh_test_results_shards(test_id, history_length_seconds, all_agent_ids, timeseries)
+        )
+
+    def get_mesh_test_results_and_config(
+        self,
+        test_id: TestID,
+        history_length_seconds: int,
+        timeseries: bool = True,
+        agent_ids: Optional[List[AgentID]] = None,
+        task_ids: Optional[List[TaskID]] = None,
+    ) -> Tuple[MeshResults, MeshConfig]:
+        if agent_ids:
+            return get_mesh_test_results_and_config(
+                self._source_repo, test_id, history_length_seconds, timeseries, agent_ids, task_ids
+            )
+        config = self._source_repo.get_mesh_config(test_id)
+        all_agent_ids = [agent.id for agent in config.agents.all()]
+        return (
+            self._merge(self.get_mesh_test_results_shards(test_id, history_length_seconds, all_agent_ids, timeseries)),
+            config,
+        )
+
+    def get_mesh_test_results_shards(
+        self, test_id: TestID, history_length_seconds: int, agent_ids: List[AgentID], timeseries: bool = True
+    ) -> Iterator[MeshResults]:
+        agent_ids = sorted(agent_ids)
+        shards = [agent_ids[i : i + self._shard_size] for i in range(0, len(agent_ids), self._shard_size)]
+        if self.num_shards(len(agent_ids)) <= 1:
+            # not worth splitting; request entire mesh
+            shards = [[]]
+
+        logger.debug("Fetching results for %d agents in %d shards", len(agent_ids), len(shards))
+        futures = [
+            self._executor.submit(
+                self._source_repo.get_mesh_test_results, test_id, history_length_seconds, timeseries, shard
+            )
+            for shard in shards
+        ]
+        return self._as_completed(futures)
+
+    def num_shards(self, num_agents: int) -> int:
+        return max(1, math.ceil(num_agents / self._shard_size))
+
+    @staticmethod
+    def _as_completed(futures: List[Future]) -> Iterator[MeshResults]:
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # consumer stopped early or a shard failed; don't fetch the shards that didn't start yet
+            for future in futures:
+                future.cancel()
+
+    @staticmethod
+    def _merge(shards: Iterator[MeshResults]) -> MeshResults:
+        results = MeshResults()
+        for shard in shards:
+            results = results.merged_with(shard)
+        return results
@@ -1,12 +1,13 @@
 import logging
-from typing import Tuple
+from typing import Any, Dict, List, Tuple
 
 import yaml
 
-from domain.config import Matrix, defaults
+from domain.cache.refresh_mode import RefreshMode
+from domain.config import Matrix, MatrixRenderer, defaults
 from domain.geo import DistanceUnit
 from domain.metric import MetricType
-from domain.types import TestID
+from domain.types import AgentID, TestID
 from infrastructure.config.thresholds import Thresholds
 
 
@@ -29,6 +30,66 @@ class ConfigYAML:
     def data_min_periods(self) -> int:
         return self._data_min_periods
 
+    @property
+    def data_config_refresh_periods(self) -> int:
+        return self._data_config_refresh_periods
+
+    @property
+    def data_refresh_mode(self) -> RefreshMode:
+        return self._data_refresh_mode
+
+    @property
+    def data_stale_periods(self) -> int:
+        return self._data_stale_periods
+
+    @property
+    def data_max_stale_periods(self) -> int:
+        return self._data_max_stale_periods
+
+    @property
+    def data_shared_cache_path(self) -> str:
+        return self._data_shared_cache_path
+
+    @property
+    def data_snapshot_path(self) -> str:
+        return self._data_snapshot_path
+
+    @property
+    def data_snapshot_save_periods(self) -> int:
+        return self._data_snapshot_save_periods
+
+    @property
+    def data_batch_window_seconds(self) -> float:
+        return self._data_batch_window_seconds
+
+    @property
+    def data_fast_decode(self) -> bool:
+        return self._data_fast_decode
+
+    @property
+    def data_decode_processes(self) -> int:
+        return self._data_decode_processes
+
+    @property
+    def data_shard_size(self) -> int:
+        return self._data_shard_size
+
+    @property
+    def data_shard_concurrency(self) -> int:
+        return self._data_shard_concurrency
+
+    @property
+    def async_api_client(self) -> bool:
+        return self._async_api_client
+
+    @property
+    def api_max_connections(self) -> int:
+        return self._api_max_connections
+
+    @property
+    def api_quota_requests_per_hour(self) -> int:
+        return self._api_quota_requests_per_hour
+
     @property
     def latency(self) -> Thresholds:
         return self._latency
@@ -45,6 +106,10 @@ class ConfigYAML:
     def timeout(self) -> Tuple[float, float]:
         return self._timeout  # type: ignore
 
+    @property
+    def http_compression(self) -> bool:
+        return self._http_compression
+
     @property
     def logging_level(self) -> int:
         return self._logging_level
@@ -57,6 +122,10 @@ class ConfigYAML:
     def matrix(self) -> Matrix:
         return self._matrix
 
+    @property
+    def matrix_renderer(self) -> MatrixRenderer:
+        return self._matrix_renderer
+
     @property
     def distance_unit(self) -> DistanceUnit:
         return self._distance_unit
@@ -82,10 +151,35 @@ class ConfigYAML:
                 config.get("data_history_length_periods", defaults.data_history_length_periods)
             )
             self._data_min_periods = int(config.get("data_min_periods", defaults.data_min_periods))
-            self._latency = Thresholds(config["thresholds"]["latency"])
-            self._jitter = Thresholds(config["thresholds"]["jitter"])
-            self._packet_loss = Thresholds(config["thresholds"]["packet_loss"])
+            self._data_config_refresh_periods = int(
+                config.get("data_config_refresh_periods", defaults.data_config_refresh_periods)
+            )
+            self._data_refresh_mode = RefreshMode(config.get("data_refresh_mode", defaults.data_refresh_mode))
+            self._data_stale_periods = int(config.get("data_stale_periods", defaults.data_stale_periods))
+            self._data_max_stale_periods = int(config.get("data_max_stale_periods", defaults.data_max_stale_periods))
+            self._data_shared_cache_path = str(config.get("data_shared_cache_path", defaults.data_shared_cache_path))
+            self._data_snapshot_path = str(config.get("data_snapshot_path", defaults.data_snapshot_path))
+            self._data_snapshot_save_periods = int(
+                config.get("data_snapshot_save_periods", defaults.data_snapshot_save_periods)
+            )
+            self._data_batch_window_seconds = float(
+                config.get("data_batch_window_seconds", defaults.data_batch_window_seconds)
+            )
+            self._data_fast_decode = bool(config.get("data_fast_decode", defaults.data_fast_decode))
+            self._data_decode_processes = int(config.get("data_decode_processes", defaults.data_decode_processes))
+            self._data_shard_size = int(config.get("data_shard_size", defaults.data_shard_size))
+            self._data_shard_concurrency = int(config.get("data_shard_concurrency", defaults.data_shard_concurrency))
+            self._async_api_client = bool(config.get("async_api_client", defaults.async_api_client))
+            self._api_max_connections = int(config.get("api_max_connections", defaults.api_max_connections))
+            self._api_quota_requests_per_hour = int(
+                config.get("api_quota_requests_per_hour", defaults.api_quota_requests_per_hour)
+            )
+            agent_groups = self._parse_agent_groups(config.get("agent_groups", {}))
+            self._latency = Thresholds(config["thresholds"]["latency"], agent_groups)
+            self._jitter = Thresholds(config["thresholds"]["jitter"], agent_groups)
+            self._packet_loss = Thresholds(config["thresholds"]["packet_loss"], agent_groups)
             self._timeout = tuple(config.get("timeout", defaults.timeout_seconds))
+            self._http_compression = bool(config.get("http_compression", defaults.http_compression))
             self._logging_level = self._parse_logging_level(config.get("logging_level", defaults.logging_level))
             self._agent_label = config.get("agent_label", defaults.agent_label)
             self._matrix = Matrix(
@@ -94,6 +188,7 @@ class ConfigYAML:
                 config["matrix"]["cell_color_critical"],
                 config["matrix"]["cell_color_nodata"],
             )
+            self._matrix_renderer = MatrixRenderer(config.get("matrix_renderer", defaults.matrix_renderer))
             self._distance_unit = DistanceUnit(config["distance_unit"])
             self._show_measurement_values = bool(
                 config.get("show_measurement_values", defaults.show_measurement_values)
@@ -102,6 +197,10 @@ class ConfigYAML:
         except Exception as err:
             raise Exception("Configuration error") from err
 
+    @staticmethod
+    def _parse_agent_groups(groups: Dict[str, List[Any]]) -> Dict[str, List[AgentID]]:
+        return {str(name): [AgentID(agent_id) for agent_id in agent_ids] for name, agent_ids in groups.items()}
+
     def _parse_logging_level(self, level_str: str) -> int:
         try:
             return {
@@ -1,8 +1,14 @@
+import threading
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
 
+import numpy as np
+
+from domain.config.thresholds import ThresholdMatrices
 from domain.types import AgentID, Threshold
 
+ANY_AGENT = "*"
+
 
 @dataclass
 class ThresholdOverride:
@@ -12,12 +18,30 @@ class ThresholdOverride:
     critical: Optional[Threshold] = None
 
 
+@dataclass(frozen=True)
+class AgentSelector:
+    """AgentSelector matches a single agent, any agent from a group, or any agent at all"""
+
+    agent_ids: Optional[FrozenSet[AgentID]]  # None matches any agent
+    specificity: int  # more specific override takes precedence: 2 - single agent, 1 - agent group, 0 - any agent
+
+    def matches(self, agent_id: AgentID) -> bool:
+        return self.agent_ids is None or agent_id in self.agent_ids
+
+    def mask(self, agent_ids: np.ndarray) -> np.ndarray:
+        if self.agent_ids is None:
+            return np.ones(len(agent_ids), dtype=bool)
+        return np.isin(agent_ids, list(self.agent_ids))
+
+
 class Thresholds:
     """
     Thresholds allow to read threshold values for given agent pair based on configuration.
     It implements domain.config.thresholds.Thresholds protocol
     """
 
+    _compiled: Optional[Tuple[Tuple[AgentID, ...], ThresholdMatrices]]  # agent ids and thresholds compiled for them
+
     def warning(self, from_agent: AgentID, to_agent: AgentID) -> Threshold:
         override = self._get_override_or_none(from_agent, to_agent)
         if override is None or override.warning is None:
@@ -30,7 +54,23 @@ class Thresholds:
             return self._default_critical
         return override.critical
 
-    def __init__(self, config: Dict[str, Any]) -> None:
+    def matrices(self, agent_ids: Sequence[AgentID]) -> ThresholdMatrices:
+        """
+        Warning and critical thresholds for all agent pairs, compiled into dense arrays indexed by agent_ids positions.
+        Compiled arrays are kept until requested for different agents
+        """
+
+        key = tuple(agent_ids)
+        compiled = self._compiled
+        if compiled is not None and compiled[0] == key:
+            return compiled[1]
+
+        with self._compile_lock:
+            matrices = self._compile(np.array(key, dtype=object))
+            self._compiled = (key, matrices)
+        return matrices
+
+    def __init__(self, config: Dict[str, Any], agent_groups: Optional[Dict[str, List[AgentID]]] = None) -> None:
         """
         Example of config dict structure for thresholds:
         "defaults":{
@@ -45,13 +85,17 @@ class Thresholds:
             "critical":20.0
             },
             {
-            "from":60,
-            "to":70,
-            "warning":1000.0,
-            "critical":2000.0
+            "from_group":"europe",
+            "to":"*",
+            "warning":1000.0
             }
         ]
+        Override "from"/"to" is an agent ID or "*" for any agent; "from_group"/"to_group" is a name of agent group.
+        Example of agent_groups dict structure:
+        {"europe": ["10", "11", "12"]}
         """
+        self._compile_lock = threading.Lock()
+        self._compiled = None
         try:
             # read defaults config (required)
             self._default_warning = Threshold(config["defaults"]["warning"])
@@ -59,39 +103,93 @@ class Thresholds:
 
             # read overrides config (optional)
             self._overrides: Dict[AgentID, Dict[AgentID, ThresholdOverride]] = dict()
+            self._selector_overrides: List[Tuple[AgentSelector, AgentSelector, ThresholdOverride]] = []
             if "overrides" not in config:
                 return
 
+            groups = agent_groups or {}
             for override in config["overrides"]:
-                from_agent = AgentID(override["from"])
-                to_agent = AgentID(override["to"])
+                from_selector = self._make_selector(override, "from", groups)
+                to_selector = self._make_selector(override, "to", groups)
                 if "warning" in override:
-                    self._override_warning(from_agent, to_agent, Threshold(override["warning"]))
+                    self._override_warning(from_selector, to_selector, Threshold(override["warning"]))
                 if "critical" in override:
-                    self._override_critical(from_agent, to_agent, Threshold(override["critical"]))
+                    self._override_critical(from_selector, to_selector, Threshold(override["critical"]))
         except KeyError as err:
             raise Exception("Incomplete thresholds definition") from err
 
-    def _override_warning(self, from_agent: AgentID, to_agent: AgentID, value: Threshold) -> None:
+        # most specific overrides first; among equally specific ones, the one that comes later in config wins
+        self._selector_overrides.reverse()
+        self._selector_overrides.sort(key=lambda o: o[0].specificity + o[1].specificity, reverse=True)
+
+    @staticmethod
+    def _make_selector(override: Dict[str, Any], side: str, groups: Dict[str, List[AgentID]]) -> AgentSelector:
+        group_key = f"{side}_group"
+        if group_key in override:
+            group = groups[override[group_key]]
+            return AgentSelector(agent_ids=frozenset(AgentID(agent_id) for agent_id in group), specificity=1)
+        agent_id = AgentID(override[side])
+        if agent_id == ANY_AGENT:
+            return AgentSelector(agent_ids=None, specificity=0)
+        return AgentSelector(agent_ids=frozenset([agent_id]), specificity=2)
+
+    def _override_warning(self, from_agent: AgentSelector, to_agent: AgentSelector, value: Threshold) -> None:
         override = self._get_or_create_override(from_agent, to_agent)
         override.warning = value
 
-    def _override_critical(self, from_agent: AgentID, to_agent: AgentID, value: Threshold) -> None:
+    def _override_critical(self, from_agent: AgentSelector, to_agent: AgentSelector, value: Threshold) -> None:
         override = self._get_or_create_override(from_agent, to_agent)
         override.critical = value
 
-    def _get_or_create_override(self, from_agent: AgentID, to_agent: AgentID) -> ThresholdOverride:
-        overrides = self._overrides
-        if from_agent not in overrides:
-            overrides[from_agent] = dict()
-        if to_agent not in overrides[from_agent]:
-            overrides[from_agent][to_agent] = ThresholdOverride()
-        return overrides[from_agent][to_agent]
+    def _get_or_create_override(self, from_agent: AgentSelector, to_agent: AgentSelector) -> ThresholdOverride:
+        if from_agent.specificity == to_agent.specificity == 2:
+            # single agent pair override
+            overrides = self._overrides
+            from_agent_id, to_agent_id = next(iter(from_agent.agent_ids or [])), next(iter(to_agent.agent_ids or []))
+            if from_agent_id not in overrides:
+                overrides[from_agent_id] = dict()
+            if to_agent_id not in overrides[from_agent_id]:
+                overrides[from_agent_id][to_agent_id] = ThresholdOverride()
+                self._selector_overrides.append((from_agent, to_agent, overrides[from_agent_id][to_agent_id]))
+            return overrides[from_agent_id][to_agent_id]
+
+        for selectors_override in self._selector_overrides:
+            if selectors_override[0] == from_agent and selectors_override[1] == to_agent:
+                return selectors_override[2]
+        override = ThresholdOverride()
+        self._selector_overrides.append((from_agent, to_agent, override))
+        return override
 
     def _get_override_or_none(self, from_agent: AgentID, to_agent: AgentID) -> Optional[ThresholdOverride]:
         overrides = self._overrides
-        if from_agent not in overrides:
-            return None
-        if to_agent not in overrides[from_agent]:
-            return None
-        return overrides[from_agent][to_agent]
+        exact = overrides.get(from_agent, {}).get(to_agent)
+        if exact is not None and exact.warning is not None and exact.critical is not None:
+            return exact
+
+        # resolve each threshold separately from the most specific override that sets it
+        resolved = ThresholdOverride(exact.warning, exact.critical) if exact else ThresholdOverride()
+        for from_selector, to_selector, override in self._selector_overrides:
+            if not (from_selector.matches(from_agent) and to_selector.matches(to_agent)):
+                continue
+            if resolved.warning is None:
+                resolved.warning = override.warning
+            if resolved.critical is None:
+                resolved.critical = override.critical
+        return resolved
+
+    def _compile(self, agent_ids: np.ndarray) -> ThresholdMatrices:
+        n = len(agent_ids)
+        warning = np.full((n, n), self._default_warning, dtype=np.float64)
+        critical = np.full((n, n), self._default_critical, dtype=np.float64)
+
+        # apply from the least specific override, so that more specific ones overwrite it
+        for from_selector, to_selector, override in reversed(self._selector_overrides):
+            cells = np.ix_(from_selector.mask(agent_ids), to_selector.mask(agent_ids))
+            if override.warning is not None:
+                warning[cells] = override.warning
+            if override.critical is not None:
+                critical[cells] = override.critical
+
+        warning.flags.writeable = False
+        critical.flags.writeable = False
+        return ThresholdMatrices(warning=warning, critical=critical)
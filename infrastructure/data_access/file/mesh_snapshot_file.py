@@ -0,0 +1,130 @@
+import logging
+import mmap
+import os
+import pickle
+import struct
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from domain.cache.snapshot_store import MeshSnapshot
+from domain.model.mesh_results import MeshResults, MeshRow, Tasks, pack_columns, unpack_columns
+
+logger = logging.getLogger(__name__)
+
+
+class MeshSnapshotFile:
+    """
+    MeshSnapshotFile implements domain.cache.snapshot_store.SnapshotFile protocol.
+    Snapshot is written to a temporary file and atomically renamed, so readers never see partially written snapshot.
+    Loaded snapshot memory-maps the file read-only and the sample arrays are used in place, without copying.
+    File layout: header, pickled metadata (test id, agents, tasks, config), then 8-byte aligned offsets, timestamps
+    and metrics arrays, as made by pack_columns()
+    """
+
+    _MAGIC = b"SLAMESH2"  # format version in the last byte; SLAMESH1 didn't record the test id
+    _HEADER = struct.Struct("<8sQQQQ")  # magic, version, metadata length, number of columns, number of samples
+    _NUM_METRICS = 3
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._version = self.read_version()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def read_version(self) -> int:
+        """Version of the snapshot currently in the file; 0 if there is none"""
+
+        try:
+            with open(self._path, "rb") as file:
+                magic, version, *_ = self._HEADER.unpack(file.read(self._HEADER.size))
+        except (FileNotFoundError, struct.error):
+            return 0
+        return version if magic == self._MAGIC else 0
+
+    def save(self, snapshot: MeshSnapshot) -> None:
+        rows = snapshot.results.connection_matrix.rows
+        columns = [column for row in rows.values() for column in row.values()]
+        offsets, timestamps, metrics = pack_columns(columns)
+        metadata = pickle.dumps(
+            {
+                "rows": [
+                    (snapshot.results.participating_agents.get_by_id(agent_id), list(row.keys()))
+                    for agent_id, row in rows.items()
+                ],
+                "test_id": snapshot.test_id,
+                "tasks": snapshot.results.tasks.all(),
+                "config": snapshot.config,
+                "min_history_seconds": snapshot.min_history_seconds,
+                "update_time": snapshot.update_time,
+                "connections_with_full_history": snapshot.connections_with_full_history,
+            },
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        self._version += 1
+        header = self._HEADER.pack(self._MAGIC, self._version, len(metadata), len(columns), len(timestamps))
+
+        tmp_path = f"{self._path}.{os.getpid()}.tmp"
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as file:
+            file.write(header)
+            file.write(metadata)
+            file.write(_padding(len(header) + len(metadata)))
+            file.write(offsets.tobytes())
+            file.write(timestamps.tobytes())
+            file.write(np.ascontiguousarray(metrics, dtype=np.float64).tobytes())
+        os.replace(tmp_path, self._path)
+
+    def load(self) -> Optional[MeshSnapshot]:
+        try:
+            with open(self._path, "rb") as file:
+                # mapping outlives the file; it's unmapped once the last array using it is gone
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+        magic, version, metadata_len, num_columns, num_samples = self._HEADER.unpack_from(buffer)
+        if magic != self._MAGIC:
+            if magic[:-1] == self._MAGIC[:-1]:
+                raise Exception(
+                    f"Unsupported mesh snapshot file format {magic!r}, expected {self._MAGIC!r}: {self._path}"
+                )
+            raise Exception(f"Not a mesh snapshot file: {self._path}")
+        position = self._HEADER.size
+        metadata: Dict[str, Any] = pickle.loads(buffer[position : position + metadata_len])
+        position += metadata_len
+        position += len(_padding(position))
+        offsets = np.frombuffer(buffer, dtype=np.int64, count=num_columns + 1, offset=position)
+        position += offsets.nbytes
+        timestamps = np.frombuffer(buffer, dtype=np.int64, count=num_samples, offset=position)
+        position += timestamps.nbytes
+        metrics = np.frombuffer(buffer, dtype=np.float64, count=num_samples * self._NUM_METRICS, offset=position)
+        metrics = metrics.reshape(num_samples, self._NUM_METRICS)
+
+        column_ids = [agent_id for _, agent_ids in metadata["rows"] for agent_id in agent_ids]
+        columns = unpack_columns(column_ids, offsets, timestamps, metrics)
+        rows: List[MeshRow] = []
+        first_column = 0
+        for agent, agent_ids in metadata["rows"]:
+            rows.append(MeshRow(agent=agent, columns=columns[first_column : first_column + len(agent_ids)]))
+            first_column += len(agent_ids)
+        tasks = Tasks()
+        for task in metadata["tasks"]:
+            tasks.insert(task)
+
+        logger.debug("Loaded mesh cache snapshot version: %d from %s", version, self._path)
+        return MeshSnapshot(
+            test_id=metadata["test_id"],
+            results=MeshResults(rows=rows, tasks=tasks),
+            config=metadata["config"],
+            min_history_seconds=metadata["min_history_seconds"],
+            update_time=metadata["update_time"],
+            connections_with_full_history=metadata["connections_with_full_history"],
+        )
+
+
+def _padding(length: int) -> bytes:
+    """Padding that aligns the arrays following length bytes to 8 bytes"""
+
+    return bytes(-length % 8)
@@ -0,0 +1,90 @@
+import fcntl
+import logging
+import os
+import threading
+from typing import List, Optional, Tuple
+
+from domain.cache.snapshot_store import MeshSnapshot
+from domain.types import AgentID
+from infrastructure.data_access.file.mesh_snapshot_file import MeshSnapshotFile
+
+logger = logging.getLogger(__name__)
+
+
+class MmapSnapshotStore:
+    """
+    MmapSnapshotStore implements domain.cache.snapshot_store.SnapshotStore protocol with files, preferably on tmpfs
+    like /dev/shm, so that the snapshot lives in shared memory:
+    - leadership is an exclusive flock on "<path>.lock"; the OS releases it when the leader process exits
+    - snapshot is published as MeshSnapshotFile "<path>"; readers memory-map the file read-only
+      and the sample arrays are used in place, so every process shares the same physical pages
+    - requested connections are empty files in "<path>.requests" directory, named "<from agent>:<to agent>";
+      only connections between agents in the published mesh config are requested
+    """
+
+    def __init__(self, path: str) -> None:
+        self._file = MeshSnapshotFile(path)
+        self._requests_dir = path + ".requests"
+        os.makedirs(self._requests_dir, exist_ok=True)
+        self._lock_file: Optional[int] = None
+        self._load_lock = threading.Lock()
+        self._loaded_file: Optional[Tuple[int, int]] = None  # (inode, mtime) of the loaded snapshot file
+        self._loaded: Optional[MeshSnapshot] = None
+
+    def acquire_leadership(self) -> None:
+        lock_file = os.open(self._file.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(lock_file, fcntl.LOCK_EX)  # blocks until current leader exits
+        self._lock_file = lock_file  # keep the file open, to hold the lock for the process lifetime
+        self._file = MeshSnapshotFile(self._file.path)  # continue versioning after the previous leader
+
+    def publish(self, snapshot: MeshSnapshot) -> None:
+        self._file.save(snapshot)
+
+    def load(self) -> Optional[MeshSnapshot]:
+        try:
+            stat = os.stat(self._file.path)
+        except FileNotFoundError:
+            return None
+
+        file_id = (stat.st_ino, stat.st_mtime_ns)
+        if file_id == self._loaded_file:
+            return self._loaded
+        with self._load_lock:
+            if file_id != self._loaded_file:
+                try:
+                    self._loaded = self._file.load()
+                except Exception:
+                    logger.exception("Mesh cache snapshot load error")
+                self._loaded_file = file_id
+        return self._loaded
+
+    def request_connection(self, from_agent: AgentID, to_agent: AgentID) -> None:
+        # agent ids come from the page URL; only connections between agents of the test get a request file
+        if not self._is_known_connection(from_agent, to_agent):
+            logger.debug("Not requesting unknown connection %s:%s", from_agent, to_agent)
+            return
+        name = f"{from_agent}:{to_agent}"
+        os.close(os.open(os.path.join(self._requests_dir, name), os.O_WRONLY | os.O_CREAT, 0o600))
+
+    def take_requested_connections(self) -> List[Tuple[AgentID, AgentID]]:
+        connections: List[Tuple[AgentID, AgentID]] = []
+        for name in os.listdir(self._requests_dir):
+            try:
+                os.remove(os.path.join(self._requests_dir, name))
+            except FileNotFoundError:
+                continue
+            from_agent, separator, to_agent = name.partition(":")
+            if not separator or not self._is_known_connection(AgentID(from_agent), AgentID(to_agent)):
+                logger.debug("Ignoring request for unknown connection '%s'", name)
+                continue
+            connections.append((AgentID(from_agent), AgentID(to_agent)))
+        return connections
+
+    def _is_known_connection(self, from_agent: AgentID, to_agent: AgentID) -> bool:
+        """Both agents are in the mesh config of the latest snapshot"""
+
+        snapshot = self.load()
+        if snapshot is None:
+            return False
+        agent_ids = {agent.id for agent in snapshot.config.agents.all()}
+        return from_agent in agent_ids and to_agent in agent_ids
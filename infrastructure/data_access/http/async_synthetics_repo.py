@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Coroutine, Dict, List, Optional, Tuple, TypeVar
+
+import aiohttp
+
+from domain.model import MeshConfig, MeshResults
+from domain.types import AgentID, TaskID, TestID
+from infrastructure.data_access.http.response_decoder import HealthDecoder, decode_mesh_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncSyntheticsRepo:
+    """
+    AsyncSyntheticsRepo implements domain.Repo and domain.ConcurrentRepo protocols.
+    Requests are issued by asyncio event loop running in a dedicated thread, over a bounded pool of keep-alive
+    connections, so any number of requests can be in flight without holding a thread each.
+    Callers only block waiting for their own results; responses are decoded in the caller thread (or decoder process),
+    so that decoding large responses doesn't hold back the event loop
+    """
+
+    _API_PATH = "/synthetics/v202101beta1"
+
+    def __init__(
+        self,
+        email,
+        token: str,
+        synthetics_url: Optional[str] = None,
+        timeout: Tuple[float, float] = (30.0, 30.0),
+        max_connections: int = 10,
+        decode_processes: int = 0,
+    ) -> None:
+        synthetics_url = synthetics_url or "https://synthetics.api.kentik.com"
+        if "://" not in synthetics_url:
+            synthetics_url = "http://" + synthetics_url
+        self._base_url = synthetics_url.rstrip("/") + self._API_PATH
+        self._headers = {"X-CH-Auth-Email": email, "X-CH-Auth-API-Token": token}
+        connect_timeout, read_timeout = timeout
+        self._timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self._max_connections = max_connections
+        self._decoder = HealthDecoder(decode_processes)
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="synthetics-api-loop", daemon=True)
+        self._thread.start()
+        self._session = self._run(self._make_session())  # session must be created within the event loop
+
+    def get_mesh_config(self, test_id: TestID) -> MeshConfig:
+        test_body, agents_body = self._run(self._get_mesh_config(test_id))
+        return decode_mesh_config(test_body, agents_body)
+
+    def get_mesh_test_results(
+        self,
+        test_id: TestID,
+        history_length_seconds: int,
+        timeseries: bool = True,
+        agent_ids: Optional[List[AgentID]] = None,
+        task_ids: Optional[List[TaskID]] = None,
+    ) -> MeshResults:
+        body = self._run(self._get_mesh_test_results(test_id, history_length_seconds, timeseries, agent_ids, task_ids))
+        return self._decode_results(body)
+
+    def get_mesh_test_results_and_config(
+        self,
+        test_id: TestID,
+        history_length_seconds: int,
+        timeseries: bool = True,
+        agent_ids: Optional[List[AgentID]] = None,
+        task_ids: Optional[List[TaskID]] = None,
+    ) -> Tuple[MeshResults, MeshConfig]:
+        async def get_both() -> Tuple[bytes, Tuple[bytes, bytes]]:
+            return await asyncio.gather(
+                self._get_mesh_test_results(test_id, history_length_seconds, timeseries, agent_ids, task_ids),
+                self._get_mesh_config(test_id),
+            )
+
+        results_body, (test_body, agents_body) = self._run(get_both())
+        return self._decode_results(results_body), decode_mesh_config(test_body, agents_body)
+
+    def close(self) -> None:
+        self._run(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def _run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Run coroutine in the event loop thread and wait for its result"""
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _make_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(limit=self._max_connections)
+        return aiohttp.ClientSession(connector=connector, headers=self._headers, timeout=self._timeout)
+
+    async def _get_mesh_config(self, test_id: TestID) -> Tuple[bytes, bytes]:
+        try:
+            test_body, agents_body = await asyncio.gather(
+                self._request("GET", f"/tests/{test_id}"),
+                self._request("GET", "/agents"),
+            )
+            return test_body, agents_body
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise Exception(f"Failed to fetch config for test ID: {test_id}") from err
+
+    async def _get_mesh_test_results(
+        self,
+        test_id: TestID,
+        history_length_seconds: int,
+        timeseries: bool,
+        agent_ids: Optional[List[AgentID]],
+        task_ids: Optional[List[TaskID]],
+    ) -> bytes:
+        end = datetime.now(timezone.utc)
+        start = end - timedelta(seconds=history_length_seconds)
+        request = {
+            "ids": [test_id],
+            "agentIds": agent_ids or [],
+            "taskIds": task_ids or [],
+            "startTime": start.isoformat(),
+            "endTime": end.isoformat(),
+            "augment": timeseries,
+        }
+        try:
+            return await self._request("POST", "/health/tests", request)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise Exception(f"Failed to fetch results for test ID: {test_id}") from err
+
+    async def _request(self, method: str, path: str, json: Optional[Dict[str, Any]] = None) -> bytes:
+        async with self._session.request(method, self._base_url + path, json=json) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    def _decode_results(self, body: bytes) -> MeshResults:
+        rows, tasks = self._decoder.decode(body)
+        return MeshResults(rows=rows, tasks=tasks)
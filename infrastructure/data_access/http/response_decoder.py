@@ -0,0 +1,187 @@
+"""
+Decoding of raw Synthetics API response bodies straight into internal model,
+without the overhead of generated API client models
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from dateutil.parser import isoparse
+
+from domain.geo import Coordinates
+from domain.model import Agent, Agents, MeshColumn, MeshConfig, MeshRow, Task, Tasks
+from domain.model.mesh_results import pack_columns, to_timestamp_us, unpack_columns
+from domain.types import AgentID
+
+try:
+    # optional; considerably faster than standard json module for the large health responses
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class HealthDecoder:
+    """
+    HealthDecoder decodes get_health_for_tests response bodies, optionally in a pool of worker processes.
+    Decoding is CPU-bound; in worker processes it doesn't hold the GIL needed by the threads serving web requests.
+    Workers send the results back packed in a few numpy arrays, which is cheap to pickle
+    """
+
+    def __init__(self, processes: int = 0) -> None:
+        self._executor: Optional[ProcessPoolExecutor] = None
+        if processes > 0:
+            # "spawn" as forking a process that runs several threads is unsafe
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=processes, mp_context=context)
+
+    def decode(self, body: bytes) -> Tuple[List[MeshRow], Tasks]:
+        if self._executor is None:
+            return decode_health_response(body)
+        packed = self._executor.submit(decode_packed_health_response, body).result()
+        rows, tasks = unpack_health_response(packed)
+        log_num_connections(rows)
+        return rows, tasks
+
+
+@dataclass
+class PackedHealthResponse:
+    """Decoded health response in picklable form; mesh rows samples are packed with pack_columns()"""
+
+    rows: List[Tuple[Agent, List[AgentID]]]  # row agent, column agent ids
+    offsets: np.ndarray
+    timestamps: np.ndarray
+    metrics: np.ndarray
+    tasks: List[Task]
+
+
+def decode_packed_health_response(body: bytes) -> PackedHealthResponse:
+    """Decode raw get_health_for_tests response body into picklable form, see: unpack_health_response()"""
+
+    rows, tasks = _decode_health_response(body)
+    offsets, timestamps, metrics = pack_columns([column for row in rows for column in row.columns])
+    return PackedHealthResponse(
+        rows=[(row.agent, [column.agent_id for column in row.columns]) for row in rows],
+        offsets=offsets,
+        timestamps=timestamps,
+        metrics=metrics,
+        tasks=tasks.all(),
+    )
+
+
+def unpack_health_response(packed: PackedHealthResponse) -> Tuple[List[MeshRow], Tasks]:
+    column_ids = [agent_id for _, agent_ids in packed.rows for agent_id in agent_ids]
+    columns = unpack_columns(column_ids, packed.offsets, packed.timestamps, packed.metrics)
+    rows: List[MeshRow] = []
+    first_column = 0
+    for agent, agent_ids in packed.rows:
+        rows.append(MeshRow(agent=agent, columns=columns[first_column : first_column + len(agent_ids)]))
+        first_column += len(agent_ids)
+
+    tasks = Tasks()
+    for task in packed.tasks:
+        tasks.insert(task)
+    return rows, tasks
+
+
+def decode_mesh_config(test_body: bytes, agents_body: bytes) -> MeshConfig:
+    """Decode raw test_get and agents_list response bodies into internal model; only the test agents are decoded"""
+
+    settings = json_loads(test_body)["test"]["settings"]
+    update_period_seconds = int(settings["ping"]["period"])
+    agent_ids = set(settings.get("agentIds") or [])
+
+    agents = Agents()
+    for agent in json_loads(agents_body).get("agents") or []:
+        if agent["id"] in agent_ids:
+            agents.insert(
+                Agent(
+                    id=AgentID(agent["id"]),
+                    ip=agent.get("ip", ""),
+                    name=agent.get("name", ""),
+                    alias=agent.get("alias", ""),
+                    coords=Coordinates(agent.get("long", 0.0), agent.get("lat", 0.0)),
+                )
+            )
+    return MeshConfig(agents=agents, update_period_seconds=update_period_seconds)
+
+
+def decode_health_response(body: bytes) -> Tuple[List[MeshRow], Tasks]:
+    """Decode raw get_health_for_tests response body into internal model, without generated client models"""
+
+    rows, tasks = _decode_health_response(body)
+    log_num_connections(rows)
+    return rows, tasks
+
+
+def _decode_health_response(body: bytes) -> Tuple[List[MeshRow], Tasks]:
+    response = json_loads(body)
+    health = response.get("health") or []
+    if len(health) == 0:
+        return [], Tasks()
+
+    # we always request results for only one test, see: SyntheticsRepo._get_rows_tasks
+    return decode_mesh_rows(health[0].get("mesh") or []), decode_tasks(health[0].get("tasks") or [])
+
+
+def log_num_connections(rows: List[MeshRow]) -> None:
+    num_connections = sum(1 for row in rows for col in row.columns if col.has_data())
+    logger.debug("Received test results for %d connections", num_connections)
+
+
+def decode_mesh_rows(mesh: List[Dict[str, Any]]) -> List[MeshRow]:
+    rows: List[MeshRow] = []
+    for r in mesh:
+        row = MeshRow(
+            agent=Agent(id=AgentID(r["id"]), name=r.get("name", ""), alias=r.get("alias", "")),
+            columns=[decode_mesh_column(c) for c in r.get("columns") or []],
+        )
+        rows.append(row)
+    return rows
+
+
+def decode_mesh_column(column: Dict[str, Any]) -> MeshColumn:
+    health = column.get("health") or []
+    # metric values come as strings; numpy converts the whole list at once
+    jitter = np.array([h["jitter"]["value"] for h in health], dtype=np.float64)
+    latency = np.array([h["latency"]["value"] for h in health], dtype=np.float64)
+    packet_loss = np.array([h["packetLoss"]["value"] for h in health], dtype=np.float64)
+    return MeshColumn.from_arrays(
+        agent_id=AgentID(column["id"]),
+        timestamps=decode_timestamps([h["time"] for h in health]),
+        jitter_millisec=scale_us_to_ms(jitter),
+        latency_millisec=scale_us_to_ms(latency),
+        packet_loss_percent=scale_to_percents(packet_loss),
+    )
+
+
+def decode_timestamps(times: List[str]) -> np.ndarray:
+    """Convert RFC 3339 timestamps to UTC epoch microseconds"""
+
+    if all(t.endswith("Z") for t in times):
+        # numpy parses UTC timestamps in bulk, but doesn't accept timezone designator
+        return np.array([t[:-1] for t in times], dtype="datetime64[us]").astype(np.int64)
+    return np.fromiter((to_timestamp_us(isoparse(t)) for t in times), dtype=np.int64, count=len(times))
+
+
+def decode_tasks(tasks_health: List[Dict[str, Any]]) -> Tasks:
+    tasks = Tasks()
+    for task_health in tasks_health:
+        task = task_health["task"]
+        ping = task.get("ping") or {}
+        tasks.insert(Task(id=task["id"], target_ip=ping.get("target", ""), period_seconds=int(ping.get("period", 0))))
+    return tasks
+
+
+def scale_us_to_ms(val: np.ndarray) -> np.ndarray:
+    return val / 1000.0
+
+
+def scale_to_percents(val: np.ndarray) -> np.ndarray:
+    # scale 0..1 -> 0..100
+    return val * 100.0
@@ -2,9 +2,11 @@ import logging
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Tuple
 
+import numpy as np
+
 from domain.geo import Coordinates
-from domain.metric import MetricValue
-from domain.model import Agent, Agents, HealthItem, MeshColumn, MeshConfig, MeshResults, MeshRow, Task, Tasks
+from domain.model import Agent, Agents, MeshColumn, MeshConfig, MeshResults, MeshRow, Task, Tasks
+from domain.model.mesh_results import to_timestamp_us
 from domain.types import AgentID, TaskID, TestID
 
 # the below "disable=E0611" is needed as we don't commit the generated code into git repo and thus CI linter complains
@@ -19,6 +21,12 @@ from generated.synthetics_http_client.synthetics.model.v202101beta1_test_health
 
 # pylint: enable=E0611
 from infrastructure.data_access.http.api_client import KentikAPI
+from infrastructure.data_access.http.response_decoder import (
+    HealthDecoder,
+    decode_mesh_config,
+    scale_to_percents,
+    scale_us_to_ms,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -39,15 +47,32 @@ class SyntheticsRepo:
     """SyntheticsRepo implements domain.Repo protocol"""
 
     def __init__(
-        self, email, token: str, synthetics_url: Optional[str] = None, timeout: Tuple[float, float] = (30.0, 30.0)
+        self,
+        email,
+        token: str,
+        synthetics_url: Optional[str] = None,
+        timeout: Tuple[float, float] = (30.0, 30.0),
+        fast_decode: bool = False,
+        decode_processes: int = 0,
     ) -> None:
         if synthetics_url:
             self._api_client = KentikAPI(email=email, token=token, synthetics_url=synthetics_url)
         else:
             self._api_client = KentikAPI(email=email, token=token)
         self._timeout = timeout
+        self._fast_decode = fast_decode
+        self._decoder: Optional[HealthDecoder] = None
+        if self._fast_decode:
+            # decoder worker processes are only used by fast decoding
+            self._decoder = HealthDecoder(decode_processes)
 
     def get_mesh_config(self, test_id: TestID) -> MeshConfig:
+        if self._fast_decode:
+            # agents_list returns all the agents in the account; only the test agents are decoded
+            raw_test_resp = self._api_client.synthetics_admin_service.test_get(test_id, _preload_content=False)
+            raw_agents_resp = self._api_client.synthetics_admin_service.agents_list(_preload_content=False)
+            return decode_mesh_config(raw_test_resp.data, raw_agents_resp.data)
+
         test_resp = self._api_client.synthetics_admin_service.test_get(test_id)
         update_period_seconds = test_resp.test.settings.ping.period
         logger.debug("Update period for TestID %s is %ds", test_id, update_period_seconds)
@@ -90,6 +115,13 @@ class SyntheticsRepo:
             ids=[test_id], agent_ids=agent_ids, task_ids=task_ids, start_time=start, end_time=end, augment=augment
         )
 
+        if self._decoder is not None:
+            # skip generated client models; decode raw response body straight into internal model
+            raw_response = self._api_client.synthetics_data_service.get_health_for_tests(
+                request, _request_timeout=self._timeout, _preload_content=False
+            )
+            return self._decoder.decode(raw_response.data)
+
         response = self._api_client.synthetics_data_service.get_health_for_tests(
             request, _request_timeout=self._timeout
         )
@@ -120,24 +152,24 @@ def transform_to_internal_mesh_rows(health: V202101beta1TestHealth) -> List[Mesh
 def transform_to_internal_mesh_columns(input_columns: List[V202101beta1MeshColumn]) -> List[MeshColumn]:
     columns: List[MeshColumn] = []
     for input_column in input_columns:
-        column = MeshColumn(
-            agent_id=AgentID(input_column.id), health=transform_to_internal_health_items(input_column.health)
-        )
+        column = transform_to_internal_mesh_column(AgentID(input_column.id), input_column.health)
         columns.append(column)
     return columns
 
 
-def transform_to_internal_health_items(input_health: List[V202101beta1MeshMetrics]) -> List[HealthItem]:
-    health: List[HealthItem] = []
-    for h in input_health:
-        item = HealthItem(
-            jitter_millisec=scale_us_to_ms(h.jitter.value),
-            latency_millisec=scale_us_to_ms(h.latency.value),
-            packet_loss_percent=scale_to_percents(h.packet_loss.value),
-            time=h.time,
-        )
-        health.append(item)
-    return health
+def transform_to_internal_mesh_column(agent_id: AgentID, input_health: List[V202101beta1MeshMetrics]) -> MeshColumn:
+    n = len(input_health)
+    timestamps = np.fromiter((to_timestamp_us(h.time) for h in input_health), dtype=np.int64, count=n)
+    jitter = np.fromiter((float(h.jitter.value) for h in input_health), dtype=np.float64, count=n)
+    latency = np.fromiter((float(h.latency.value) for h in input_health), dtype=np.float64, count=n)
+    packet_loss = np.fromiter((float(h.packet_loss.value) for h in input_health), dtype=np.float64, count=n)
+    return MeshColumn.from_arrays(
+        agent_id=agent_id,
+        timestamps=timestamps,
+        jitter_millisec=scale_us_to_ms(jitter),
+        latency_millisec=scale_us_to_ms(latency),
+        packet_loss_percent=scale_to_percents(packet_loss),
+    )
 
 
 def transform_to_internal_tasks(data: V202101beta1TestHealth) -> Tasks:
@@ -147,15 +179,6 @@ def transform_to_internal_tasks(data: V202101beta1TestHealth) -> Tasks:
     return tasks
 
 
-def scale_us_to_ms(val: str) -> MetricValue:
-    return MetricValue(float(val) / 1000.0)
-
-
-def scale_to_percents(val: str) -> MetricValue:
-    # scale 0..1 -> 0..100
-    return MetricValue(float(val) * 100.0)
-
-
 def make_internal_agents(agents, agent_ids) -> Agents:
     result = Agents()
     for agent in agents:
@@ -0,0 +1,124 @@
+"""
+Conditional and compressed HTTP responses: the large JSON bodies Dash sends, eg. matrix layout,
+are compressed once and served precompressed to all the clients receiving the same body
+"""
+
+import gzip
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import flask
+
+try:
+    # optional; better compression ratio than gzip at similar speed for the large JSON responses
+    import brotli
+except ImportError:
+    brotli = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/javascript", "text/javascript", "text/css", "text/html"}
+MIN_SIZE_BYTES = 1024  # smaller responses don't get noticeably smaller
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # higher qualities are considerably slower to compress
+
+
+def _gzip(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+class ResponseCompression:
+    """
+    Flask response hook that:
+    - answers GET requests with 304 Not Modified if the client already holds the response body, as told by its ETag
+    - compresses response body with brotli or gzip, as accepted by the client
+    Compressed bodies are cached by content digest, so the body served to many clients is compressed only once
+    """
+
+    def __init__(self, cache_size_bytes: int = 64 * 1024 * 1024) -> None:
+        self._encoders: Dict[str, Callable[[bytes], bytes]] = {"gzip": _gzip}
+        if brotli is not None:
+            self._encoders["br"] = _brotli
+        self._cache_size_bytes = cache_size_bytes
+        self._cache: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def encodings(self) -> List[str]:
+        """Supported content encodings, in order of preference"""
+
+        return sorted(self._encoders, key=lambda encoding: encoding != "br")
+
+    def install(self, server: flask.Flask) -> None:
+        server.after_request(self.process)
+
+    def process(self, response: flask.Response) -> flask.Response:
+        if not self._is_compressible(response):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        data = response.get_data()
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        if flask.request.method == "GET" and "ETag" not in response.headers:
+            # weak, as the same ETag is used for all content encodings of the body
+            response.set_etag(digest.hex(), weak=True)
+            if flask.request.if_none_match.contains_weak(digest.hex()):
+                response.status_code = 304
+                response.set_data(b"")
+                return response
+
+        if len(data) < MIN_SIZE_BYTES:
+            return response
+        encoding = self._select_encoding()
+        if encoding is None:
+            return response
+
+        response.set_data(self._compress(encoding, digest, data))
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def _is_compressible(self, response: flask.Response) -> bool:
+        return (
+            response.status_code == 200
+            and response.mimetype in COMPRESSIBLE_MIMETYPES
+            and not response.direct_passthrough  # eg. static files, served straight from disk
+            and not response.is_streamed
+            and "Content-Encoding" not in response.headers
+        )
+
+    def _select_encoding(self) -> Optional[str]:
+        accepted = flask.request.accept_encodings
+        for encoding in self.encodings:
+            if accepted[encoding] > 0:
+                return encoding
+        return None
+
+    def _compress(self, encoding: str, digest: bytes, data: bytes) -> bytes:
+        key = (encoding, digest)
+        with self._lock:
+            compressed = self._cache.get(key)
+            if compressed is not None:
+                self._cache.move_to_end(key)
+                return compressed
+
+        # compressed outside the lock; concurrent requests for the same body may compress it more than once
+        compressed = self._encoders[encoding](data)
+        logger.debug("Response compressed with %s: %d -> %d bytes", encoding, len(data), len(compressed))
+        if len(compressed) > self._cache_size_bytes:
+            return compressed
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = compressed
+                self._cached_bytes += len(compressed)
+            while self._cached_bytes > self._cache_size_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+        return compressed
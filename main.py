@@ -1,32 +1,51 @@
 import logging
 import os
 import sys
-from typing import Tuple
+import threading
+from typing import Callable, Optional, Tuple, Union
 from urllib.parse import quote, unquote
 
 import dash
 import flask
 from dash import dcc, html
-from dash.dependencies import ClientsideFunction, Input, Output
+from dash.dependencies import ClientsideFunction, Input, Output, State
 
 import routing
 from routing import Route
 
+from domain.batching_repo import BatchingRepo
+from domain.cache.caching_repo_background_refresh import CachingRepoBackgroundRefresh
+from domain.cache.caching_repo_deferred import CachingRepoDeferred
 from domain.cache.caching_repo_request_driven import CachingRepoRequestDriven
+from domain.cache.caching_repo_shared import CachingRepoShared
+from domain.cache.refresh_mode import RefreshMode
+from domain.cache.snapshot_persister import SnapshotPersister, load_snapshot
+from domain.cache.snapshot_store import MeshSnapshot
 from domain.metric import MetricType
+from domain.repo import Repo
+from domain.sharding_repo import ShardingRepo
 from infrastructure.config import ConfigYAML
-from infrastructure.data_access.http.synthetics_repo import SyntheticsRepo
+from infrastructure.data_access.file.mesh_snapshot_file import MeshSnapshotFile
+from infrastructure.data_access.file.mmap_snapshot_store import MmapSnapshotStore
+from infrastructure.web.response_compression import ResponseCompression
 from presentation.http_error_view import HTTPErrorView
 from presentation.index_view import IndexView
+from presentation.layout_cache import FrozenLayout
 from presentation.matrix_view import MatrixView
 from presentation.time_series_view import TimeSeriesView
+from presentation.warming_up_view import WarmingUpView
 
 FORMAT = "[%(asctime)-15s] [%(process)d] [%(levelname)s]  %(message)s"
 logger = logging.getLogger(__name__)
 
 
 class WebApp:
-    def __init__(self) -> None:
+    """
+    WebApp is made before the worker processes are forked, when preloaded (gunicorn preload_app), or in each of them.
+    Background threads don't survive fork, so they are started separately, by start()
+    """
+
+    def __init__(self, preload: bool = False) -> None:
         try:
             # app configuration
             config = ConfigYAML("data/config.yaml")
@@ -38,14 +57,28 @@ class WebApp:
             logging.basicConfig(level=config.logging_level, format=FORMAT)
 
             # data access
-            repo = SyntheticsRepo(email, token, api_server_url, config.timeout)
-            self._cached_repo = CachingRepoRequestDriven(
-                repo,
-                config.test_id,
-                config.data_request_interval_periods,
-                config.data_history_length_periods,
-                config.data_min_periods,
-            )
+            snapshot: Optional[MeshSnapshot] = None
+            if config.data_snapshot_path:
+                snapshot = load_snapshot(MeshSnapshotFile(config.data_snapshot_path))
+            if preload:
+                preload_api_client(config)
+
+            self._cached_repo: Union[CachingRepoShared, CachingRepoDeferred]
+            if config.data_shared_cache_path:
+                # only the leader process fetches the data, so it keeps the cache up to date in background
+                make_leader_cache = make_cache_factory(
+                    config, email, token, api_server_url, RefreshMode.BACKGROUND, snapshot
+                )
+                store = MmapSnapshotStore(config.data_shared_cache_path)
+                self._cached_repo = CachingRepoShared(store, config.test_id, make_leader_cache)
+            else:
+                # cache is made in background, so that slow or unavailable API doesn't block WebApp startup
+                make_cache = make_cache_factory(
+                    config, email, token, api_server_url, config.data_refresh_mode, snapshot
+                )
+                self._cached_repo = CachingRepoDeferred(make_cache)
+            self._started_pid: Optional[int] = None
+            self._start_lock = threading.Lock()
 
             # routing
             self._routes = {
@@ -68,6 +101,11 @@ class WebApp:
                 assets_folder="data/assets",
             )
             self._install_client_side_event_handlers(app)
+            self._install_health_endpoints(app.server)
+            self._install_matrix_updates_endpoint(app.server)
+            app.server.before_request(self.start)  # in case start() wasn't called in this process
+            if config.http_compression:
+                ResponseCompression().install(app.server)
             app.layout = IndexView.make_layout()
             self._app = app
 
@@ -75,10 +113,20 @@ class WebApp:
             logger.exception("WebApp initialization failure")
             sys.exit(1)
 
+    def start(self) -> None:
+        """Start background threads, once per process; must be called in the process that serves the pages"""
+
+        with self._start_lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+        self._cached_repo.start()
+
     def get_production_server(self) -> flask.Flask:
         return self._app.server
 
     def run_development_server(self) -> None:
+        self.start()
         self._app.run_server(debug=True)
 
     def _redirect_to_default_layout(self, _: str) -> dcc.Location:
@@ -90,19 +138,70 @@ class WebApp:
     def _make_404_layout(self, _: str) -> html.Div:
         return HTTPErrorView.make_layout(404)
 
-    def _make_matrix_layout(self, path: str) -> html.Div:
+    def _make_matrix_layout(self, path: str) -> Union[html.Div, FrozenLayout]:
+        if not self._is_ready():
+            return WarmingUpView.make_layout()
         metric = routing.decode_matrix_path(path)
         results = self._cached_repo.get_mesh_results_all_connections()
         config = self._cached_repo.get_mesh_config()
         data_history_seconds = self._cached_repo.min_history_seconds
-        return self._matrix_view.make_layout(results, config, data_history_seconds, metric)
+        data_update_time = self._cached_repo.data_update_time
+        return self._matrix_view.make_layout(results, config, data_history_seconds, metric, data_update_time)
 
     def _make_time_series_layout(self, path: str) -> html.Div:
+        if not self._is_ready():
+            return WarmingUpView.make_layout()
         from_agent, to_agent = routing.decode_time_series_path(path)
         results = self._cached_repo.get_mesh_results_single_connection(from_agent, to_agent)
         config = self._cached_repo.get_mesh_config()
         return self._time_series_view.make_layout(from_agent, to_agent, results, config)
 
+    def _is_ready(self) -> bool:
+        """Ready to serve pages once the cache has got data"""
+
+        return self._cached_repo.data_age_seconds is not None
+
+    def _healthz(self) -> flask.Response:
+        """Liveness: the process serves requests"""
+
+        return flask.jsonify(status="ok")
+
+    def _readyz(self) -> Tuple[flask.Response, int]:
+        """Readiness: the cache has data to serve, so traffic can be routed here"""
+
+        data_age_seconds = self._cached_repo.data_age_seconds
+        ready = data_age_seconds is not None
+        return flask.jsonify(ready=ready, data_age_seconds=data_age_seconds), 200 if ready else 503
+
+    def _matrix_updates(self) -> Tuple[flask.Response, int]:
+        """Matrix changes since the data version the page shows; auto-refresh uses them to update the page in place"""
+
+        try:
+            metric = MetricType(flask.request.args["metric"])
+            since_version = flask.request.args["version"]
+        except (KeyError, ValueError):
+            return flask.jsonify(error="metric and version expected"), 400
+
+        if not self._is_ready():
+            return flask.jsonify(reload=True), 200
+        results = self._cached_repo.get_mesh_results_all_connections()
+        if results.connection_matrix.num_connections_with_data() == 0:
+            return flask.jsonify(reload=True), 200  # page is to show no data message instead of the matrix
+        config = self._cached_repo.get_mesh_config()
+        data_update_time = self._cached_repo.data_update_time
+        response = flask.jsonify(
+            self._matrix_view.make_update(results, config, metric, since_version, data_update_time)
+        )
+        response.cache_control.no_cache = True  # revalidate with ETag on every auto-refresh; see ResponseCompression
+        return response, 200
+
+    def _install_health_endpoints(self, server: flask.Flask) -> None:
+        server.add_url_rule("/healthz", "healthz", self._healthz)
+        server.add_url_rule("/readyz", "readyz", self._readyz)
+
+    def _install_matrix_updates_endpoint(self, server: flask.Flask) -> None:
+        server.add_url_rule(MatrixView.UPDATES_PATH, "matrix_updates", self._matrix_updates)
+
     def _install_client_side_event_handlers(self, app: dash.Dash) -> None:
         # all views - handle path change
         @app.callback(Output(IndexView.PAGE_CONTENT, "children"), [Input(IndexView.URL, "pathname")])
@@ -123,6 +222,17 @@ class WebApp:
             path = quote(routing.encode_matrix_path(metric))
             return dcc.Location(id="MATRIX", pathname=path, refresh=True)
 
+        # warming up view - reload the page once the data is there
+        @app.callback(
+            Output(WarmingUpView.REDIRECT, "children"),
+            [Input(WarmingUpView.CHECK_INTERVAL, "n_intervals")],
+            [State(IndexView.URL, "pathname")],
+        )
+        def reload_when_ready(_: int, pathname: str):
+            if not self._is_ready():
+                return dash.no_update
+            return dcc.Location(id="WARMED_UP", pathname=pathname, refresh=True)
+
         # matrix view - handle auto-refresh checkbox; will call client-side JavaScript function "auto_refresh"
         app.clientside_callback(
             ClientsideFunction(namespace="clientside", function_name="auto_refresh"),
@@ -130,6 +240,121 @@ class WebApp:
             [Input(MatrixView.AUTO_REFRESH_CHECKBOX, "value")],
         )
 
+        # matrix view, heatmap renderer - draw the heatmap from compact data; will call client-side JavaScript function
+        app.clientside_callback(
+            ClientsideFunction(namespace="clientside", function_name="matrix_heatmap_figure"),
+            Output(MatrixView.HEATMAP, "figure"),
+            [Input(MatrixView.HEATMAP_DATA, "data")],
+        )
+
+        # matrix view, heatmap renderer - handle cell click; will call client-side JavaScript function
+        app.clientside_callback(
+            ClientsideFunction(namespace="clientside", function_name="matrix_heatmap_click"),
+            Output(IndexView.MATRIX_REDIRECT, "title"),
+            [Input(MatrixView.HEATMAP, "clickData")],
+            [State(MatrixView.HEATMAP_DATA, "data")],
+        )
+
+
+def make_repo(config: ConfigYAML, email: str, token: str, api_server_url: Optional[str]) -> Repo:
+    # API clients are imported here, as they are slow to import; this runs in background, not to delay WebApp startup
+    repo: Repo
+    if config.async_api_client:
+        from infrastructure.data_access.http.async_synthetics_repo import AsyncSyntheticsRepo
+
+        repo = AsyncSyntheticsRepo(
+            email,
+            token,
+            api_server_url,
+            config.timeout,
+            config.api_max_connections,
+            config.data_decode_processes,
+        )
+    else:
+        from infrastructure.data_access.http.synthetics_repo import SyntheticsRepo
+
+        repo = SyntheticsRepo(
+            email,
+            token,
+            api_server_url,
+            config.timeout,
+            config.data_fast_decode,
+            config.data_decode_processes,
+        )
+    if config.data_shard_size > 0:
+        repo = ShardingRepo(repo, config.data_shard_size, config.data_shard_concurrency)
+    if config.data_batch_window_seconds > 0:
+        repo = BatchingRepo(repo, config.data_batch_window_seconds)
+    return repo
+
+
+def preload_api_client(config: ConfigYAML) -> None:
+    """Import API client before forking the workers, so that they share imported modules"""
+
+    try:
+        if config.async_api_client:
+            import infrastructure.data_access.http.async_synthetics_repo  # noqa: F401
+        else:
+            import infrastructure.data_access.http.synthetics_repo  # noqa: F401
+    except ImportError:
+        logger.exception("API client preload failure")
+
+
+def make_cache_factory(
+    config: ConfigYAML,
+    email: str,
+    token: str,
+    api_server_url: Optional[str],
+    refresh_mode: RefreshMode,
+    snapshot: Optional[MeshSnapshot] = None,
+) -> Callable[[], CachingRepoRequestDriven]:
+    """
+    Make the cache setup function, that is retried until it succeeds. The repo is made on the first call and reused
+    by the retries, as it holds API client resources, eg. AsyncSyntheticsRepo event loop thread and HTTP session
+    """
+
+    repo: Optional[Repo] = None
+
+    def make_cache() -> CachingRepoRequestDriven:
+        nonlocal repo
+        if repo is None:
+            repo = make_repo(config, email, token, api_server_url)
+        return make_caching_repo(repo, config, refresh_mode, snapshot)
+
+    return make_cache
+
+
+def make_caching_repo(
+    repo: Repo, config: ConfigYAML, refresh_mode: RefreshMode, snapshot: Optional[MeshSnapshot] = None
+) -> CachingRepoRequestDriven:
+    cache: CachingRepoRequestDriven
+    if refresh_mode == RefreshMode.BACKGROUND:
+        cache = CachingRepoBackgroundRefresh(
+            repo,
+            config.test_id,
+            config.data_request_interval_periods,
+            config.data_history_length_periods,
+            config.data_min_periods,
+            config.data_config_refresh_periods,
+            config.api_quota_requests_per_hour,
+            config.data_max_stale_periods,
+            snapshot,
+        )
+    else:
+        cache = CachingRepoRequestDriven(
+            repo,
+            config.test_id,
+            config.data_request_interval_periods,
+            config.data_history_length_periods,
+            config.data_min_periods,
+            config.data_config_refresh_periods,
+            config.api_quota_requests_per_hour,
+            snapshot,
+        )
+    if config.data_snapshot_path:
+        SnapshotPersister(cache, MeshSnapshotFile(config.data_snapshot_path), config.data_snapshot_save_periods)
+    return cache
+
 
 def get_auth_email_token() -> Tuple[str, str]:
     try:
@@ -138,10 +363,25 @@ def get_auth_email_token() -> Tuple[str, str]:
         raise Exception(f"{err} environment variable is missing")
 
 
+_web_app: Optional[WebApp] = None
+
+
 # Run production server: gunicorn --workers=1 'main:run()'
-def run() -> flask.Flask:
-    app = WebApp()
-    return app.get_production_server()
+# With preload, eg. gunicorn --preload --workers=4 'main:run(preload=True)', WebApp is made once, before forking the
+# workers; workers start it in post_worker_init hook (see: data/gunicorn.conf.py), or on the first request at the latest
+def run(preload: bool = False) -> flask.Flask:
+    global _web_app
+    _web_app = WebApp(preload)
+    if not preload:
+        _web_app.start()
+    return _web_app.get_production_server()
+
+
+def start() -> None:
+    """Start WebApp made by run() in current process, eg. in a worker forked after preload"""
+
+    if _web_app:
+        _web_app.start()
 
 
 # Run development server: python main.py
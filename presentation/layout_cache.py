@@ -0,0 +1,61 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from dash.development.base_component import Component
+
+logger = logging.getLogger(__name__)
+
+# Dash component tree converted to plain dicts and lists, the way it is sent to the browser
+FrozenLayout = Dict[str, Any]
+
+
+def freeze(component: Any) -> Any:
+    """
+    Convert Dash component tree to plain dicts and lists. Such layout is serialized by the JSON encoder in one pass,
+    without calling back into Python for every component, and can be shared between requests as it's never modified.
+    Already frozen parts of the tree are reused as they are
+    """
+
+    if isinstance(component, Component):
+        as_json = component.to_plotly_json()
+        as_json["props"] = {name: freeze(value) for name, value in as_json["props"].items()}
+        return as_json
+    if isinstance(component, (list, tuple)):
+        return [freeze(child) for child in component]
+    return component
+
+
+class LayoutCache:
+    """
+    Frozen layouts memoized per data version: each layout is built once per version of the data it presents,
+    and served to all the viewers until the data changes. Concurrent requests for the same layout wait for it to be
+    built once. Layouts of older data versions are dropped as soon as a newer version is seen
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version = -1
+        self._layouts: Dict[Hashable, Tuple[Any, Any]] = {}
+
+    def get(self, version: int, key: Hashable, source: Any, build: Callable[[], Any]) -> Any:
+        """
+        Return frozen layout for data version and key, building it if needed.
+        source is the object the layout is built from besides the data, eg. mesh config;
+        the layout is rebuilt when a different source object is passed
+        """
+
+        if version < self._version:
+            # request that picked up the data before an update; not worth caching
+            return freeze(build())
+        with self._lock:
+            if version > self._version:
+                self._layouts.clear()
+                self._version = version
+            cached = self._layouts.get(key)
+            if cached is not None and cached[0] is source:
+                return cached[1]
+            layout = freeze(build())
+            self._layouts[key] = (source, layout)
+            logger.debug("Layout built for data version: %d, key: %s", version, key)
+            return layout
@@ -0,0 +1,110 @@
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from domain.metric import MetricType
+from domain.model import MeshConfig, MeshResults
+from domain.model.mesh_results import LatestMeasurements, from_timestamp_us
+from domain.types import AgentID
+from presentation.layout_cache import LayoutCache
+
+
+class MatrixUpdates:
+    """
+    Changes of the matrix between data versions, so that matrix views can be updated in place instead of reloaded.
+    Data version identifies the content (agents order and latest measurement timestamps) rather than the cache update,
+    so it's the same in all the processes serving the same data, eg. gunicorn workers sharing the data cache.
+    Recent data versions are kept to diff against; a view at unknown data version gets all the cells.
+    A view with different agents gets a reload request, as the matrix layout doesn't match anymore.
+    Each diff is computed once per cache update and shared by all the views at the same data version
+    """
+
+    HISTORY_LENGTH = 8  # number of recent data versions to diff against
+
+    def __init__(self, classify: Callable[[LatestMeasurements, MetricType], np.ndarray]) -> None:
+        self._classify = classify
+        self._lock = threading.Lock()
+        self._history: "OrderedDict[str, LatestMeasurements]" = OrderedDict()
+        self._current: Optional[Tuple[int, MeshConfig, str, LatestMeasurements]] = None
+        self._diffs = LayoutCache()
+
+    def data_version(self, results: MeshResults, config: MeshConfig) -> Tuple[str, LatestMeasurements]:
+        """Data version of results, and their latest measurements laid out in matrix agents order"""
+
+        with self._lock:
+            current = self._current
+        if current is not None and current[0] == results.version and current[1] is config:
+            return current[2], current[3]
+
+        agent_ids = [agent.id for agent in config.agents.all()]
+        latest = results.connection_matrix.latest.select(agent_ids)
+        version = f"{_agents_version(agent_ids)}-{zlib.crc32(latest.timestamps.tobytes()):08x}"
+        with self._lock:
+            self._current = (results.version, config, version, latest)
+            self._history[version] = latest
+            self._history.move_to_end(version)
+            while len(self._history) > self.HISTORY_LENGTH:
+                self._history.popitem(last=False)
+        return version, latest
+
+    def make_update(
+        self, results: MeshResults, config: MeshConfig, metric: MetricType, since_version: str
+    ) -> Dict[str, Any]:
+        """
+        Cells changed since given data version, as compact arrays:
+        rows, cols: cell positions; states: ConnectionState codes for the metric;
+        values: metric values by metric name, None if not available; timestamps: UTC epoch milliseconds, None if no data
+        """
+
+        version, latest = self.data_version(results, config)
+        if since_version == version:
+            return {"version": version, "reload": False}
+        if since_version.split("-")[0] != version.split("-")[0]:
+            return {"version": version, "reload": True}
+
+        with self._lock:
+            previous = self._history.get(since_version)
+        base_version = since_version if previous is not None else None
+        cells = self._diffs.get(
+            results.version, (base_version, metric), config, lambda: self._make_cells(latest, previous, metric)
+        )
+        return {"version": version, "reload": False, "cells": cells}
+
+    def _make_cells(
+        self, latest: LatestMeasurements, previous: Optional[LatestMeasurements], metric: MetricType
+    ) -> Dict[str, Any]:
+        if previous is None:
+            changed = np.ones(latest.timestamps.shape, dtype=bool)
+        else:
+            changed = latest.timestamps != previous.timestamps
+        np.fill_diagonal(changed, False)
+        rows, cols = np.nonzero(changed)
+
+        has_data = latest.has_data[rows, cols]
+        states = self._classify(latest, metric)[rows, cols]
+        timestamps = latest.timestamps[rows, cols]
+        return {
+            "rows": rows.tolist(),
+            "cols": cols.tolist(),
+            "states": states.tolist(),
+            "values": {m.value: _to_json_list(np.round(latest.values(m)[rows, cols], 2)) for m in MetricType},
+            "timestamps": [int(t) // 1000 if d else None for t, d in zip(timestamps, has_data)],
+            "timestamp_texts": [
+                from_timestamp_us(int(t)).strftime("%x %X %Z") if d else None for t, d in zip(timestamps, has_data)
+            ],
+        }
+
+
+def _agents_version(agent_ids: List[AgentID]) -> str:
+    return f"{zlib.crc32(chr(0).join(agent_ids).encode()):08x}"
+
+
+def _to_json_list(values: np.ndarray) -> List[Any]:
+    """List of values, with None in place of NaN"""
+
+    cells = values.astype(object)
+    cells[np.isnan(values)] = None
+    return cells.tolist()
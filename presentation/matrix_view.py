@@ -1,21 +1,25 @@
 import math
 from dataclasses import dataclass, field
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
 from urllib.parse import quote
 
+import numpy as np
 from dash import dcc, html
 from dash.html.Div import Div
 
 import routing
 
-from domain.config import Config
+from domain.config import Config, MatrixRenderer
 from domain.config.thresholds import Thresholds
-from domain.geo import calc_distance
+from domain.connection_state import ConnectionState, classify
 from domain.metric import MetricType, MetricValue
 from domain.model import MeshResults
 from domain.model.mesh_config import MeshConfig
-from domain.model.mesh_results import Agent, HealthItem
-from domain.types import MatrixCellColor, Threshold
+from domain.model.mesh_results import Agent, HealthItem, LatestMeasurements, from_timestamp_us
+from domain.types import MatrixCellColor
+from presentation.layout_cache import FrozenLayout, LayoutCache, freeze
+from presentation.matrix_updates import MatrixUpdates
 
 
 @dataclass
@@ -53,26 +57,66 @@ def format_health(metric_type: MetricType, health: Optional[HealthItem], include
     if not health:
         return nan
 
-    metric = health.get_metric(metric_type)
-    if math.isnan(metric.value):
+    return format_metric_value(metric_type, health.get_metric(metric_type).value, include_unit, nan)
+
+
+def format_metric_value(metric_type: MetricType, value: MetricValue, include_unit: bool = False, nan="N/A") -> str:
+    if math.isnan(value):
         return nan
 
     format_str = "{:.2f}{}" if metric_type == MetricType.JITTER else "{:.0f}{}"
-    return format_str.format(metric.value, metric.unit if include_unit else "")
+    return format_str.format(value, metric_type.unit if include_unit else "")
 
 
 class MatrixView:
     METRIC_SELECTOR = "metric-selector"
     AUTO_REFRESH_CHECKBOX = "auto-refresh"
+    HEATMAP = "matrix-heatmap"
+    HEATMAP_DATA = "matrix-heatmap-data"  # compact arrays the heatmap is drawn from, in client-side JS code
+    HEATMAP_CELL_PX = 28
+    UPDATES_PATH = "/matrix-updates"  # matrix changes since given data version; see: make_update
+    DATA_VERSION = "matrix-data-version"  # used in client-side JS code to request updates since that version
+    DATA_METRIC = "matrix-data-metric"
+    DATA_AGE = "data-age"
+    DATA_UPDATE_TIME = "data-update-time"  # used in client-side JS code to compute data age
 
     def __init__(self, config: Config) -> None:
         self._config = config
+        self._matrix_cache = LayoutCache()
+        self._updates = MatrixUpdates(self._classify)
 
     def make_layout(
-        self, results: MeshResults, config: MeshConfig, data_history_seconds: int, metric: MetricType
-    ) -> html.Div:
+        self,
+        results: MeshResults,
+        config: MeshConfig,
+        data_history_seconds: int,
+        metric: MetricType,
+        data_update_time: Optional[float] = None,
+    ) -> FrozenLayout:
+        """
+        Matrix layout is built once per results version, metric and cache update, and shared by all the requests
+        until the results are updated. Data age is computed in the browser from the cache update time,
+        so the layout, and its serialized and compressed response, stays the same for all the viewers
+        """
+
+        if results.connection_matrix.num_connections_with_data() == 0:
+            return freeze(self._make_page(results, config, data_history_seconds, metric, data_update_time))
+        return self._matrix_cache.get(
+            results.version,
+            (metric, data_update_time),
+            config,
+            lambda: self._make_page(results, config, data_history_seconds, metric, data_update_time),
+        )
 
-        header = self.make_header_content(results, metric, config.update_period_seconds)
+    def _make_page(
+        self,
+        results: MeshResults,
+        config: MeshConfig,
+        data_history_seconds: int,
+        metric: MetricType,
+        data_update_time: Optional[float],
+    ) -> html.Div:
+        header = self.make_header_content(results, metric, config.update_period_seconds, data_update_time)
         if results.connection_matrix.num_connections_with_data() > 0:
             content = self.make_matrix_content(results, config, metric)
         else:
@@ -85,7 +129,13 @@ class MatrixView:
             ],
         )
 
-    def make_header_content(self, results: MeshResults, metric: MetricType, update_period_seconds: int) -> List:
+    def make_header_content(
+        self,
+        results: MeshResults,
+        metric: MetricType,
+        update_period_seconds: int,
+        data_update_time: Optional[float] = None,
+    ) -> List:
         timestamp_low_iso = results.utc_timestamp_oldest.isoformat() if results.utc_timestamp_oldest else None
         timestamp_high_iso = results.utc_timestamp_newest.isoformat() if results.utc_timestamp_newest else None
         title = html.Div(children=html.Span(children="SLA Dashboard"), className="header_title")
@@ -93,6 +143,7 @@ class MatrixView:
         if results.connection_matrix.num_connections_with_data() == 0:
             return [title]
         else:
+            stale_seconds = self._config.data_stale_periods * update_period_seconds
             return [
                 title,
                 # Metric dropdown
@@ -145,11 +196,64 @@ class MatrixView:
                     ],
                     className="time_range",
                 ),
+                # Data age
+                html.Div(
+                    id=self.DATA_AGE,
+                    title=f"data is considered stale after {stale_seconds} seconds",
+                    children="Data age: N/A",
+                    className="data_age",
+                ),
+                html.Span(
+                    id=self.DATA_UPDATE_TIME,
+                    title=_to_iso(data_update_time),  # used in client-side JS code
+                ),
+                html.Span(
+                    id="data-stale-seconds",
+                    title=str(stale_seconds),  # used in client-side JS code
+                ),
             ]
 
     def make_matrix_content(self, results: MeshResults, config: MeshConfig, metric: MetricType) -> List:
+        data_version, _ = self._updates.data_version(results, config)
+        version = html.Div(
+            children=[
+                html.Span(id=self.DATA_VERSION, title=data_version),  # used in client-side JS code
+                html.Span(id=self.DATA_METRIC, title=metric.value),  # used in client-side JS code
+            ]
+        )
+        if self._config.matrix_renderer == MatrixRenderer.HEATMAP:
+            return [
+                version,
+                html.Div(className="scrollbox", children=self._make_matrix_heatmap(results, config, metric)),
+            ]
         matrix_table = self._make_matrix_table(results, config, metric)
-        return [html.Div(className="scrollbox", children=matrix_table)]
+        return [version, html.Div(className="scrollbox", children=matrix_table)]
+
+    def make_update(
+        self,
+        results: MeshResults,
+        config: MeshConfig,
+        metric: MetricType,
+        since_version: str,
+        data_update_time: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Matrix cells changed since given data version and current header values, to update the page in place"""
+
+        update = self._updates.make_update(results, config, metric, since_version)
+        if update["reload"]:
+            return update
+        update["header"] = {
+            "data_update_time": _to_iso(data_update_time),
+            "timestamp_low": results.utc_timestamp_oldest.isoformat() if results.utc_timestamp_oldest else "",
+            "timestamp_high": results.utc_timestamp_newest.isoformat() if results.utc_timestamp_newest else "",
+        }
+        if "cells" in update:
+            update["format"] = {
+                "metrics": self._metric_formats(),
+                "colors": self._state_colors(),
+                "show_values": self._config.show_measurement_values,
+            }
+        return update
 
     # noinspection PyMethodMayBeStatic
     def make_no_data_content(self, data_history_seconds: int) -> List:
@@ -197,41 +301,117 @@ class MatrixView:
     ) -> List[List[MatrixCell]]:
         rows: List[List[MatrixCell]] = []
 
-        header = [MatrixCell()] + [MatrixCell(text=self._agent_label(a)) for a in config.agents.all()]
+        agents = list(config.agents.all())
+        header = [MatrixCell()] + [MatrixCell(text=self._agent_label(a)) for a in agents]
         rows.append(header)
 
-        thresholds = self._get_thresholds(metric_type)
-        for from_agent in config.agents.all():
+        # classify all the connections at once, using latest measurements laid out in agents order
+        agent_ids = [a.id for a in agents]
+        latest = results.connection_matrix.latest.select(agent_ids)
+        has_data = latest.has_data
+        values = {m: latest.values(m) for m in MetricType}
+        states = self._classify(latest, metric_type)
+        state_colors = self._state_colors()
+        distances = config.distances.select(agent_ids, self._config.distance_unit)
+
+        for i, from_agent in enumerate(agents):
             row: List[MatrixCell] = [MatrixCell(text=self._agent_label(from_agent))]
-            for to_agent in config.agents.all():
-                if from_agent == to_agent:
+            for j, to_agent in enumerate(agents):
+                if i == j:
                     row.append(MatrixCell())  # matrix diagonal
+                    continue
+
+                href = quote(routing.encode_time_series_path(from_agent.id, to_agent.id))
+                if has_data[i, j]:
+                    metrics = {m: values[m][i, j] for m in MetricType}
+                    timestamp = from_timestamp_us(int(latest.timestamps[i, j]))
+                    tooltip = self._make_tooltip_items(from_agent, to_agent, distances[i, j], metrics, timestamp)
+                    color = state_colors[states[i, j]]
+                    text = format_metric_value(metric_type, metrics[metric_type])
+                    row.append(MatrixCell(text=text, tooltip=tooltip, color=color, href=href))
                 else:
-                    warning = thresholds.warning(from_agent.id, to_agent.id)
-                    critical = thresholds.critical(from_agent.id, to_agent.id)
-                    health = results.connection(from_agent.id, to_agent.id).latest_measurement
-                    tooltip = self._make_tooltip_items(from_agent, to_agent, results)
-                    href = quote(routing.encode_time_series_path(from_agent.id, to_agent.id))
-                    if health:
-                        metric = health.get_metric(metric_type)
-                        color = self._cell_color(metric.value, warning, critical)
-                        text = format_health(metric_type, health)
-                        row.append(MatrixCell(text=text, tooltip=tooltip, color=color, href=href))
-                    else:
-                        color_nodata = self._config.matrix.cell_color_nodata
-                        row.append(MatrixCell(text="-", tooltip=tooltip, color=color_nodata, href=href))
+                    tooltip = self._make_tooltip_items(from_agent, to_agent, distances[i, j])
+                    color_nodata = self._config.matrix.cell_color_nodata
+                    row.append(MatrixCell(text="-", tooltip=tooltip, color=color_nodata, href=href))
             rows.append(row)
         return rows
 
-    def _cell_color(self, val: MetricValue, warning: Threshold, critical: Threshold) -> MatrixCellColor:
+    def _make_matrix_heatmap(self, results: MeshResults, config: MeshConfig, metric_type: MetricType) -> List:
+        """
+        Single heatmap chart instead of a table cell per connection. The server only sends the data, as compact arrays;
+        heatmap, cell tooltips and drill-down links are made from it in the browser, see: data/assets/04_matrix_heatmap.js
+        """
+
+        agents = list(config.agents.all())
+        size_px = max(500, len(agents) * self.HEATMAP_CELL_PX + 250)
+        return [
+            html.Div(className="matrix-heatmap-legend", children=self._make_legend()),
+            dcc.Store(id=self.HEATMAP_DATA, data=self._make_heatmap_data(results, config, agents, metric_type)),
+            dcc.Graph(
+                id=self.HEATMAP,
+                className="matrix-heatmap",
+                style={"height": f"{size_px}px", "width": f"{size_px}px"},
+                config={"displayModeBar": False},
+            ),
+        ]
+
+    def _make_heatmap_data(
+        self, results: MeshResults, config: MeshConfig, agents: List[Agent], metric_type: MetricType
+    ) -> Dict[str, Any]:
+        agent_ids = [a.id for a in agents]
+        latest = results.connection_matrix.latest.select(agent_ids)
+        has_data = latest.has_data
+        states = self._classify(latest, metric_type)
+        timestamps_ms = latest.timestamps // 1000
+
+        distance_unit = self._config.distance_unit
+        distances = config.distances.select(agent_ids, distance_unit)
+        unknown_distances = np.isnan(distances)  # agents not in mesh config yet, eg. right after test config change
+
+        # diagonal is left blank; None is sent as JSON null
+        diagonal = np.eye(len(agents), dtype=bool)
+        return {
+            "metric": metric_type.value,
+            "metrics": self._metric_formats(),
+            "labels": [self._agent_label(a) for a in agents],
+            "names": [f"{a.name}, {a.alias} [{a.id}]" for a in agents],
+            "ids": [str(a.id) for a in agents],
+            "states": _to_json_matrix(states, diagonal),
+            "values": {m.value: _to_json_matrix(np.round(latest.values(m), 2), ~has_data) for m in MetricType},
+            "timestamps": _to_json_matrix(timestamps_ms, ~has_data),
+            "distances": _to_json_matrix(
+                np.round(np.nan_to_num(distances)).astype(np.int64), diagonal | unknown_distances
+            ),
+            "distance_unit": distance_unit.value,
+            "colors": self._state_colors(),
+            "show_values": self._config.show_measurement_values,
+            # drill-down link template; placeholders survive quoting and are replaced with agent ids
+            "time_series_path": quote(routing.encode_time_series_path("__from__", "__to__")),
+        }
+
+    def _state_colors(self) -> List[MatrixCellColor]:
+        """Cell colors indexed by ConnectionState"""
+
         config = self._config.matrix
-        if math.isnan(val):
-            return config.cell_color_nodata
-        if val >= critical:
-            return config.cell_color_critical
-        if val >= warning:
-            return config.cell_color_warning
-        return config.cell_color_healthy
+        colors = {
+            ConnectionState.NODATA: config.cell_color_nodata,
+            ConnectionState.HEALTHY: config.cell_color_healthy,
+            ConnectionState.WARNING: config.cell_color_warning,
+            ConnectionState.CRITICAL: config.cell_color_critical,
+        }
+        return [colors[state] for state in ConnectionState]
+
+    @staticmethod
+    def _metric_formats() -> List[Dict[str, Any]]:
+        """How metric values are formatted, for client-side JS code; see: format_metric_value"""
+
+        return [{"name": m.value, "unit": m.unit, "decimals": 2 if m == MetricType.JITTER else 0} for m in MetricType]
+
+    def _classify(self, latest: LatestMeasurements, metric: MetricType) -> np.ndarray:
+        """ConnectionState codes of latest measurements, with thresholds of their connections"""
+
+        thresholds = self._get_thresholds(metric).matrices(latest.agent_ids)
+        return classify(latest.values(metric), thresholds.warning, thresholds.critical)
 
     def _get_thresholds(self, metric: MetricType) -> Thresholds:
         if metric == MetricType.LATENCY:
@@ -240,24 +420,28 @@ class MatrixView:
             return self._config.jitter
         return self._config.packet_loss
 
-    def _make_tooltip_items(self, from_agent: Agent, to_agent: Agent, mesh: MeshResults) -> List[ToolTip]:
+    def _make_tooltip_items(
+        self,
+        from_agent: Agent,
+        to_agent: Agent,
+        distance: float,
+        metrics: Optional[Dict[MetricType, MetricValue]] = None,
+        timestamp: Optional[datetime] = None,
+    ) -> List[ToolTip]:
         if from_agent == to_agent:
             return []
-        conn = mesh.connection(from_agent.id, to_agent.id)
         distance_unit = self._config.distance_unit
-        distance = calc_distance(from_agent.coords, to_agent.coords, distance_unit)
 
         items: List[ToolTip] = [
             ToolTip("From", f"{from_agent.name}, {from_agent.alias} [{from_agent.id}]"),
             ToolTip("To", f" {to_agent.name}, {to_agent.alias} [{to_agent.id}]"),
-            ToolTip("Distance", f"{distance:.0f} {distance_unit.value}"),
+            ToolTip("Distance", "N/A" if math.isnan(distance) else f"{distance:.0f} {distance_unit.value}"),
         ]
 
-        health = conn.latest_measurement
-        if health:
+        if metrics and timestamp:
             for m in MetricType:
-                items.append(ToolTip(m.value, f"{format_health(m, health, True)}"))
-            items.append(ToolTip("Timestamp", f"{health.timestamp.strftime('%x %X %Z')}"))
+                items.append(ToolTip(m.value, f"{format_metric_value(m, metrics[m], True)}"))
+            items.append(ToolTip("Timestamp", f"{timestamp.strftime('%x %X %Z')}"))
         else:
             # no data available for this connection
             pass
@@ -296,3 +480,19 @@ class MatrixView:
             ],
             className="chart_legend",
         )
+
+
+def _to_iso(epoch_seconds: Optional[float]) -> str:
+    """ISO 8601 UTC time; empty string for None"""
+
+    if epoch_seconds is None:
+        return ""
+    return datetime.fromtimestamp(epoch_seconds, timezone.utc).isoformat()
+
+
+def _to_json_matrix(values: np.ndarray, blank: np.ndarray) -> List[List[Any]]:
+    """Nested lists of values, with None where blank mask is set"""
+
+    cells = values.astype(object)
+    cells[blank] = None
+    return cells.tolist()
@@ -1,10 +1,10 @@
+import math
 from typing import List, Optional, Tuple
 
 import plotly.graph_objs as go
 from dash import dcc, html
 
 from domain.config import Config
-from domain.geo import calc_distance
 from domain.metric import MetricType
 from domain.model import MeshConfig, MeshResults
 from domain.types import AgentID
@@ -65,7 +65,7 @@ class TimeSeriesView:
         from_agent = config.agents.get_by_id(from_agent_id)
         to_agent = config.agents.get_by_id(to_agent_id)
         distance_unit = self._config.distance_unit
-        distance = calc_distance(from_agent.coords, to_agent.coords, distance_unit)
+        distance = config.distances.distance(from_agent_id, to_agent_id, distance_unit)
         return [
             html.Table(
                 children=html.Tbody(
@@ -74,7 +74,7 @@ class TimeSeriesView:
                         for label, value in (
                             ("From:", f"{from_agent.name}, {from_agent.alias} [{from_agent.id}]"),
                             ("To:", f"{to_agent.name}, {to_agent.alias} [{to_agent.id}]"),
-                            ("Distance:", f"{distance:.0f} {distance_unit.value}"),
+                            ("Distance:", "N/A" if math.isnan(distance) else f"{distance:.0f} {distance_unit.value}"),
                         )
                     ]
                 )
@@ -89,8 +89,7 @@ class TimeSeriesView:
         mesh: MeshResults,
         y_range: Optional[Tuple[float, float]] = None,
     ):
-        filtered = mesh.filter(from_agent, to_agent, metric)
-        xdata, ydata = zip(*filtered) if filtered else ((), ())
+        xdata, ydata = mesh.time_series(from_agent, to_agent, metric)
         layout = go.Layout(
             yaxis={"title": metric.unit, "range": y_range}, modebar={"orientation": "v"}, margin={"t": 0, "b": 0}
         )
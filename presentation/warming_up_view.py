@@ -0,0 +1,19 @@
+from dash import dcc, html
+
+
+class WarmingUpView:
+    """Shown until the data cache gets its first data; the page reloads itself once the data is there"""
+
+    REDIRECT = "warming-up-redirect"
+    CHECK_INTERVAL = "warming-up-check-interval"
+    CHECK_INTERVAL_MILLISECONDS = 2000
+
+    @classmethod
+    def make_layout(cls) -> html.Div:
+        return html.Div(
+            children=[
+                html.H1(children="Warming up: fetching test results...", className="warming_up_message"),
+                dcc.Interval(id=cls.CHECK_INTERVAL, interval=cls.CHECK_INTERVAL_MILLISECONDS),
+                html.Div(id=cls.REDIRECT),
+            ],
+        )
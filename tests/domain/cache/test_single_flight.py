@@ -0,0 +1,92 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+
+from domain.cache.single_flight import SingleFlight
+
+
+def test_concurrent_calls_for_same_key_share_single_call() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls: List[int] = []
+
+    def fetch() -> int:
+        calls.append(1)
+        started.set()
+        release.wait()
+        return 42
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flight.do, "key", fetch)
+        started.wait()
+        followers = [executor.submit(flight.do, "key", fetch) for _ in range(3)]
+        while flight.stats.coalesced < 3:
+            threading.Event().wait(0.001)
+        release.set()
+
+        assert leader.result() == 42
+        assert [f.result() for f in followers] == [42, 42, 42]
+    assert len(calls) == 1
+    assert flight.stats.calls == 1 and flight.stats.coalesced == 3
+
+
+def test_call_after_flight_landed_calls_again() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    assert flight.stats.calls == 2 and flight.stats.coalesced == 0
+
+
+def test_call_joins_flight_under_overlapping_key() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fetch_row() -> str:
+        started.set()
+        release.wait()
+        return "row"
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        row = executor.submit(flight.do, "1:*", fetch_row)
+        started.wait()
+        cell = executor.submit(flight.do, "1:2", lambda: "cell", ["1:*"])
+        while flight.stats.coalesced < 1:
+            threading.Event().wait(0.001)
+        release.set()
+
+        assert row.result() == "row"
+        assert cell.result() == "row"
+
+
+def test_error_is_raised_to_all_callers() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail() -> int:
+        started.set()
+        release.wait()
+        raise ValueError("fetch failed")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "key", fail)
+        started.wait()
+        follower = executor.submit(flight.join, "key")
+        while flight.stats.coalesced < 1:
+            threading.Event().wait(0.001)
+        release.set()
+
+        with pytest.raises(ValueError):
+            leader.result()
+        with pytest.raises(ValueError):
+            follower.result()
+    assert flight.do("key", lambda: 1) == 1  # failed flight doesn't stay in flight
+
+
+def test_join_without_flight_returns_none() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+
+    assert flight.join("key", ["other"]) is None
+    assert flight.stats.coalesced == 0
@@ -0,0 +1,180 @@
+from datetime import timedelta
+from typing import List, Tuple
+
+import numpy as np
+
+from domain.metric import MetricType
+from domain.model.mesh_results import (
+    LatestMeasurements,
+    MeshColumn,
+    from_timestamp_us,
+    pack_columns,
+    unpack_columns,
+)
+from domain.types import AgentID
+
+SECOND_US = 1_000_000
+
+
+def make_column(agent_id: str, timestamps: List[int], latency: float = 10.0) -> MeshColumn:
+    n = len(timestamps)
+    return MeshColumn.from_arrays(
+        AgentID(agent_id),
+        np.array(timestamps, dtype=np.int64),
+        jitter_millisec=np.full(n, 1.0),
+        latency_millisec=np.full(n, latency),
+        packet_loss_percent=np.zeros(n),
+    )
+
+
+def seconds(*values: int) -> List[int]:
+    return [value * SECOND_US for value in values]
+
+
+class TestMeshColumn:
+    def test_merged_with_appends_new_samples_to_shared_buffer(self) -> None:
+        # first merge moves the samples into a buffer with room for the capacity
+        column = make_column("1", seconds(1, 2)).merged_with(make_column("1", seconds(2, 3)), capacity=10)
+
+        merged = column.merged_with(make_column("1", seconds(3, 4, 5)), capacity=10)
+
+        assert merged.timestamps.tolist() == seconds(1, 2, 3, 4, 5)
+        assert column.timestamps.tolist() == seconds(1, 2, 3)  # older version unchanged
+        assert np.shares_memory(merged.timestamps, column.timestamps)
+
+    def test_merged_with_replaces_changed_samples(self) -> None:
+        column = make_column("1", seconds(1, 2, 3), latency=10.0)
+
+        merged = column.merged_with(make_column("1", seconds(2, 3), latency=20.0))
+
+        assert merged.timestamps.tolist() == seconds(1, 2, 3)
+        assert merged.values(MetricType.LATENCY).tolist() == [10.0, 20.0, 20.0]
+        assert column.values(MetricType.LATENCY).tolist() == [10.0, 10.0, 10.0]
+
+    def test_merged_with_empty_keeps_nothing(self) -> None:
+        column = make_column("1", seconds(1, 2))
+
+        assert column.merged_with(make_column("1", [])).num_samples == 0
+
+    def test_merged_with_diverging_versions_dont_overwrite_each_other(self) -> None:
+        base = make_column("1", seconds(1)).merged_with(make_column("1", seconds(1, 2)), capacity=10)
+
+        first = base.merged_with(make_column("1", seconds(2, 3)))
+        second = base.merged_with(make_column("1", seconds(2, 4)))
+
+        assert first.timestamps.tolist() == seconds(1, 2, 3)
+        assert second.timestamps.tolist() == seconds(1, 2, 4)
+        assert base.timestamps.tolist() == seconds(1, 2)
+
+    def test_without_samples_older_than_shares_samples(self) -> None:
+        column = make_column("1", seconds(1, 2, 3, 4))
+
+        trimmed = column.without_samples_older_than(from_timestamp_us(seconds(3)[0]))
+
+        assert trimmed.timestamps.tolist() == seconds(3, 4)
+        assert np.shares_memory(trimmed.timestamps, column.timestamps)
+        assert column.num_samples == 4
+
+    def test_without_samples_older_than_returns_same_column_if_nothing_dropped(self) -> None:
+        column = make_column("1", seconds(5, 6))
+
+        assert column.without_samples_older_than(from_timestamp_us(seconds(5)[0]) - timedelta(seconds=1)) is column
+
+    def test_columns_are_read_only(self) -> None:
+        column = make_column("1", seconds(1, 2))
+
+        assert not column.timestamps.flags.writeable
+        assert not column.values(MetricType.LATENCY).flags.writeable
+
+
+class TestPackColumns:
+    def test_unpack_restores_packed_columns(self) -> None:
+        columns = [make_column("1", seconds(1, 2), latency=5.0), make_column("2", []), make_column("3", seconds(7))]
+
+        offsets, timestamps, metrics = pack_columns(columns)
+        unpacked = unpack_columns([c.agent_id for c in columns], offsets, timestamps, metrics)
+
+        assert offsets.tolist() == [0, 2, 2, 3]
+        assert [c.agent_id for c in unpacked] == ["1", "2", "3"]
+        assert [c.timestamps.tolist() for c in unpacked] == [seconds(1, 2), [], seconds(7)]
+        assert [m.latency_millisec.value for m in unpacked[0].health] == [5.0, 5.0]
+        assert np.shares_memory(unpacked[0].timestamps, timestamps)
+
+    def test_pack_no_columns(self) -> None:
+        offsets, timestamps, metrics = pack_columns([])
+
+        assert offsets.tolist() == [0]
+        assert len(timestamps) == 0
+        assert metrics.shape == (0, 3)
+
+
+def make_cells(cells: List[Tuple[str, str, int]]) -> List[Tuple[AgentID, AgentID, MeshColumn]]:
+    """(from agent, to agent, latest sample second) cells; second 0 means no samples"""
+
+    return [
+        (AgentID(from_agent), AgentID(to_agent), make_column(to_agent, seconds(second) if second else []))
+        for from_agent, to_agent, second in cells
+    ]
+
+
+class TestLatestMeasurements:
+    def test_updated_with_maintains_aggregates(self) -> None:
+        latest = LatestMeasurements.empty().updated_with(make_cells([("1", "2", 10), ("2", "1", 20), ("2", "3", 30)]))
+
+        assert latest.agent_ids == ["1", "2", "3"]
+        assert latest.num_with_data == 3
+        assert latest.timestamp_min == seconds(10)[0]
+        assert latest.timestamp_max == seconds(30)[0]
+        assert latest.row_timestamp_max(AgentID("2")) == seconds(30)[0]
+        assert latest.row_timestamp_max(AgentID("3")) is None
+
+        updated = latest.updated_with(make_cells([("1", "2", 0), ("2", "3", 25)]))
+
+        assert updated.num_with_data == 2
+        assert updated.timestamp_min == seconds(20)[0]
+        assert updated.timestamp_max == seconds(25)[0]
+        assert updated.row_timestamp_max(AgentID("1")) is None
+
+    def test_updated_with_leaves_previous_version_unchanged(self) -> None:
+        latest = LatestMeasurements.empty().updated_with(make_cells([("1", "2", 10), ("2", "1", 20)]))
+        timestamps = latest.timestamps.copy()
+
+        latest.updated_with(make_cells([("1", "2", 11)]))
+        latest.updated_with(make_cells([("1", "3", 12)]))  # new agent
+
+        assert np.array_equal(latest.timestamps, timestamps)
+        assert latest.num_with_data == 2
+        assert latest.timestamp_max == seconds(20)[0]
+
+    def test_updated_with_matches_aggregates_of_fresh_matrix(self) -> None:
+        rng = np.random.default_rng(1)
+        latest = LatestMeasurements.empty()
+        for _ in range(200):
+            agents = [str(a) for a in range(rng.integers(2, 8))]
+            cells = [
+                (str(rng.choice(agents)), str(rng.choice(agents)), int(rng.integers(0, 100)))
+                for _ in range(rng.integers(1, 5))
+            ]
+            latest = latest.updated_with(make_cells(cells))
+
+            fresh = LatestMeasurements(latest.agent_ids, latest.metrics.copy(), latest.timestamps.copy())
+            assert latest.num_with_data == fresh.num_with_data
+            assert latest.timestamp_min == fresh.timestamp_min
+            assert latest.timestamp_max == fresh.timestamp_max
+            assert latest.rows_timestamp_max_min(10 * SECOND_US) == fresh.rows_timestamp_max_min(10 * SECOND_US)
+
+    def test_rows_timestamp_max_min_leaves_out_lagging_rows(self) -> None:
+        latest = LatestMeasurements.empty().updated_with(make_cells([("1", "2", 100), ("2", "1", 95), ("3", "1", 10)]))
+
+        assert latest.rows_timestamp_max_min() == seconds(10)[0]
+        assert latest.rows_timestamp_max_min(10 * SECOND_US) == seconds(95)[0]
+
+    def test_select_lays_out_measurements_in_given_agents_order(self) -> None:
+        latest = LatestMeasurements.empty().updated_with(make_cells([("1", "2", 10), ("2", "1", 20)]))
+
+        selected = latest.select([AgentID("2"), AgentID("9"), AgentID("1")])
+
+        assert selected.timestamps[0, 2] == seconds(20)[0]
+        assert selected.timestamps[2, 0] == seconds(10)[0]
+        assert not selected.has_data[1].any() and not selected.has_data[:, 1].any()
+        assert selected.num_with_data == 2
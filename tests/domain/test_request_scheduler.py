@@ -0,0 +1,91 @@
+import pytest
+
+from domain import request_scheduler
+from domain.request_scheduler import RequestPriority, RequestScheduler
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake_clock = FakeClock()
+    monkeypatch.setattr(request_scheduler.time, "monotonic", fake_clock)
+    return fake_clock
+
+
+def test_key_is_admitted_once_per_interval(clock: FakeClock) -> None:
+    scheduler = RequestScheduler(interval_seconds=60)
+
+    assert scheduler.try_acquire("1:2")
+    assert not scheduler.try_acquire("1:2")
+    assert scheduler.try_acquire("1:3")
+    clock.advance(60)
+    assert scheduler.try_acquire("1:2")
+
+
+def test_unlimited_budget_admits_any_cost(clock: FakeClock) -> None:
+    scheduler = RequestScheduler(interval_seconds=0)
+
+    assert all(scheduler.try_acquire(cost=100) for _ in range(100))
+    assert scheduler.stats.remaining is None
+    assert scheduler.stats.requests_per_hour == 100 * 100
+
+
+def test_budget_is_token_bucket_refilled_at_quota_rate(clock: FakeClock) -> None:
+    scheduler = RequestScheduler(interval_seconds=0, quota_per_hour=3600)  # one token per second
+
+    assert scheduler.try_acquire(cost=3600)
+    assert not scheduler.try_acquire()
+    assert scheduler.seconds_until_available() == pytest.approx(1.0)
+    clock.advance(10)
+    assert scheduler.try_acquire(cost=10)
+    assert not scheduler.try_acquire()
+    assert scheduler.stats.denied == 2
+
+
+def test_bucket_doesnt_fill_over_capacity(clock: FakeClock) -> None:
+    scheduler = RequestScheduler(interval_seconds=0, quota_per_hour=100)
+    clock.advance(3600 * 10)
+
+    assert scheduler.stats.remaining == 100
+    assert not scheduler.try_acquire(cost=101)
+
+
+def test_low_budget_is_reserved_for_high_priority(clock: FakeClock) -> None:
+    scheduler = RequestScheduler(interval_seconds=0, quota_per_hour=100)
+    assert scheduler.try_acquire(cost=75)  # 25 tokens left; 20 of them are reserved for the matrix
+
+    assert scheduler.try_acquire(priority=RequestPriority.TIME_SERIES, cost=5)
+    assert not scheduler.try_acquire(priority=RequestPriority.TIME_SERIES, cost=1)
+    assert scheduler.try_acquire(priority=RequestPriority.MATRIX, cost=20)
+
+
+def test_denied_request_doesnt_take_key_interval(clock: FakeClock) -> None:
+    scheduler = RequestScheduler(interval_seconds=60, quota_per_hour=3600)
+    assert scheduler.try_acquire(cost=3600)
+
+    assert not scheduler.try_acquire("1:2")
+    clock.advance(1)
+    assert scheduler.try_acquire("1:2")
+
+
+def test_idle_keys_are_evicted(clock: FakeClock) -> None:
+    scheduler = RequestScheduler(interval_seconds=60)
+    for i in range(100):
+        assert scheduler.try_acquire(f"1:{i}")
+    clock.advance(30)
+    assert scheduler.try_acquire("2:1")
+
+    clock.advance(30)
+    assert scheduler.try_acquire("2:2")  # sweeps the keys idle for the whole interval
+
+    assert set(scheduler._last_admission) == {"2:1", "2:2"}
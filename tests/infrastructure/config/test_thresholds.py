@@ -0,0 +1,96 @@
+from typing import Any, Dict, List
+
+import numpy as np
+
+from domain.types import AgentID
+from infrastructure.config.thresholds import Thresholds
+
+AGENT_IDS = [AgentID(agent_id) for agent_id in ["10", "11", "20", "21"]]
+GROUPS = {"europe": [AgentID("10"), AgentID("11")], "oceania": [AgentID("20"), AgentID("21")]}
+
+
+def make_thresholds(overrides: List[Dict[str, Any]]) -> Thresholds:
+    return Thresholds({"defaults": {"warning": 100.0, "critical": 200.0}, "overrides": overrides}, GROUPS)
+
+
+def assert_matrices_match_lookups(thresholds: Thresholds) -> None:
+    matrices = thresholds.matrices(AGENT_IDS)
+    for i, from_agent in enumerate(AGENT_IDS):
+        for j, to_agent in enumerate(AGENT_IDS):
+            assert matrices.warning[i, j] == thresholds.warning(from_agent, to_agent)
+            assert matrices.critical[i, j] == thresholds.critical(from_agent, to_agent)
+
+
+def test_defaults_without_overrides() -> None:
+    thresholds = Thresholds({"defaults": {"warning": 100.0, "critical": 200.0}})
+
+    matrices = thresholds.matrices(AGENT_IDS)
+
+    assert (matrices.warning == 100.0).all()
+    assert (matrices.critical == 200.0).all()
+
+
+def test_agent_pair_overrides_group_overrides_wildcard() -> None:
+    thresholds = make_thresholds(
+        [
+            {"from": "10", "to": "20", "warning": 1.0},
+            {"from_group": "europe", "to_group": "oceania", "warning": 2.0, "critical": 3.0},
+            {"from": "*", "to": "*", "warning": 4.0},
+        ]
+    )
+
+    matrices = thresholds.matrices(AGENT_IDS)
+
+    assert matrices.warning.tolist() == [
+        [4.0, 4.0, 1.0, 2.0],
+        [4.0, 4.0, 2.0, 2.0],
+        [4.0, 4.0, 4.0, 4.0],
+        [4.0, 4.0, 4.0, 4.0],
+    ]
+    # agent pair override doesn't set critical; it comes from the group override
+    assert matrices.critical[0, 2] == 3.0
+    assert matrices.critical[2, 0] == 200.0
+    assert_matrices_match_lookups(thresholds)
+
+
+def test_precedence_adds_up_specificity_of_both_sides() -> None:
+    thresholds = make_thresholds(
+        [
+            {"from_group": "oceania", "to": "*", "warning": 5.0},
+            {"from": "*", "to": "*", "warning": 6.0},
+            {"from": "*", "to": "11", "warning": 7.0},
+        ]
+    )
+
+    matrices = thresholds.matrices(AGENT_IDS)
+
+    # single agent with wildcard is more specific than group with wildcard
+    assert matrices.warning[2].tolist() == [5.0, 7.0, 5.0, 5.0]
+    assert matrices.warning[0].tolist() == [6.0, 7.0, 6.0, 6.0]
+    assert_matrices_match_lookups(thresholds)
+
+
+def test_later_of_equally_specific_overrides_wins() -> None:
+    thresholds = make_thresholds(
+        [
+            {"from_group": "europe", "to": "*", "warning": 8.0},
+            {"from": "*", "to_group": "oceania", "warning": 9.0},
+        ]
+    )
+
+    matrices = thresholds.matrices(AGENT_IDS)
+
+    assert matrices.warning[0].tolist() == [8.0, 8.0, 9.0, 9.0]
+    assert_matrices_match_lookups(thresholds)
+
+
+def test_matrices_are_recompiled_for_other_agents() -> None:
+    thresholds = make_thresholds([{"from": "10", "to": "11", "warning": 1.0}])
+
+    first = thresholds.matrices(AGENT_IDS)
+    assert thresholds.matrices(list(AGENT_IDS)) is first
+    reordered = thresholds.matrices([AgentID("11"), AgentID("10")])
+
+    assert reordered.warning.tolist() == [[100.0, 100.0], [1.0, 100.0]]
+    assert not np.shares_memory(first.warning, reordered.warning)
+    assert not reordered.warning.flags.writeable
@@ -0,0 +1,139 @@
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pytest
+
+from domain import types
+from domain.cache.caching_repo_request_driven import CachingRepoRequestDriven
+from domain.cache.snapshot_store import MeshSnapshot
+from domain.metric import MetricType
+from domain.model import Agent, Agents, MeshColumn, MeshConfig, MeshResults, MeshRow, Task, Tasks
+from domain.model.mesh_results import to_timestamp_us
+from domain.types import IP, AgentID, TaskID
+from infrastructure.data_access.file.mesh_snapshot_file import MeshSnapshotFile
+
+TEST_ID = types.TestID("3541")
+PERIOD_SECONDS = 60
+
+
+def make_config() -> MeshConfig:
+    agents = Agents()
+    agents.insert(Agent(id=AgentID("10"), ip=IP("10.0.0.10"), name="frankfurt"))
+    agents.insert(Agent(id=AgentID("11"), ip=IP("10.0.0.11"), name="sydney"))
+    return MeshConfig(agents=agents, update_period_seconds=PERIOD_SECONDS)
+
+
+def make_results() -> MeshResults:
+    now = to_timestamp_us(datetime.now(timezone.utc))
+    timestamps = np.array([now - 120_000_000, now - 60_000_000, now], dtype=np.int64)
+    column = MeshColumn.from_arrays(
+        AgentID("11"),
+        timestamps,
+        jitter_millisec=np.array([1.0, 2.0, 3.0]),
+        latency_millisec=np.array([10.0, 20.0, 30.0]),
+        packet_loss_percent=np.array([0.0, 100.0, 0.0]),
+    )
+    tasks = Tasks()
+    tasks.insert(Task(id=TaskID("1"), target_ip=IP("10.0.0.11"), period_seconds=PERIOD_SECONDS))
+    rows = [MeshRow(agent=Agent(id=AgentID("10"), name="frankfurt"), columns=[column])]
+    return MeshResults(rows=rows, tasks=tasks)
+
+
+def make_snapshot(test_id: types.TestID = TEST_ID) -> MeshSnapshot:
+    return MeshSnapshot(
+        test_id=test_id,
+        results=make_results(),
+        config=make_config(),
+        min_history_seconds=3 * PERIOD_SECONDS,
+        update_time=time.time(),
+        connections_with_full_history=frozenset({"10:11"}),
+    )
+
+
+class StubRepo:
+    def get_mesh_config(self, test_id: types.TestID) -> MeshConfig:
+        return make_config()
+
+    def get_mesh_test_results(
+        self,
+        test_id: types.TestID,
+        history_length_seconds: int,
+        timeseries: bool = True,
+        agent_ids: Optional[List[AgentID]] = None,
+        task_ids: Optional[List[TaskID]] = None,
+    ) -> MeshResults:
+        return MeshResults()
+
+
+def make_cache(test_id: types.TestID) -> CachingRepoRequestDriven:
+    return CachingRepoRequestDriven(StubRepo(), test_id, 1, 10, 3, 10, 0)
+
+
+def test_load_returns_none_without_file(tmp_path: Path) -> None:
+    assert MeshSnapshotFile(str(tmp_path / "snapshot")).load() is None
+
+
+def test_saved_snapshot_loads_back(tmp_path: Path) -> None:
+    snapshot = make_snapshot()
+    file = MeshSnapshotFile(str(tmp_path / "snapshot"))
+
+    file.save(snapshot)
+    file.save(snapshot)
+    loaded = file.load()
+
+    assert loaded is not None
+    assert MeshSnapshotFile(file.path).read_version() == 2
+    assert loaded.test_id == TEST_ID
+    assert loaded.min_history_seconds == snapshot.min_history_seconds
+    assert loaded.update_time == snapshot.update_time
+    assert loaded.connections_with_full_history == {"10:11"}
+    assert loaded.config.update_period_seconds == PERIOD_SECONDS
+    assert [agent.name for agent in loaded.config.agents.all()] == ["frankfurt", "sydney"]
+    assert loaded.results.tasks.get_by_ip(IP("10.0.0.11")) == Task(TaskID("1"), IP("10.0.0.11"), PERIOD_SECONDS)
+
+    original = snapshot.results.connection(AgentID("10"), AgentID("11"))
+    column = loaded.results.connection(AgentID("10"), AgentID("11"))
+    assert column.timestamps.tolist() == original.timestamps.tolist()
+    np.testing.assert_array_equal(column.values(MetricType.LATENCY), [10.0, np.nan, 30.0])  # no latency at 100% loss
+    assert loaded.results.participating_agents.get_by_id(AgentID("10")).name == "frankfurt"
+
+
+def test_snapshot_of_older_format_is_rejected(tmp_path: Path) -> None:
+    file = MeshSnapshotFile(str(tmp_path / "snapshot"))
+    file.save(make_snapshot())
+    content = bytearray(Path(file.path).read_bytes())
+    content[:8] = b"SLAMESH1"
+    Path(file.path).write_bytes(bytes(content))
+
+    assert MeshSnapshotFile(file.path).read_version() == 0
+    with pytest.raises(Exception, match="Unsupported mesh snapshot file format"):
+        file.load()
+
+
+def test_loaded_snapshot_restores_cache_of_same_test(tmp_path: Path) -> None:
+    file = MeshSnapshotFile(str(tmp_path / "snapshot"))
+    file.save(make_snapshot())
+    loaded = file.load()
+    assert loaded is not None
+
+    cache = make_cache(TEST_ID)
+
+    assert cache.restore(loaded)
+    assert cache.data_age_seconds is not None
+    assert cache.snapshot().results.connection(AgentID("10"), AgentID("11")).num_samples == 3
+
+
+def test_loaded_snapshot_of_different_test_is_rejected(tmp_path: Path) -> None:
+    file = MeshSnapshotFile(str(tmp_path / "snapshot"))
+    file.save(make_snapshot(types.TestID("other")))
+    loaded = file.load()
+    assert loaded is not None
+
+    cache = make_cache(TEST_ID)
+
+    assert not cache.restore(loaded)
+    assert cache.data_age_seconds is None
+    assert CachingRepoRequestDriven(StubRepo(), TEST_ID, 1, 10, 3, 10, 0, loaded).data_age_seconds is None
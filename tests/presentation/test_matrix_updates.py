@@ -0,0 +1,116 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from domain.metric import MetricType
+from domain.model import Agent, Agents, MeshColumn, MeshConfig, MeshResults, MeshRow
+from domain.model.mesh_results import LatestMeasurements
+from domain.types import AgentID
+from presentation.matrix_updates import MatrixUpdates
+
+SECOND_US = 1_000_000
+
+
+def make_config(agent_ids: List[str]) -> MeshConfig:
+    agents = Agents()
+    for agent_id in agent_ids:
+        agents.insert(Agent(id=AgentID(agent_id), name=f"agent-{agent_id}"))
+    return MeshConfig(agents=agents, update_period_seconds=60)
+
+
+def make_results(cells: Dict[Tuple[str, str], Tuple[int, float]]) -> MeshResults:
+    """(from agent, to agent) -> (latest sample second, latency) cells"""
+
+    columns: Dict[str, List[MeshColumn]] = {}
+    for (from_agent, to_agent), (second, latency) in cells.items():
+        column = MeshColumn.from_arrays(
+            AgentID(to_agent),
+            np.array([second * SECOND_US], dtype=np.int64),
+            jitter_millisec=np.array([1.0]),
+            latency_millisec=np.array([latency]),
+            packet_loss_percent=np.array([0.0]),
+        )
+        columns.setdefault(from_agent, []).append(column)
+    return MeshResults(rows=[MeshRow(Agent(id=AgentID(a), name=f"agent-{a}"), c) for a, c in columns.items()])
+
+
+def has_data(latest: LatestMeasurements, metric: MetricType) -> np.ndarray:
+    return latest.has_data.astype(np.int64)
+
+
+def test_same_data_makes_same_version() -> None:
+    updates = MatrixUpdates(has_data)
+    config = make_config(["1", "2"])
+    cells = {("1", "2"): (10, 5.0)}
+
+    version, latest = updates.data_version(make_results(cells), config)
+
+    assert MatrixUpdates(has_data).data_version(make_results(cells), config)[0] == version
+    assert updates.data_version(make_results({("1", "2"): (11, 5.0)}), config)[0] != version
+    assert latest.agent_ids == ["1", "2"]
+
+
+def test_update_since_current_version_has_no_cells() -> None:
+    updates = MatrixUpdates(has_data)
+    config = make_config(["1", "2"])
+    results = make_results({("1", "2"): (10, 5.0)})
+    version, _ = updates.data_version(results, config)
+
+    assert updates.make_update(results, config, MetricType.LATENCY, version) == {"version": version, "reload": False}
+
+
+def test_update_since_previous_version_has_changed_cells_only() -> None:
+    updates = MatrixUpdates(has_data)
+    config = make_config(["1", "2", "3"])
+    previous = make_results({("1", "2"): (10, 5.0), ("2", "1"): (10, 6.0), ("3", "1"): (10, 7.0)})
+    previous_version, _ = updates.data_version(previous, config)
+    current = make_results({("1", "2"): (10, 5.0), ("2", "1"): (20, 8.5), ("1", "3"): (20, 9.0)})
+
+    update = updates.make_update(current, config, MetricType.LATENCY, previous_version)
+
+    assert not update["reload"]
+    cells = update["cells"]
+    assert list(zip(cells["rows"], cells["cols"])) == [(0, 2), (1, 0), (2, 0)]
+    assert cells["states"] == [1, 1, 0]
+    assert cells["values"][MetricType.LATENCY.value] == [9.0, 8.5, None]
+    assert cells["timestamps"] == [20_000, 20_000, None]
+    assert cells["timestamp_texts"][2] is None
+
+
+def test_update_since_unknown_version_has_all_cells() -> None:
+    updates = MatrixUpdates(has_data)
+    config = make_config(["1", "2"])
+    results = make_results({("1", "2"): (10, 5.0)})
+    version, _ = updates.data_version(results, config)
+    agents_version = version.split("-")[0]
+
+    update = updates.make_update(results, config, MetricType.LATENCY, f"{agents_version}-00000000")
+
+    cells = update["cells"]
+    assert list(zip(cells["rows"], cells["cols"])) == [(0, 1), (1, 0)]  # diagonal is never sent
+    assert cells["states"] == [1, 0]
+
+
+def test_update_for_different_agents_requests_reload() -> None:
+    updates = MatrixUpdates(has_data)
+    results = make_results({("1", "2"): (10, 5.0)})
+    old_version, _ = updates.data_version(results, make_config(["1", "2"]))
+    config = make_config(["1", "2", "3"])
+
+    update = updates.make_update(results, config, MetricType.LATENCY, old_version)
+
+    assert update == {"version": updates.data_version(results, config)[0], "reload": True}
+
+
+def test_version_falls_out_of_history() -> None:
+    updates = MatrixUpdates(has_data)
+    config = make_config(["1", "2"])
+    first_version, _ = updates.data_version(make_results({("1", "2"): (1, 5.0)}), config)
+    for second in range(2, MatrixUpdates.HISTORY_LENGTH + 2):
+        results = make_results({("1", "2"): (second, 5.0)})
+        updates.data_version(results, config)
+
+    update = updates.make_update(results, config, MetricType.LATENCY, first_version)
+
+    # unknown base version; all the cells are sent, not only the changed ones
+    assert list(zip(update["cells"]["rows"], update["cells"]["cols"])) == [(0, 1), (1, 0)]